@@ -1,6 +1,7 @@
 
 from pydantic import BaseModel
 from typing import Optional
+from base.search_rag import RetrievalMethod
 from fastapi import File, UploadFile, Form
 
 
@@ -14,6 +15,7 @@ class ChatWithAutorRequest(BaseRequest):
 
     messages: str
     learner_profile: str = ""
+    retrieval_method: Optional[RetrievalMethod] = None
 
 
 class LearningGoalRefinementRequest(BaseRequest):
@@ -133,6 +135,7 @@ class TailoredContentGenerationRequest(BaseModel):
     use_search: bool = True
     allow_parallel: bool = True
     with_quiz: bool = True
+    speculative_drafting: Optional[bool] = None  # None: use content.speculative_drafting
 
 
 class KnowledgePointExplorationRequest(BaseModel):
@@ -0,0 +1,95 @@
+"""Process-wide registry of compiled agent graphs.
+
+``langchain.agents.create_agent`` compiles a LangGraph state graph, which is
+far more expensive than the agent wrappers built around it. The graph itself
+is stateless between invocations, so agents that share a class, system
+prompt, model instance and tool/agent configuration can share one compiled
+runnable. Chat models are pooled by ``LLMFactory``, which keeps the model part
+of the key stable across requests.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class AgentRegistry:
+    """Thread-safe, bounded LRU cache of compiled agent graphs."""
+
+    def __init__(self, max_size: int = 256) -> None:
+        self.max_size = max_size
+        # key -> (compiled graph, objects referenced by id() in the key)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Tuple[Any, ...]]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def make_key(
+        agent_cls: type,
+        system_prompt: Optional[str],
+        model: Any,
+        tools: Optional[list[Any]] = None,
+        agent_kwargs: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Hashable, Tuple[Any, ...]]:
+        """Build the registry key and the objects it references by identity.
+
+        Models, tools and agent kwargs (middleware, checkpointers, ...) are not
+        reliably hashable, so they take part in the key by ``id()``. The
+        referenced objects are kept alive next to the graph so an id can never
+        be recycled while its entry is cached.
+        """
+        tools = list(tools or [])
+        agent_kwargs = dict(agent_kwargs or {})
+        refs = (model, *tools, *agent_kwargs.values())
+        key = (
+            f"{agent_cls.__module__}.{agent_cls.__qualname__}",
+            system_prompt,
+            id(model),
+            tuple(id(tool) for tool in tools),
+            tuple(sorted((name, id(value)) for name, value in agent_kwargs.items())),
+        )
+        return key, refs
+
+    def get_or_build(self, key: Hashable, refs: Tuple[Any, ...], builder: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._hits += 1
+                self._entries.move_to_end(key)
+                return entry[0]
+            self._misses += 1
+        # Compile outside the lock so a cold build doesn't block other agents.
+        graph = builder()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                # Built concurrently by another caller; share the cached graph.
+                graph = entry[0]
+            else:
+                self._entries[key] = (graph, refs)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max(self.max_size, 0):
+                self._entries.popitem(last=False)
+            return graph
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+
+agent_registry = AgentRegistry()
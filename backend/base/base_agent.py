@@ -1,9 +1,12 @@
-from typing import Any, Dict, Optional, Sequence
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
 from langchain.agents import create_agent
 from langchain_core.language_models import BaseChatModel
 
-from utils.llm_output import preprocess_response
+from base.agent_registry import agent_registry
+from base.response_cache import get_response_cache
+from utils.concurrency import run_blocking
+from utils.llm_output import ThinkTagFilter, preprocess_response
 from langgraph.typing import InputT, OutputT, StateT
 from langchain.agents.middleware.types import (
     AgentMiddleware,
@@ -30,6 +33,9 @@ valid_agent_arg_list = [
     "cache"
 ]
 
+# Default number of in-flight model calls for BaseAgent.batch/abatch.
+DEFAULT_BATCH_CONCURRENCY = 8
+
 
 class BaseAgent:
 
@@ -45,17 +51,27 @@ class BaseAgent:
         self._system_prompt = system_prompt
         self._tools = tools
         self._agent_kwargs = {k: v for k, v in kwargs.items() if k in valid_agent_arg_list}
+        self.reuse_agent = kwargs.get("reuse_agent", True)
         self._agent = self._build_agent()
         self.exclude_think = kwargs.get("exclude_think", True)
         self.jsonalize_output = kwargs.get("jsonalize_output", True)
 
     def _build_agent(self):
-        return create_agent(
-            model=self._model,
-            tools=self._tools,
-            system_prompt=self._system_prompt,
-            **self._agent_kwargs,
+        """Return the compiled agent graph, shared through the agent registry when possible."""
+        def build():
+            return create_agent(
+                model=self._model,
+                tools=self._tools,
+                system_prompt=self._system_prompt,
+                **self._agent_kwargs,
+            )
+
+        if not self.reuse_agent:
+            return build()
+        key, refs = agent_registry.make_key(
+            type(self), self._system_prompt, self._model, self._tools, self._agent_kwargs
         )
+        return agent_registry.get_or_build(key, refs, build)
 
     def set_prompts(self, system_prompt: Optional[str] = None, task_prompt: Optional[str] = None) -> None:
         """Set or update system/task prompts and rebuild the internal agent if needed."""
@@ -80,8 +96,206 @@ class BaseAgent:
     def invoke(self, input_dict: dict, task_prompt: Optional[str] = None) -> Any:
         """Invoke the agent with the given input text."""
         input_prompt = self._build_prompt(input_dict, task_prompt=task_prompt)
+        cache, cache_key = self._response_cache_key(input_prompt)
+        found, cached_output = cache.lookup(cache_key, self._agent_name)
+        if found:
+            return cached_output
         raw_output = self._agent.invoke(input_prompt)
-        output = preprocess_response(
+        output = self._postprocess(raw_output)
+        cache.store(cache_key, self._agent_name, output)
+        return output
+
+    async def ainvoke(self, input_dict: dict, task_prompt: Optional[str] = None) -> Any:
+        """Asynchronously invoke the agent without blocking the event loop."""
+        input_prompt = self._build_prompt(input_dict, task_prompt=task_prompt)
+        cache, cache_key = self._response_cache_key(input_prompt)
+        found, cached_output = await self._off_loop(cache.lookup, cache_key, self._agent_name)
+        if found:
+            return cached_output
+        raw_output = await self._agent.ainvoke(input_prompt)
+        output = self._postprocess(raw_output)
+        await self._off_loop(cache.store, cache_key, self._agent_name, output)
+        return output
+
+    def batch(
+        self,
+        inputs: Sequence[Any],
+        task_prompt: Optional[str] = None,
+        *,
+        max_concurrency: Optional[int] = None,
+        validate_input: Optional[Callable[[Any], dict]] = None,
+        validate_output: Optional[Callable[[Any], Any]] = None,
+        return_exceptions: bool = False,
+    ) -> List[Any]:
+        """Invoke the agent once per input, dispatching the model calls as one batch.
+
+        Results keep the order of ``inputs``. Each item is validated, formatted,
+        looked up in the response cache and post-processed on its own, so one
+        bad item never affects the others. With ``return_exceptions=True`` a
+        failed item's exception is returned in its slot; otherwise the first
+        failure is raised once the whole batch has finished.
+
+        Args:
+            inputs: Raw payloads, or prompt variables when ``validate_input`` is omitted.
+            max_concurrency: Upper bound on in-flight model calls
+                (defaults to ``DEFAULT_BATCH_CONCURRENCY``).
+            validate_input: Turns a raw payload into prompt variables.
+            validate_output: Validates/converts each post-processed model output.
+        """
+        results, pending = self._prepare_batch(inputs, task_prompt, validate_input)
+        if pending:
+            raw_outputs = self._agent.batch(
+                [prompt for _, prompt, _ in pending],
+                config=self._batch_config(max_concurrency),
+                return_exceptions=True,
+            )
+            self._finish_batch(results, pending, raw_outputs)
+        return self._collect_batch(results, validate_output, return_exceptions)
+
+    async def abatch(
+        self,
+        inputs: Sequence[Any],
+        task_prompt: Optional[str] = None,
+        *,
+        max_concurrency: Optional[int] = None,
+        validate_input: Optional[Callable[[Any], dict]] = None,
+        validate_output: Optional[Callable[[Any], Any]] = None,
+        return_exceptions: bool = False,
+    ) -> List[Any]:
+        """Async counterpart of :meth:`batch`."""
+        results, pending = await self._off_loop(self._prepare_batch, inputs, task_prompt, validate_input)
+        if pending:
+            raw_outputs = await self._agent.abatch(
+                [prompt for _, prompt, _ in pending],
+                config=self._batch_config(max_concurrency),
+                return_exceptions=True,
+            )
+            await self._off_loop(self._finish_batch, results, pending, raw_outputs)
+        return self._collect_batch(results, validate_output, return_exceptions)
+
+    @staticmethod
+    async def _off_loop(func: Callable[..., Any], *args: Any) -> Any:
+        """Run a response-cache step in the io executor when it touches the SQLite tier."""
+        if get_response_cache().uses_disk:
+            return await run_blocking("io", func, *args)
+        return func(*args)
+
+    @staticmethod
+    def _batch_config(max_concurrency: Optional[int]) -> Dict[str, Any]:
+        return {"max_concurrency": max(1, int(max_concurrency or DEFAULT_BATCH_CONCURRENCY))}
+
+    def _prepare_batch(
+        self,
+        inputs: Sequence[Any],
+        task_prompt: Optional[str],
+        validate_input: Optional[Callable[[Any], dict]],
+    ) -> Tuple[List[Any], List[Tuple[int, _InputAgentState, Optional[str]]]]:
+        """Resolve cache hits and input errors; return the items that still need a model call."""
+        results: List[Any] = [None] * len(inputs)
+        pending = []
+        for index, item in enumerate(inputs):
+            try:
+                variables = validate_input(item) if validate_input is not None else item
+                input_prompt = self._build_prompt(variables, task_prompt=task_prompt)
+            except Exception as e:
+                results[index] = e
+                continue
+            cache, cache_key = self._response_cache_key(input_prompt)
+            found, cached_output = cache.lookup(cache_key, self._agent_name)
+            if found:
+                results[index] = cached_output
+            else:
+                pending.append((index, input_prompt, cache_key))
+        return results, pending
+
+    def _finish_batch(self, results: List[Any], pending: list, raw_outputs: Sequence[Any]) -> None:
+        cache = get_response_cache()
+        for (index, _, cache_key), raw_output in zip(pending, raw_outputs):
+            if isinstance(raw_output, Exception):
+                results[index] = raw_output
+                continue
+            try:
+                output = self._postprocess(raw_output)
+            except Exception as e:
+                results[index] = e
+                continue
+            cache.store(cache_key, self._agent_name, output)
+            results[index] = output
+
+    @staticmethod
+    def _collect_batch(
+        results: List[Any],
+        validate_output: Optional[Callable[[Any], Any]],
+        return_exceptions: bool,
+    ) -> List[Any]:
+        if validate_output is not None:
+            for index, output in enumerate(results):
+                if isinstance(output, Exception):
+                    continue
+                try:
+                    results[index] = validate_output(output)
+                except Exception as e:
+                    results[index] = e
+        if not return_exceptions:
+            for output in results:
+                if isinstance(output, Exception):
+                    raise output
+        return results
+
+    def stream(self, input_dict: dict, task_prompt: Optional[str] = None) -> Iterator[str]:
+        """Yield reply text as the chat model produces it.
+
+        Streams straight from the underlying chat model, so it is meant for
+        plain-text agents without tools; responses are neither JSON-parsed nor
+        cached.
+        """
+        think_filter = ThinkTagFilter() if self.exclude_think else None
+        for chunk in self._model.stream(self._build_stream_messages(input_dict, task_prompt)):
+            text = think_filter.feed(chunk.text) if think_filter else chunk.text
+            if text:
+                yield text
+        if think_filter:
+            rest = think_filter.flush()
+            if rest:
+                yield rest
+
+    async def astream(self, input_dict: dict, task_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        """Async counterpart of :meth:`stream`."""
+        think_filter = ThinkTagFilter() if self.exclude_think else None
+        async for chunk in self._model.astream(self._build_stream_messages(input_dict, task_prompt)):
+            text = think_filter.feed(chunk.text) if think_filter else chunk.text
+            if text:
+                yield text
+        if think_filter:
+            rest = think_filter.flush()
+            if rest:
+                yield rest
+
+    def _build_stream_messages(self, input_dict: dict, task_prompt: Optional[str]) -> list[dict]:
+        messages = list(self._build_prompt(input_dict, task_prompt=task_prompt)["messages"])
+        if self._system_prompt:
+            messages.insert(0, {"role": "system", "content": self._system_prompt})
+        return messages
+
+    @property
+    def _agent_name(self) -> str:
+        return getattr(self, "name", None) or type(self).__name__
+
+    def _response_cache_key(self, input_prompt: _InputAgentState):
+        cache = get_response_cache()
+        if self._tools:
+            # Tool calls may have side effects; never serve them from cache.
+            return cache, None
+        key = cache.make_key(
+            self._model,
+            self._system_prompt,
+            input_prompt["messages"],
+            exclude_think=self.exclude_think,
+            jsonalize_output=self.jsonalize_output,
+        )
+        return cache, key
+
+    def _postprocess(self, raw_output: Any) -> Any:
+        return preprocess_response(
             raw_output, only_text=True, exclude_think=self.exclude_think, json_output=self.jsonalize_output
         )
-        return output
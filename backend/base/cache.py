@@ -0,0 +1,263 @@
+"""Small key/value caches shared by the LLM response and search result caches.
+
+``LRUCache`` is a bounded in-memory tier with per-entry TTLs, ``SQLiteCache``
+a persistent tier that survives restarts and can be shared by several worker
+processes on one host, and ``TieredCache`` combines the two and keeps hit/miss
+statistics. Values stored on disk must be JSON-serializable.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU cache with optional per-entry expiry."""
+
+    def __init__(self, max_size: int = 1024, default_ttl: Optional[float] = None) -> None:
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, expires_at: Optional[float] = None) -> None:
+        if expires_at is None:
+            ttl = self.default_ttl if ttl is None else ttl
+            expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max(self.max_size, 0):
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """Persistent JSON key/value store with expiry and least-recently-used eviction.
+
+    Several namespaces can share one database file. WAL mode lets multiple
+    worker processes read while one writes.
+    """
+
+    def __init__(self, path: str, namespace: str = "default", max_entries: int = 100_000) -> None:
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        # Read timestamps are buffered and written in batches so hits stay read-only.
+        self._touched: Dict[str, float] = {}
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL,"
+                " accessed_at REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed ON cache_entries (namespace, accessed_at)"
+            )
+            self._conn.commit()
+
+    def get_with_expiry(self, key: str) -> Tuple[Any, Optional[float]]:
+        """Return ``(value, expires_at)``; value is the module sentinel when absent."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None:
+                return _MISSING, None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key)
+                )
+                self._conn.commit()
+                return _MISSING, None
+            self._touched[key] = now
+            if len(self._touched) >= 64:
+                self._flush_touched()
+                self._conn.commit()
+        return json.loads(value), expires_at
+
+    def _flush_touched(self) -> None:
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                [(accessed_at, self.namespace, key) for key, accessed_at in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value, _ = self.get_with_expiry(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, expires_at: Optional[float] = None) -> None:
+        now = time.time()
+        if expires_at is None and ttl:
+            expires_at = now + ttl
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, payload, expires_at, now),
+            )
+            self._touched.pop(key, None)
+            self._flush_touched()
+            self._conn.commit()
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= 100:
+                self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        self._writes_since_prune = 0
+        self._flush_touched()
+        self._conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+            (self.namespace, now),
+        )
+        (count,) = self._conn.execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE rowid IN ("
+                " SELECT rowid FROM cache_entries WHERE namespace = ? ORDER BY accessed_at ASC LIMIT ?)",
+                (self.namespace, overflow),
+            )
+        self._conn.commit()
+
+    def prune(self) -> None:
+        with self._lock:
+            self._prune(time.time())
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            ).fetchone()
+        return count
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
+
+
+class TieredCache:
+    """In-memory LRU in front of an optional SQLite tier, with hit/miss statistics."""
+
+    def __init__(self, memory: LRUCache, disk: Optional[SQLiteCache] = None) -> None:
+        self.memory = memory
+        self.disk = disk
+        self._stats_lock = threading.Lock()
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return ``(found, value)``. Disk hits are promoted to the memory tier."""
+        value = self.memory.get(key, _MISSING)
+        if value is not _MISSING:
+            self._count("memory")
+            return True, value
+        if self.disk is not None:
+            try:
+                value, expires_at = self.disk.get_with_expiry(key)
+            except sqlite3.Error as e:
+                logger.warning(f"Disk cache lookup failed: {e}")
+                value, expires_at = _MISSING, None
+            if value is not _MISSING:
+                self.memory.set(key, value, expires_at=expires_at)
+                self._count("disk")
+                return True, value
+        self._count("miss")
+        return False, None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.memory.set(key, value, ttl=ttl)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value, ttl=ttl)
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                logger.warning(f"Disk cache write failed: {e}")
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def _count(self, outcome: str) -> None:
+        with self._stats_lock:
+            if outcome == "memory":
+                self._memory_hits += 1
+            elif outcome == "disk":
+                self._disk_hits += 1
+            else:
+                self._misses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            hits = self._memory_hits + self._disk_hits
+            lookups = hits + self._misses
+            return {
+                "memory_entries": len(self.memory),
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,243 @@
+"""Token-budgeted packing of retrieved chunks into prompt context.
+
+Retrieval returns the top chunks verbatim. Several of them are often
+near-copies of one another (syndicated articles, mirrored docs), and together
+they can take up most of a prompt. ``ContextPacker`` chooses which chunks to
+keep for an agent's token budget:
+
+* chunks mostly contained in one already chosen are dropped as duplicates;
+* the rest are ordered by maximal marginal relevance, which trades retrieval
+  rank and query-term overlap against similarity to the chunks already
+  chosen, so coverage is kept while repetition is not;
+* chunks are added until the budget, minus the context already in the
+  prompt, is used up.
+
+Tokens are counted with tiktoken when it is installed (otherwise roughly four
+characters per token), and counts are cached by content hash because the same
+chunks come back across requests.
+"""
+
+import hashlib
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
+
+from langchain_core.documents import Document
+from omegaconf import DictConfig
+
+from base.cache import LRUCache
+from base.lexical_index import tokenize
+from utils.config import ensure_config_dict
+
+logger = logging.getLogger(__name__)
+
+_SHINGLE_SIZE = 5
+_WORD = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=8)
+def _encoding(name: str):
+    try:
+        import tiktoken
+    except ImportError:
+        logger.info("tiktoken is not installed; estimating context tokens from character counts.")
+        return None
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.warning(f"Failed to load tokenizer '{name}' ({e}); estimating context tokens from character counts.")
+        return None
+
+
+def _shingles(text: str) -> set:
+    words = _WORD.findall(text.lower())
+    if len(words) < _SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {hash(" ".join(words[i: i + _SHINGLE_SIZE])) for i in range(len(words) - _SHINGLE_SIZE + 1)}
+
+
+def _cosine(a: Counter, b: Counter) -> float:
+    if not a or not b:
+        return 0.0
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(count * b.get(term, 0) for term, count in a.items())
+    if not dot:
+        return 0.0
+    return dot / (math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values())))
+
+
+def format_chunk(idx: int, doc: Document, body: Optional[str] = None) -> str:
+    title = doc.metadata.get("title") if doc.metadata else None
+    source = doc.metadata.get("source") if doc.metadata else None
+    header_parts = [f"[{idx}]"]
+    if title:
+        header_parts.append(title)
+    if source:
+        header_parts.append(f"Source: {source}")
+    header = " | ".join(header_parts)
+    return f"{header}\n{doc.page_content.strip() if body is None else body}"
+
+
+class ContextPacker:
+    """Selects and formats retrieved chunks to fit per-agent token budgets."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        default_budget: int = 1500,
+        budget_per_agent: Optional[Mapping[str, int]] = None,
+        encoding: str = "cl100k_base",
+        lambda_mult: float = 0.7,
+        duplicate_threshold: float = 0.8,
+        min_chunk_tokens: int = 64,
+        max_cached_counts: int = 20_000,
+    ) -> None:
+        self.enabled = enabled
+        self.default_budget = default_budget
+        self.budget_per_agent = dict(budget_per_agent or {})
+        self.encoding = encoding
+        self.lambda_mult = lambda_mult
+        self.duplicate_threshold = duplicate_threshold
+        self.min_chunk_tokens = min_chunk_tokens
+        self._counts = LRUCache(max_size=max_cached_counts)
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "chunks_in": 0, "chunks_packed": 0, "duplicates_dropped": 0, "truncated": 0,
+                       "tokens_in": 0, "tokens_packed": 0}
+
+    @classmethod
+    def from_config(cls, config: Union[DictConfig, Dict[str, Any]]) -> "ContextPacker":
+        config = ensure_config_dict(config).get("context_packing", {}) or {}
+        return cls(
+            enabled=config.get("enabled", True),
+            default_budget=config.get("default_budget", 1500),
+            budget_per_agent=config.get("budget_per_agent", {}),
+            encoding=config.get("encoding", "cl100k_base"),
+            lambda_mult=config.get("lambda_mult", 0.7),
+            duplicate_threshold=config.get("duplicate_threshold", 0.8),
+            min_chunk_tokens=config.get("min_chunk_tokens", 64),
+        )
+
+    def budget_for(self, agent_name: Optional[str]) -> int:
+        return int(self.budget_per_agent.get(agent_name, self.default_budget))
+
+    # Tokens
+
+    def count_tokens(self, text: str) -> int:
+        if not text:
+            return 0
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        count = self._counts.get(key)
+        if count is None:
+            encoding = _encoding(self.encoding)
+            count = len(encoding.encode(text, disallowed_special=())) if encoding is not None else len(text) // 4 + 1
+            self._counts.set(key, count)
+        return count
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        encoding = _encoding(self.encoding)
+        if encoding is None:
+            return text[: max_tokens * 4]
+        tokens = encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+    # Selection
+
+    def _is_duplicate(self, shingles: set, chosen: List[set]) -> bool:
+        for other in chosen:
+            smaller = min(len(shingles), len(other))
+            if smaller and len(shingles & other) / smaller >= self.duplicate_threshold:
+                return True
+        return False
+
+    def pack(
+        self,
+        docs: Sequence[Document],
+        query: Optional[str] = None,
+        agent_name: Optional[str] = None,
+        existing_context: str = "",
+        budget: Optional[int] = None,
+    ) -> str:
+        """Format the chunks of ``docs`` that best fit the budget, most relevant first.
+
+        ``docs`` are expected in retrieval order. ``budget`` defaults to the
+        budget of ``agent_name``; ``existing_context`` (already in the prompt)
+        counts against it.
+        """
+        docs = [doc for doc in docs if doc.page_content.strip()]
+        if not docs:
+            return ""
+        remaining = (self.budget_for(agent_name) if budget is None else budget) - self.count_tokens(existing_context)
+        query_terms = Counter(tokenize(query or ""))
+        terms = [Counter(tokenize(doc.page_content)) for doc in docs]
+        # Retrieval rank is the main relevance signal; query-term overlap refines it.
+        relevance = [
+            (1.0 - rank / len(docs) + _cosine(query_terms, doc_terms)) / (2.0 if query_terms else 1.0)
+            for rank, doc_terms in enumerate(terms)
+        ]
+        candidates = list(range(len(docs)))
+        redundancy = [0.0] * len(docs)
+        chosen: List[int] = []
+        chosen_shingles: List[set] = []
+        pieces: List[str] = []
+        duplicates = truncated = packed_tokens = 0
+        while candidates and remaining > 0:
+            best = max(candidates, key=lambda i: self.lambda_mult * relevance[i] - (1 - self.lambda_mult) * redundancy[i])
+            candidates.remove(best)
+            shingles = _shingles(docs[best].page_content)
+            if self._is_duplicate(shingles, chosen_shingles):
+                duplicates += 1
+                continue
+            piece = format_chunk(len(pieces), docs[best])
+            cost = self.count_tokens(piece)
+            if cost > remaining:
+                if pieces or remaining < self.min_chunk_tokens:
+                    continue  # a later, shorter chunk may still fit
+                # Nothing fits whole; a cut chunk is better than no context.
+                body_budget = remaining - self.count_tokens(format_chunk(0, docs[best], body=""))
+                piece = format_chunk(0, docs[best], body=self.truncate(docs[best].page_content.strip(), body_budget))
+                cost = self.count_tokens(piece)
+                truncated += 1
+            chosen.append(best)
+            chosen_shingles.append(shingles)
+            pieces.append(piece)
+            remaining -= cost
+            packed_tokens += cost
+            for i in candidates:
+                redundancy[i] = max(redundancy[i], _cosine(terms[i], terms[best]))
+        with self._stats_lock:
+            self._stats["calls"] += 1
+            self._stats["chunks_in"] += len(docs)
+            self._stats["chunks_packed"] += len(pieces)
+            self._stats["duplicates_dropped"] += duplicates
+            self._stats["truncated"] += truncated
+            self._stats["tokens_in"] += sum(self.count_tokens(format_chunk(i, doc)) for i, doc in enumerate(docs))
+            self._stats["tokens_packed"] += packed_tokens
+        return "\n\n".join(pieces)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["enabled"] = self.enabled
+        stats["token_savings"] = 1.0 - stats["tokens_packed"] / stats["tokens_in"] if stats["tokens_in"] else 0.0
+        return stats
+
+
+context_packer = ContextPacker(enabled=False)
+
+
+def configure_context_packer(config: Union[DictConfig, Dict[str, Any]]) -> ContextPacker:
+    """Replace the process-wide context packer with one built from ``config``."""
+    global context_packer
+    context_packer = ContextPacker.from_config(config)
+    return context_packer
+
+
+def get_context_packer() -> ContextPacker:
+    return context_packer
@@ -1,5 +1,11 @@
+import threading
 from langchain_core.embeddings import Embeddings
-from typing import Optional
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional
+
+# Embedding models are expensive to load (local models pull weights into
+# memory), so shared instances are kept per (provider, model) for the process.
+_shared_embedders: Dict[Hashable, Embeddings] = {}
+_shared_lock = threading.RLock()
 
 
 class EmbedderFactory:
@@ -7,8 +13,20 @@ class EmbedderFactory:
     def create(
         model: str = "sentence-transformers/all-MiniLM-L6-v2", 
         model_provider: Optional[str] = "huggingface",
+        shared: bool = False,
+        **kwargs,
         ) -> Embeddings:
-        """Create an embedding model instance based on the specified model name."""
+        """Create an embedding model instance based on the specified model name.
+
+        With ``shared=True`` the process-wide instance for this provider/model is
+        returned, loading it on first use. ``kwargs`` are passed to the client
+        (e.g. ``url``/``timeout`` for the ``remote`` embedding server).
+        """
+        if shared:
+            key = ((model_provider or "huggingface").lower(), model, tuple(sorted(kwargs.items())))
+            return EmbedderFactory._get_shared(
+                key, lambda: EmbedderFactory.create(model=model, model_provider=model_provider, **kwargs)
+            )
         if ':' in model:
             model_provider, model = model.split(':', 1)
         else:
@@ -17,6 +35,10 @@ class EmbedderFactory:
             case "huggingface":
                 from langchain_huggingface import HuggingFaceEmbeddings
                 return HuggingFaceEmbeddings(model_name=model)
+            case "remote":
+                # Model hosted once per machine by `python -m base.embedding_server`.
+                from base.embedding_server import RemoteEmbeddings
+                return RemoteEmbeddings(model=model, **kwargs)
             case "openai":
                 from langchain_openai import OpenAIEmbeddings
                 return OpenAIEmbeddings(model=model)
@@ -30,6 +52,81 @@ class EmbedderFactory:
             case _:
                 raise ValueError(f"Unsupported model provider: {model_provider}")
 
+    @staticmethod
+    def from_config(config: Mapping[str, Any], shared: bool = False) -> Embeddings:
+        """Create the embedder described by an ``embedding`` config section.
+
+        ``batching.enabled`` wraps the model in a
+        :class:`base.embedding_batcher.BatchingEmbeddings` so concurrent calls
+        are coalesced into batches; ``cache.enabled`` puts a
+        :class:`base.embedding_cache.CachedEmbeddings` in front so previously
+        seen texts never reach the model.
+
+        With ``provider: remote`` the model is served by the embedding server at
+        ``server.url``; the cache is then keyed by ``server.provider`` so this
+        process and the server share cached vectors.
+        """
+        model = config.get("model_name", "sentence-transformers/all-mpnet-base-v2")
+        model_provider = config.get("provider", "huggingface")
+        client_kwargs: Dict[str, Any] = {}
+        cache_provider = model_provider
+        if (model_provider or "").lower() == "remote":
+            server_config = config.get("server") or {}
+            client_kwargs = {key: server_config[key] for key in ("url", "timeout") if server_config.get(key) is not None}
+            cache_provider = server_config.get("provider", "huggingface")
+        batching_config = config.get("batching") or {}
+        cache_config = config.get("cache") or {}
+        if not (batching_config.get("enabled", False) or cache_config.get("enabled", False)):
+            return EmbedderFactory.create(model=model, model_provider=model_provider, shared=shared, **client_kwargs)
+
+        def build() -> Embeddings:
+            embedder = EmbedderFactory.create(model=model, model_provider=model_provider, shared=shared, **client_kwargs)
+            if batching_config.get("enabled", False):
+                from base.embedding_batcher import BatchingEmbeddings, register_embedding_batcher
+                embedder = BatchingEmbeddings(
+                    embedder,
+                    max_batch_size=batching_config.get("max_batch_size", 64),
+                    max_wait_ms=batching_config.get("max_wait_ms", 5.0),
+                    queries_as_documents=batching_config.get("queries_as_documents", True),
+                    timeout=batching_config.get("timeout", 120.0),
+                )
+                register_embedding_batcher(embedder)
+            if cache_config.get("enabled", False):
+                from base.embedding_cache import CachedEmbeddings, register_embedding_cache
+                embedder = CachedEmbeddings(
+                    embedder,
+                    model_name=f"{cache_provider}:{model}",
+                    directory=cache_config.get("directory", None),
+                    max_memory_entries=cache_config.get("max_memory_entries", 10_000),
+                    max_disk_entries=cache_config.get("max_disk_entries", 1_000_000),
+                )
+                register_embedding_cache(embedder)
+            return embedder
+
+        if not shared:
+            return build()
+        key = (
+            "wrapped",
+            (model_provider or "huggingface").lower(),
+            model,
+            tuple(sorted(client_kwargs.items())),
+            tuple(sorted(batching_config.items())),
+            tuple(sorted(cache_config.items())),
+        )
+        return EmbedderFactory._get_shared(key, build)
+
+    @staticmethod
+    def _get_shared(key: Hashable, builder: Callable[[], Embeddings]) -> Embeddings:
+        embedder = _shared_embedders.get(key)
+        if embedder is not None:
+            return embedder
+        with _shared_lock:
+            embedder = _shared_embedders.get(key)
+            if embedder is None:
+                embedder = builder()
+                _shared_embedders[key] = embedder
+            return embedder
+
 
 if __name__ == "__main__":
     # Example usage
@@ -0,0 +1,254 @@
+"""Cross-request micro-batching for embedding models.
+
+On CPU, a sentence-transformers model embeds one batch of 32 short texts in
+little more time than a single text, yet concurrent requests each call it with
+one query or a handful of chunks. ``BatchingEmbeddings`` puts every
+``embed_query``/``embed_documents`` call on a queue. A single scheduler thread
+collects calls for up to ``max_wait_ms`` (or until ``max_batch_size`` texts
+are waiting), runs them through the model as one batch, and hands each caller
+its slice of the result.
+"""
+
+import asyncio
+import itertools
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+def embed_queries(embedder: Embeddings, texts: List[str]) -> List[List[float]]:
+    """Embed several queries, as one model batch when ``embedder`` supports it (``embed_queries``)."""
+    batched = getattr(embedder, "embed_queries", None)
+    if batched is not None:
+        return batched(list(texts))
+    return [embedder.embed_query(text) for text in texts]
+
+
+# Scheduler priorities: query lookups sit on request paths and jump ahead of
+# bulk document chunks; the stop sentinel runs after all queued work.
+_PRIORITY = {"query": 0, "document": 1}
+_STOP = 2
+
+
+@dataclass
+class _EmbeddingRequest:
+    kind: str  # "query" or "document"
+    texts: List[str]
+    future: Future = field(default_factory=Future)
+
+
+class BatchingEmbeddings(Embeddings):
+    """``Embeddings`` wrapper that coalesces concurrent calls into batched model calls.
+
+    Calls larger than ``max_batch_size`` are split into chunks, and queued
+    queries are taken before queued document chunks, so a bulk ingest never
+    holds a query lookup for more than one model call.
+
+    ``queries_as_documents`` lets queries join document batches. That is
+    correct for symmetric models such as sentence-transformers, which embed
+    queries and documents the same way. Disable it for models with a
+    separate query encoding. ``timeout`` bounds how long the synchronous
+    methods wait for their batch.
+    """
+
+    def __init__(
+        self,
+        embedder: Embeddings,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        queries_as_documents: bool = True,
+        timeout: Optional[float] = 120.0,
+    ) -> None:
+        self.embedder = embedder
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.queries_as_documents = queries_as_documents
+        self.timeout = timeout
+        self._queue: "queue.PriorityQueue[Tuple[int, int, Optional[_EmbeddingRequest]]]" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "batches": 0, "texts": 0, "model_texts": 0, "errors": 0}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self._wait(self._submit("document", list(texts)))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._wait(self._submit("query", [text]))[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self._wait(self._submit("query", list(texts)))
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return await self._await(self._submit("document", list(texts)))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self._await(self._submit("query", [text])))[0]
+
+    def _wait(self, futures: List[Future]) -> List[List[float]]:
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        vectors: List[List[float]] = []
+        try:
+            for future in futures:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                vectors.extend(future.result(timeout=timeout))
+        except FutureTimeoutError:
+            for future in futures:
+                future.cancel()
+            raise TimeoutError(f"Embedding batch did not finish within {self.timeout}s.") from None
+        return vectors
+
+    @staticmethod
+    async def _await(futures: List[Future]) -> List[List[float]]:
+        parts = await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
+        return [vector for part in parts for vector in part]
+
+    def _submit(self, kind: str, texts: List[str]) -> List[Future]:
+        """Queue ``texts`` in chunks of at most ``max_batch_size``; returns one future per chunk."""
+        self._ensure_worker()
+        futures = []
+        for start in range(0, len(texts), self.max_batch_size):
+            request = _EmbeddingRequest(kind=kind, texts=texts[start:start + self.max_batch_size])
+            self._queue.put((_PRIORITY[kind], next(self._sequence), request))
+            futures.append(request.future)
+        return futures
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                worker = threading.Thread(target=self._run, name="genmentor-embedding-batcher", daemon=True)
+                worker.start()
+                self._worker = worker
+
+    def _run(self) -> None:
+        while True:
+            _, _, first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            size = len(first.texts)
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while size < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    _, _, request = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                batch.append(request)
+                size += len(request.texts)
+            try:
+                self._process(batch)
+            except Exception as e:
+                # Never let one bad batch take the scheduler down with it.
+                logger.exception("Embedding batch failed")
+                self._count(errors=1)
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+            if stop:
+                return
+
+    def _process(self, batch: List[_EmbeddingRequest]) -> None:
+        # Callers that gave up (cancelled or timed out) are dropped; the rest can no longer be cancelled.
+        batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+        queries = [request for request in batch if request.kind == "query"]
+        documents = [request for request in batch if request.kind == "document"]
+        if self.queries_as_documents:
+            # Queries go first, so they are answered by the first model call.
+            self._embed_together(queries + documents, self.embedder.embed_documents)
+            return
+        if queries:
+            self._embed_together(queries, lambda texts: embed_queries(self.embedder, texts))
+        if documents:
+            self._embed_together(documents, self.embedder.embed_documents)
+
+    def _embed_together(self, requests: List[_EmbeddingRequest], embed: Callable[[List[str]], List[List[float]]]) -> None:
+        """Embed the distinct texts of ``requests`` in model calls of at most ``max_batch_size`` texts.
+
+        Each request is answered as soon as the call holding its last text returns.
+        """
+        unique_texts = list(dict.fromkeys(text for request in requests for text in request.texts))
+        by_text: Dict[str, List[float]] = {}
+        waiting = list(requests)
+        for start in range(0, len(unique_texts), self.max_batch_size):
+            texts = unique_texts[start:start + self.max_batch_size]
+            try:
+                vectors = embed(texts)
+            except Exception:
+                # Retry one by one so a bad input only fails its own caller.
+                for request in waiting:
+                    self._resolve(request, embed)
+                return
+            by_text.update(zip(texts, vectors))
+            ready = [request for request in waiting if all(text in by_text for text in request.texts)]
+            waiting = [request for request in waiting if request not in ready]
+            self._count(
+                calls=len(ready), batches=1, texts=sum(len(request.texts) for request in ready), model_texts=len(texts)
+            )
+            for request in ready:
+                request.future.set_result([by_text[text] for text in request.texts])
+
+    def _resolve(self, request: _EmbeddingRequest, embed) -> None:
+        try:
+            vectors = embed(request.texts)
+        except Exception as e:
+            self._count(errors=1)
+            request.future.set_exception(e)
+            return
+        self._count(calls=1, batches=1, texts=len(request.texts), model_texts=len(request.texts))
+        request.future.set_result(vectors)
+
+    def _count(self, **increments: int) -> None:
+        with self._stats_lock:
+            for name, value in increments.items():
+                self._stats[name] += value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["mean_batch_texts"] = stats["model_texts"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+
+    def close(self) -> None:
+        if self._worker is not None:
+            self._queue.put((_STOP, next(self._sequence), None))
+            self._worker.join()
+            self._worker = None
+
+
+_batchers: List[BatchingEmbeddings] = []
+_batchers_lock = threading.Lock()
+
+
+def register_embedding_batcher(batcher: BatchingEmbeddings) -> None:
+    with _batchers_lock:
+        _batchers.append(batcher)
+
+
+def embedding_batcher_stats() -> List[Dict[str, Any]]:
+    with _batchers_lock:
+        batchers = list(_batchers)
+    return [batcher.stats() for batcher in batchers]
@@ -0,0 +1,277 @@
+"""Persistent cache of embedding vectors in front of any ``Embeddings`` model.
+
+Search results, learning goals and retrieval queries repeat constantly, and on
+CPU-only hosts embedding them again dominates request time. ``CachedEmbeddings``
+keys vectors by (model name, SHA-256 of the text). Vectors live in a
+memory-mapped float32 matrix on disk with a small SQLite index mapping keys to
+rows. A bounded in-memory LRU sits in front of it, and only cache misses are
+sent to the wrapped model, as a single batch.
+
+Several worker processes on one host can share a cache directory. Rows are
+allocated inside SQLite transactions and only marked ready once their vectors
+are written, so readers never see a reserved but unwritten row. The vector
+file is grown under an exclusive file lock and never shrinks, so a process
+cannot cut off another's mapping.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from base.cache import LRUCache
+from base.embedding_batcher import embed_queries
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, single process only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class MemmapVectorStore:
+    """Append-only float32 vector file plus a key -> row index."""
+
+    def __init__(self, directory: str, dim: Optional[int] = None, max_entries: int = 1_000_000) -> None:
+        self.directory = directory
+        self.max_entries = max_entries
+        self.dim = dim
+        os.makedirs(directory, exist_ok=True)
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._meta_path = os.path.join(directory, "meta.json")
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.memmap] = None
+        self._grow_lock_path = os.path.join(directory, "vectors.lock")
+        self._conn = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, row INTEGER NOT NULL UNIQUE, ready INTEGER NOT NULL DEFAULT 0)"
+            )
+            columns = [column[1] for column in self._conn.execute("PRAGMA table_info(vectors)").fetchall()]
+            if "ready" not in columns:
+                # Indexes from before the ready flag only held fully written rows.
+                self._conn.execute("ALTER TABLE vectors ADD COLUMN ready INTEGER NOT NULL DEFAULT 1")
+            self._conn.commit()
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                stored_dim = json.load(f).get("dim")
+            if self.dim is not None and stored_dim != self.dim:
+                raise ValueError(f"Embedding cache at {directory} holds {stored_dim}-d vectors, expected {self.dim}.")
+            self.dim = stored_dim
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()
+        return count
+
+    def _set_dim(self, dim: int) -> None:
+        self.dim = dim
+        tmp_path = f"{self._meta_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": dim}, f)
+        os.replace(tmp_path, self._meta_path)
+
+    def _rows_mapped(self) -> int:
+        return 0 if self._matrix is None else self._matrix.shape[0]
+
+    @contextmanager
+    def _grow_lock(self) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        with open(self._grow_lock_path, "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _map(self, min_rows: int) -> None:
+        """(Re)map the vector file so it covers at least ``min_rows`` rows, growing it if needed."""
+        row_bytes = self.dim * 4
+        with self._grow_lock():
+            # Size is read under the lock; another process may have grown the file already.
+            file_size = os.path.getsize(self._vectors_path) if os.path.exists(self._vectors_path) else 0
+            file_rows = file_size // row_bytes
+            if file_rows < min_rows:
+                file_rows = max(min_rows, file_rows * 2, 1024)
+                with open(self._vectors_path, "ab") as f:
+                    if file_rows * row_bytes > file_size:
+                        f.truncate(file_rows * row_bytes)
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(file_rows, self.dim))
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        if not keys or self.dim is None:
+            return {}
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = list(keys[start:start + 500])
+                placeholders = ",".join("?" for _ in batch)
+                rows = self._conn.execute(
+                    f"SELECT key, row FROM vectors WHERE ready = 1 AND key IN ({placeholders})", batch
+                ).fetchall()
+                if not rows:
+                    continue
+                highest = max(row for _, row in rows)
+                if highest >= self._rows_mapped():
+                    # Another process may have grown the file since we mapped it.
+                    self._map(highest + 1)
+                for key, row in rows:
+                    found[key] = np.array(self._matrix[row])
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> int:
+        """Persist vectors for keys not stored yet; returns how many were written."""
+        if not items:
+            return 0
+        with self._lock:
+            if self.dim is None:
+                self._set_dim(int(next(iter(items.values())).shape[0]))
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()
+            room = max(self.max_entries - count, 0)
+            if room == 0:
+                return 0
+            assigned = []
+            with self._conn:
+                for key, vector in list(items.items())[:room]:
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO vectors (key, row) VALUES (?, (SELECT COALESCE(MAX(row), -1) + 1 FROM vectors))",
+                        (key,),
+                    )
+                    # Rows left unready (by a concurrent writer, or one that died) are written again;
+                    # the same key always maps to the same vector.
+                    (row, ready) = self._conn.execute("SELECT row, ready FROM vectors WHERE key = ?", (key,)).fetchone()
+                    if not ready:
+                        assigned.append((key, row, vector))
+            if not assigned:
+                return 0
+            highest = max(row for _, row, _ in assigned)
+            if highest >= self._rows_mapped():
+                self._map(highest + 1)
+            for _, row, vector in assigned:
+                self._matrix[row] = vector
+            self._matrix.flush()
+            # Publish the rows only once their vectors are on disk.
+            with self._conn:
+                self._conn.executemany("UPDATE vectors SET ready = 1 WHERE key = ?", [(key,) for key, _, _ in assigned])
+        return len(assigned)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+            self._matrix = None
+            self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """``Embeddings`` wrapper that only sends unseen texts to the underlying model."""
+
+    def __init__(
+        self,
+        embedder: Embeddings,
+        model_name: str,
+        directory: Optional[str] = None,
+        max_memory_entries: int = 10_000,
+        max_disk_entries: int = 1_000_000,
+    ) -> None:
+        self.embedder = embedder
+        self.model_name = model_name
+        self._memory = LRUCache(max_size=max_memory_entries)
+        self._disk: Optional[MemmapVectorStore] = None
+        if directory:
+            slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name).strip("_")
+            self._disk = MemmapVectorStore(os.path.join(directory, slug), max_entries=max_disk_entries)
+        self._stats_lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def _key(self, kind: str, text: str) -> str:
+        # Queries and documents are kept apart because some models embed them differently.
+        return hashlib.sha256(f"{self.model_name}\n{kind}\n{text}".encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(list(texts), "document")
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], "query")[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(list(texts), "query")
+
+    def _embed(self, texts: List[str], kind: str) -> List[List[float]]:
+        keys = [self._key(kind, text) for text in texts]
+        vectors: Dict[str, np.ndarray] = {}
+        for key in keys:
+            vector = self._memory.get(key, _MISSING)
+            if vector is not _MISSING:
+                vectors[key] = vector
+        memory_hits = len(vectors)
+
+        missing = [key for key in dict.fromkeys(keys) if key not in vectors]
+        disk_hits = 0
+        if missing and self._disk is not None:
+            for key, vector in self._disk.get_many(missing).items():
+                vectors[key] = vector
+                self._memory.set(key, vector)
+                disk_hits += 1
+
+        to_compute = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if to_compute:
+            computed = self._compute(kind, list(to_compute.values()))
+            fresh = {key: np.asarray(vector, dtype=np.float32) for key, vector in zip(to_compute, computed)}
+            for key, vector in fresh.items():
+                vectors[key] = vector
+                self._memory.set(key, vector)
+            if self._disk is not None:
+                try:
+                    self._disk.put_many(fresh)
+                except (OSError, sqlite3.Error, ValueError) as e:
+                    logger.warning(f"Failed to persist embeddings: {e}")
+
+        with self._stats_lock:
+            self._stats["memory_hits"] += memory_hits
+            self._stats["disk_hits"] += disk_hits
+            self._stats["misses"] += len(to_compute)
+        return [vectors[key].tolist() for key in keys]
+
+    def _compute(self, kind: str, texts: List[str]) -> List[List[float]]:
+        if kind == "query":
+            return embed_queries(self.embedder, texts)
+        return self.embedder.embed_documents(texts)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["memory_entries"] = len(self._memory)
+        stats["disk_entries"] = len(self._disk) if self._disk is not None else 0
+        stats["hit_rate"] = (lookups - stats["misses"]) / lookups if lookups else 0.0
+        return stats
+
+
+_caches: List[CachedEmbeddings] = []
+_caches_lock = threading.Lock()
+
+
+def register_embedding_cache(cache: CachedEmbeddings) -> None:
+    with _caches_lock:
+        _caches.append(cache)
+
+
+def embedding_cache_stats() -> Dict[str, Any]:
+    with _caches_lock:
+        caches = list(_caches)
+    return {cache.model_name: cache.stats() for cache in caches}
@@ -0,0 +1,233 @@
+"""Out-of-process embedding service shared by all API workers on a host.
+
+Each uvicorn worker that loads ``all-mpnet-base-v2`` itself holds its own copy
+of the weights. Instead, run one embedding server per host:
+
+    python -m base.embedding_server                      # http://127.0.0.1:5100
+    python -m base.embedding_server --uds /tmp/genmentor-embeddings.sock
+
+and set ``embedding.provider: remote`` so the API workers use
+:class:`RemoteEmbeddings`. The server loads the model once, wraps it in the
+usual batching and caching layers, and answers ``POST /embed`` with raw
+little-endian float32 rows, so requests from every worker land in the same
+micro-batches.
+"""
+
+import argparse
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Mapping, Optional
+
+import httpx
+import numpy as np
+from fastapi import FastAPI, HTTPException, Response
+from langchain_core.embeddings import Embeddings
+from pydantic import BaseModel
+
+from base.embedder_factory import EmbedderFactory
+from base.embedding_batcher import embed_queries
+from utils.concurrency import configure_executors, run_blocking
+from utils.config import ensure_config_dict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SERVER_URL = "http://127.0.0.1:5100"
+DIM_HEADER = "x-embedding-dim"
+
+
+class EmbedRequest(BaseModel):
+    texts: List[str]
+    kind: str = "document"  # "document" or "query"
+    model: Optional[str] = None
+
+
+def _split_url(url: str) -> tuple[str, Optional[str]]:
+    """Map ``unix:///path/to.sock`` to an HTTP base URL plus socket path."""
+    if url.startswith("unix://"):
+        return "http://embedding-server", url[len("unix://"):]
+    return url.rstrip("/"), None
+
+
+class RemoteEmbeddings(Embeddings):
+    """Client for the embedding server; ``url`` is ``http://host:port`` or ``unix:///path/to.sock``."""
+
+    def __init__(self, model: str, url: str = DEFAULT_SERVER_URL, timeout: float = 30.0) -> None:
+        self.model = model
+        self.url = url
+        self.timeout = timeout
+        self._base_url, self._uds = _split_url(url)
+        self._client: Optional[httpx.Client] = None
+        # One async client on a loop this instance owns, whatever loop the caller is on.
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+
+    def _sync_client(self) -> httpx.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(
+                        base_url=self._base_url,
+                        transport=httpx.HTTPTransport(uds=self._uds) if self._uds else None,
+                        timeout=self.timeout,
+                    )
+        return self._client
+
+    def _client_loop(self) -> asyncio.AbstractEventLoop:
+        # httpx async clients are bound to the loop they were first used on, so
+        # callers on short-lived loops (asyncio.run, per-thread loops) share one
+        # client on a private loop instead of leaking one client per loop.
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    thread = threading.Thread(target=loop.run_forever, name="genmentor-remote-embeddings", daemon=True)
+                    thread.start()
+                    self._loop_thread = thread
+                    self._loop = loop
+        return self._loop
+
+    async def _async_post(self, payload: Dict[str, Any]) -> httpx.Response:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                base_url=self._base_url,
+                transport=httpx.AsyncHTTPTransport(uds=self._uds) if self._uds else None,
+                timeout=self.timeout,
+            )
+        return await self._async_client.post("/embed", json=payload)
+
+    def _payload(self, texts: List[str], kind: str) -> Dict[str, Any]:
+        return {"texts": texts, "kind": kind, "model": self.model}
+
+    def _decode(self, response: httpx.Response, count: int) -> List[List[float]]:
+        if response.status_code >= 400:
+            raise RuntimeError(f"Embedding server at {self.url} returned {response.status_code}: {response.text}")
+        dim = int(response.headers[DIM_HEADER])
+        return np.frombuffer(response.content, dtype="<f4").reshape(count, dim).tolist()
+
+    def _post(self, texts: List[str], kind: str) -> List[List[float]]:
+        try:
+            response = self._sync_client().post("/embed", json=self._payload(texts, kind))
+        except httpx.TransportError as e:
+            raise ConnectionError(f"Embedding server at {self.url} is unreachable: {e}") from e
+        return self._decode(response, len(texts))
+
+    async def _apost(self, texts: List[str], kind: str) -> List[List[float]]:
+        try:
+            future = asyncio.run_coroutine_threadsafe(self._async_post(self._payload(texts, kind)), self._client_loop())
+            response = await asyncio.wrap_future(future)
+        except httpx.TransportError as e:
+            raise ConnectionError(f"Embedding server at {self.url} is unreachable: {e}") from e
+        return self._decode(response, len(texts))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._post(list(texts), "document") if texts else []
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._post([text], "query")[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self._post(list(texts), "query") if texts else []
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self._apost(list(texts), "document") if texts else []
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self._apost([text], "query"))[0]
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        with self._lock:
+            loop, thread, self._loop, self._loop_thread = self._loop, self._loop_thread, None, None
+        if loop is not None:
+            if self._async_client is not None:
+                asyncio.run_coroutine_threadsafe(self._async_client.aclose(), loop).result(timeout=self.timeout)
+                self._async_client = None
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=self.timeout)
+            loop.close()
+
+
+def hosted_embedding_config(config: Mapping[str, Any]) -> Dict[str, Any]:
+    """The ``embedding`` section the server process builds its model from.
+
+    With ``provider: remote`` the API workers name the model in ``model_name``
+    and ``server.provider`` says how the server should load it.
+    """
+    embedding_config = dict(config)
+    if str(embedding_config.get("provider", "")).lower() == "remote":
+        embedding_config["provider"] = (embedding_config.get("server") or {}).get("provider", "huggingface")
+    return embedding_config
+
+
+def create_app(config: Optional[Mapping[str, Any]] = None) -> FastAPI:
+    """Build the embedding server app for the ``embedding`` section of ``config``."""
+    if config is None:
+        from config.loader import default_config
+        config = default_config
+    embedding_config = hosted_embedding_config(ensure_config_dict(config).get("embedding", {}) or {})
+    model_name = embedding_config.get("model_name", "sentence-transformers/all-mpnet-base-v2")
+    embedder = EmbedderFactory.from_config(embedding_config, shared=True)
+    app = FastAPI(title="GenMentor embedding server")
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "model": model_name}
+
+    @app.get("/stats")
+    async def stats():
+        from base.embedding_batcher import embedding_batcher_stats
+        from base.embedding_cache import embedding_cache_stats
+        return {"embedding_batcher": embedding_batcher_stats(), "embedding_cache": embedding_cache_stats()}
+
+    @app.post("/embed")
+    async def embed(request: EmbedRequest):
+        if request.model and request.model != model_name:
+            raise HTTPException(status_code=409, detail=f"This server hosts '{model_name}', not '{request.model}'.")
+        if request.kind not in ("document", "query"):
+            raise HTTPException(status_code=400, detail=f"Unknown embedding kind '{request.kind}'.")
+        if not request.texts:
+            raise HTTPException(status_code=400, detail="No texts to embed.")
+        if request.kind == "query":
+            vectors = await run_blocking("embedding", embed_queries, embedder, request.texts)
+        else:
+            vectors = await run_blocking("embedding", embedder.embed_documents, request.texts)
+        matrix = np.asarray(vectors, dtype="<f4").reshape(len(request.texts), -1)
+        return Response(
+            content=matrix.tobytes(),
+            media_type="application/octet-stream",
+            headers={DIM_HEADER: str(matrix.shape[1])},
+        )
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+    from config.loader import default_config
+
+    server_config = (default_config.get("embedding", {}) or {}).get("server", {}) or {}
+    base_url, uds = _split_url(server_config.get("url", DEFAULT_SERVER_URL))
+    parsed = httpx.URL(base_url)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=parsed.host)
+    parser.add_argument("--port", type=int, default=parsed.port or 80)
+    parser.add_argument("--uds", default=uds, help="serve on this Unix socket instead of host/port")
+    parser.add_argument("--threads", type=int, default=server_config.get("threads", 32),
+                        help="embedding calls in flight; the batcher coalesces them")
+    args = parser.parse_args()
+
+    configure_executors(embedding=args.threads)
+    app = create_app(default_config)
+    if args.uds:
+        uvicorn.run(app, uds=args.uds)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""Approximate nearest-neighbour search for large collections (hnswlib).
+
+Past a few million chunks, the exact scan in ``NumpyVectorStore`` costs tens of
+milliseconds per query. ``HnswVectorStore`` keeps the same append-only
+matrix and records as the source of truth and adds an HNSW graph over it, with
+graph labels equal to row numbers. Recall and speed are tuned with ``M`` and
+``ef_construction`` (graph quality, fixed at build time) and ``ef_search``
+(candidate list per query, adjustable at any time; a query for more than
+``ef_search`` results searches with ``ef = k``).
+
+Queries share the graph under a read lock and run in parallel; inserts,
+deletions, resizes and ``ef`` changes take it exclusively.
+
+The graph is snapshotted to ``hnsw.bin`` every ``snapshot_every`` inserts and
+on :meth:`HnswVectorStore.save_snapshot`. On startup the snapshot is loaded
+and rows appended since it was taken are indexed again, so a lost snapshot
+costs time, never data. Deleted rows are only marked in the graph; run
+
+    python -m base.hnsw_vectorstore --compact
+
+to drop them from storage and rebuild the graph from scratch.
+"""
+
+import argparse
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from base.numpy_vectorstore import NumpyVectorStore
+from utils.concurrency import ReadWriteLock
+
+logger = logging.getLogger(__name__)
+
+
+class HnswVectorStore(NumpyVectorStore):
+    """``NumpyVectorStore`` searched through an HNSW graph instead of a full scan."""
+
+    def __init__(
+        self,
+        embedding_function: Embeddings,
+        collection_name: str = "default",
+        persist_directory: Optional[str] = None,
+        M: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+        snapshot_every: int = 10_000,
+        num_threads: int = -1,
+    ) -> None:
+        try:
+            import hnswlib
+        except ImportError as e:
+            raise ImportError("The 'hnsw' vectorstore requires hnswlib: pip install hnswlib") from e
+        self._hnswlib = hnswlib
+        self.M = M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.snapshot_every = snapshot_every
+        self.num_threads = num_threads
+        self._index = None
+        self._indexed = 0  # rows [0, _indexed) are in the graph
+        self._unsnapshotted = 0
+        self._graph_lock = ReadWriteLock()
+        super().__init__(embedding_function, collection_name=collection_name, persist_directory=persist_directory)
+        self._open_index()
+
+    # Graph maintenance
+
+    def _new_index(self, dim: int, capacity: int):
+        index = self._hnswlib.Index(space="ip", dim=dim)
+        index.init_index(max_elements=max(capacity, 1024), ef_construction=self.ef_construction, M=self.M)
+        index.set_ef(self.ef_search)
+        return index
+
+    def _snapshot_settings(self) -> Dict[str, Any]:
+        return {"dim": int(self._matrix.shape[1]), "M": self.M, "ef_construction": self.ef_construction}
+
+    def _open_index(self) -> None:
+        with self._lock, self._graph_lock.write():
+            self._index = None
+            self._indexed = 0
+            if self._size == 0:
+                return
+            self._load_snapshot()
+            stale = self._size - self._indexed
+            if stale:
+                logger.info(f"Indexing {stale} rows added since the last HNSW snapshot of {self.directory or 'memory'}")
+            self._index_rows(self._indexed, self._size)
+            # Rows deleted after the snapshot was taken are still live in the graph.
+            self._mark_deleted(np.flatnonzero(~self._alive[: self._indexed]))
+            if stale:
+                self.save_snapshot()
+
+    def _load_snapshot(self) -> None:
+        if not self.directory or not os.path.exists(self._path("hnsw.json")):
+            return
+        with open(self._path("hnsw.json"), "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        if {key: snapshot.get(key) for key in self._snapshot_settings()} != self._snapshot_settings():
+            logger.info(f"HNSW settings changed for {self.directory}; rebuilding the graph.")
+            return
+        if snapshot.get("rows", 0) > self._size:
+            logger.warning(f"HNSW snapshot of {self.directory} is ahead of its records; rebuilding the graph.")
+            return
+        index = self._hnswlib.Index(space="ip", dim=snapshot["dim"])
+        try:
+            index.load_index(self._path("hnsw.bin"), max_elements=max(self._matrix.shape[0], snapshot["rows"]))
+        except (RuntimeError, OSError) as e:
+            logger.warning(f"Failed to load HNSW snapshot of {self.directory}: {e}; rebuilding the graph.")
+            return
+        index.set_ef(self.ef_search)
+        self._index = index
+        self._indexed = snapshot["rows"]
+
+    def _index_rows(self, start: int, stop: int) -> None:
+        if stop <= start:
+            return
+        with self._graph_lock.write():
+            if self._index is None:
+                self._index = self._new_index(self._matrix.shape[1], self._matrix.shape[0])
+            capacity = self._index.get_max_elements()
+            if stop > capacity:
+                self._index.resize_index(max(stop, capacity * 2))
+            self._index.add_items(np.asarray(self._matrix[start:stop]), np.arange(start, stop), num_threads=self.num_threads)
+            self._indexed = stop
+            self._mark_deleted(start + np.flatnonzero(~self._alive[start:stop]))
+
+    def _mark_deleted(self, rows: Sequence[int]) -> None:
+        with self._graph_lock.write():
+            for row in rows:
+                try:
+                    self._index.mark_deleted(int(row))
+                except RuntimeError:
+                    pass  # already marked in the snapshot
+
+    def _tombstone(self, rows: Sequence[int]) -> None:
+        super()._tombstone(rows)
+        if self._index is not None:
+            self._mark_deleted([row for row in rows if row < self._indexed])
+
+    def add_embeddings(
+        self,
+        texts: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+        ids: Optional[Sequence[str]] = None,
+    ) -> List[str]:
+        with self._lock:
+            start = self._size
+            ids = super().add_embeddings(texts, embeddings, metadatas, ids)
+            self._index_rows(start, self._size)
+            if self.directory:
+                self._unsnapshotted += self._size - start
+                if self.snapshot_every and self._unsnapshotted >= self.snapshot_every:
+                    self.save_snapshot()
+        return ids
+
+    def save_snapshot(self) -> None:
+        """Write the graph to disk; rows added later are re-indexed on the next load."""
+        with self._lock, self._graph_lock.read():
+            if not self.directory or self._index is None:
+                return
+            tmp_path = self._path("hnsw.bin.tmp")
+            self._index.save_index(tmp_path)
+            os.replace(tmp_path, self._path("hnsw.bin"))
+            tmp_path = self._path("hnsw.json.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"rows": self._indexed, **self._snapshot_settings()}, f)
+            os.replace(tmp_path, self._path("hnsw.json"))
+            self._unsnapshotted = 0
+
+    def rebuild(self) -> None:
+        """Build the graph from scratch over the current rows and snapshot it."""
+        with self._lock, self._graph_lock.write():
+            self._index = None
+            self._indexed = 0
+            if self._size:
+                self._index_rows(0, self._size)
+            self.save_snapshot()
+
+    def _reset(self) -> None:
+        with self._graph_lock.write():
+            super()._reset()
+            self._index = None
+            self._indexed = 0
+
+    def compact(self) -> int:
+        with self._lock:
+            dropped = super().compact()
+            if dropped and self._indexed < self._size:
+                # A persisted store is reloaded without its graph.
+                self.rebuild()
+            elif dropped:
+                self.save_snapshot()
+        return dropped
+
+    def set_ef_search(self, ef_search: int) -> None:
+        with self._lock, self._graph_lock.write():
+            self.ef_search = ef_search
+            if self._index is not None:
+                self._index.set_ef(ef_search)
+
+    # Search
+
+    def _search(
+        self,
+        embedding: Sequence[float],
+        k: int,
+        filter: Optional[Dict[str, Any] | Callable[[Document], bool]] = None,
+    ) -> List[Tuple[Document, float]]:
+        if filter is not None:
+            # Filters usually narrow to a handful of sources; an exact scan is both correct and cheap.
+            return super()._search(embedding, k, filter)
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        # Readers never take the store lock, so queries run in parallel with
+        # each other; hnswlib searches with max(ef, k), so ef is never changed here.
+        with self._graph_lock.read():
+            k = min(k, len(self._row_of))
+            if self._index is None or k <= 0:
+                return []
+            ids, texts, metadatas = self._ids, self._texts, self._metadatas
+            try:
+                labels, distances = self._index.knn_query(query, k=k, num_threads=1)
+            except RuntimeError as e:
+                labels = None
+                # Too many deleted nodes near the query for this ef; fall back to the exact scan.
+                logger.debug(f"HNSW query failed ({e}); using exact search.")
+        if labels is None:
+            # Outside the read lock: the exact scan takes the store lock, which writers hold first.
+            return super()._search(embedding, k)
+        # Inner-product distance is 1 - cosine similarity for normalized rows.
+        return [
+            (Document(id=ids[row], page_content=texts[row], metadata=dict(metadatas[row])), float(1.0 - distance))
+            for row, distance in zip(labels[0].tolist(), distances[0].tolist())
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "rows": self._size,
+                "live": len(self._row_of),
+                "indexed": self._indexed,
+                "unsnapshotted": self._unsnapshotted,
+                "M": self.M,
+                "ef_construction": self.ef_construction,
+                "ef_search": self.ef_search,
+            }
+
+
+def main() -> None:
+    from config.loader import default_config
+    from utils.config import ensure_config_dict
+
+    vectorstore_config = ensure_config_dict(default_config).get("vectorstore", {}) or {}
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--persist-directory", default=vectorstore_config.get("persist_directory", "data/vectorstore"))
+    parser.add_argument("--collection", default=vectorstore_config.get("collection_name", "genmentor"))
+    parser.add_argument("--compact", action="store_true", help="drop deleted rows from storage before rebuilding")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # Only stored vectors are touched, so no embedding model is loaded.
+    store = HnswVectorStore(None, args.collection, args.persist_directory, **(vectorstore_config.get("hnsw") or {}))
+    dropped = store.compact() if args.compact else 0
+    if args.compact:
+        logger.info(f"Dropped {dropped} deleted rows.")
+    if not dropped:
+        store.rebuild()
+    logger.info(f"Rebuilt HNSW graph: {store.stats()}")
+
+
+if __name__ == "__main__":
+    main()
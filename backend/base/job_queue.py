@@ -0,0 +1,491 @@
+"""Persistent background jobs for long-running generation endpoints.
+
+Content generation can take minutes, which is too long to hold an HTTP
+request open. A client instead submits a job, gets its id back at once, and
+polls for progress and the result.
+
+Jobs live in a SQLite table (WAL mode), so they survive restarts and every
+server process on the host can share one queue without an external broker.
+``JobWorker`` runs a bounded number of jobs at a time on each process's event
+loop. Its SQLite calls run in the ``io`` executor, so waiting on a busy
+database never stalls requests.
+
+* a job is claimed inside ``BEGIN IMMEDIATE``, so only one worker process
+  gets it;
+* while a job runs, its worker writes a heartbeat. A running job whose
+  heartbeat goes stale (for example because its process died) is queued
+  again, up to ``max_attempts`` runs in total;
+* stage starts and finishes of any :class:`~utils.stage_graph.StageGraph` run
+  by the job are written to the job's progress;
+* cancellation sets a flag on the row. A queued job is cancelled at once. A
+  running job is stopped by the worker that owns it at its next heartbeat;
+* finished jobs and their results are kept for ``result_ttl`` seconds and
+  then removed.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Union
+
+from omegaconf import DictConfig
+
+from utils.concurrency import get_executor, run_blocking
+from utils.config import ensure_config_dict
+from utils.stage_graph import listen_stages
+
+logger = logging.getLogger(__name__)
+
+JOB_STATES = ("queued", "running", "succeeded", "failed", "cancelled")
+FINISHED_STATES = ("succeeded", "failed", "cancelled")
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class JobStore:
+    """SQLite-backed job table shared by every worker process on the host."""
+
+    def __init__(
+        self,
+        path: str,
+        result_ttl: float = 86400.0,
+        stale_after: float = 120.0,
+        max_attempts: int = 2,
+    ) -> None:
+        self.path = path
+        self.result_ttl = result_ttl
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # Autocommit mode, so claims can use an explicit BEGIN IMMEDIATE.
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " kind TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " progress TEXT,"
+                " result TEXT,"
+                " error TEXT,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " worker TEXT,"
+                " cancel_requested INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL,"
+                " started_at REAL,"
+                " heartbeat_at REAL,"
+                " finished_at REAL,"
+                " expires_at REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_expires ON jobs (expires_at)")
+
+    @classmethod
+    def from_config(cls, config: Union[DictConfig, Dict[str, Any]]) -> "JobStore":
+        config = ensure_config_dict(config).get("jobs", {}) or {}
+        return cls(
+            path=config.get("persist_path", "data/jobs.sqlite"),
+            result_ttl=config.get("result_ttl", 86400.0),
+            stale_after=config.get("stale_after", 120.0),
+            max_attempts=config.get("max_attempts", 2),
+        )
+
+    @staticmethod
+    def _to_dict(row: Optional[sqlite3.Row], include_payload: bool = False) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = {
+            "job_id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "progress": json.loads(row["progress"]) if row["progress"] else {},
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "attempts": row["attempts"],
+            "cancel_requested": bool(row["cancel_requested"]),
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+            "expires_at": row["expires_at"],
+        }
+        if include_payload:
+            job["payload"] = json.loads(row["payload"])
+        return job
+
+    def submit(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, kind, json.dumps(payload, ensure_ascii=False, default=str), time.time()),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row)
+
+    def claim(self, worker: str, kinds: List[str]) -> Optional[Dict[str, Any]]:
+        """Mark the oldest queued job of ``kinds`` as running for ``worker`` and return it with its payload."""
+        if not kinds:
+            return None
+        now = time.time()
+        marks = ", ".join("?" for _ in kinds)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    f"SELECT id FROM jobs WHERE status = 'queued' AND kind IN ({marks}) ORDER BY created_at LIMIT 1",
+                    kinds,
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1,"
+                        " started_at = ?, heartbeat_at = ? WHERE id = ?",
+                        (worker, now, now, row["id"]),
+                    )
+                    row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self._to_dict(row, include_payload=True)
+
+    def heartbeat(self, worker: str, job_ids: List[str]) -> Set[str]:
+        """Refresh the heartbeat of ``worker``'s running jobs; return the ids whose cancellation was requested."""
+        if not job_ids:
+            return set()
+        marks = ", ".join("?" for _ in job_ids)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET heartbeat_at = ? WHERE worker = ? AND status = 'running' AND id IN ({marks})",
+                (time.time(), worker, *job_ids),
+            )
+            rows = self._conn.execute(
+                f"SELECT id FROM jobs WHERE cancel_requested = 1 AND id IN ({marks})", job_ids
+            ).fetchall()
+        return {row["id"] for row in rows}
+
+    def update_progress(self, job_id: str, progress: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET progress = ? WHERE id = ? AND status = 'running'",
+                (json.dumps(progress, ensure_ascii=False, default=str), job_id),
+            )
+
+    def finish(self, job_id: str, worker: str, status: str, result: Any = None, error: Optional[str] = None) -> bool:
+        """Record the outcome of ``worker``'s run; ``False`` when the job is no longer that worker's to finish."""
+        if status not in FINISHED_STATES:
+            raise ValueError(f"'{status}' is not a finished job status.")
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, expires_at = ?, heartbeat_at = NULL"
+                " WHERE id = ? AND worker = ? AND status = 'running'",
+                (
+                    status,
+                    json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+                    error,
+                    now,
+                    now + self.result_ttl,
+                    job_id,
+                    worker,
+                ),
+            )
+        return cursor.rowcount > 0
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued job now, or ask the worker running it to stop; finished jobs are left as they are."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', cancel_requested = 1, finished_at = ?, expires_at = ?"
+                " WHERE id = ? AND status = 'queued'",
+                (now, now + self.result_ttl, job_id),
+            )
+            self._conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+        return self.get(job_id)
+
+    def release(self, worker: str) -> int:
+        """Put ``worker``'s running jobs back in the queue, e.g. on shutdown."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL, attempts = MAX(attempts - 1, 0), heartbeat_at = NULL"
+                " WHERE worker = ? AND status = 'running' AND cancel_requested = 0",
+                (worker,),
+            )
+        return cursor.rowcount
+
+    def recover_stale(self) -> int:
+        """Queue again running jobs whose worker stopped sending heartbeats; fail those out of attempts."""
+        now = time.time()
+        cutoff = now - self.stale_after
+        with self._lock:
+            cancelled = self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', error = 'Cancelled on request.', finished_at = ?, expires_at = ?"
+                " WHERE status = 'running' AND heartbeat_at < ? AND cancel_requested = 1",
+                (now, now + self.result_ttl, cutoff),
+            ).rowcount
+            failed = self._conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Worker stopped responding.', finished_at = ?, expires_at = ?"
+                " WHERE status = 'running' AND heartbeat_at < ? AND attempts >= ?",
+                (now, now + self.result_ttl, cutoff, self.max_attempts),
+            ).rowcount
+            requeued = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL, heartbeat_at = NULL"
+                " WHERE status = 'running' AND heartbeat_at < ?",
+                (cutoff,),
+            ).rowcount
+        if cancelled or failed or requeued:
+            logger.warning(f"Recovered stale jobs: {requeued} queued again, {failed} failed, {cancelled} cancelled.")
+        return requeued + failed + cancelled
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM jobs WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),)
+            ).rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in JOB_STATES}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JobWorker:
+    """Runs queued jobs on the event loop, at most ``concurrency`` at a time."""
+
+    def __init__(
+        self,
+        store: JobStore,
+        handlers: Optional[Dict[str, JobHandler]] = None,
+        concurrency: int = 2,
+        poll_interval: float = 1.0,
+        heartbeat_interval: float = 5.0,
+    ) -> None:
+        self.store = store
+        self.handlers: Dict[str, JobHandler] = dict(handlers or {})
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._cancelled: Set[str] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {"claimed": 0, "succeeded": 0, "failed": 0, "cancelled": 0, "lost": 0, "total_run_seconds": 0.0}
+        self._queue_counts: Dict[str, int] = {}
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self.handlers[kind] = handler
+
+    @property
+    def running(self) -> bool:
+        return self._loop_task is not None and not self._loop_task.done()
+
+    def start(self) -> None:
+        """Start claiming jobs; must be called from the running event loop."""
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._loop_task = asyncio.ensure_future(self._run())
+        logger.info(f"Job worker {self.worker_id} started with {self.concurrency} slots for {', '.join(self.handlers)}.")
+
+    async def stop(self) -> None:
+        """Stop claiming, interrupt running jobs and hand them back to the queue."""
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        released = await run_blocking("io", self.store.release, self.worker_id)
+        if released:
+            logger.info(f"Job worker {self.worker_id} returned {released} unfinished jobs to the queue.")
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a job; one running here is interrupted now, one running elsewhere at its worker's next heartbeat."""
+        job = self.store.cancel(job_id)
+        task = self._tasks.get(job_id)
+        if task is not None and job_id not in self._cancelled:
+            self._cancelled.add(job_id)
+            task.get_loop().call_soon_threadsafe(task.cancel)
+        return job
+
+    def notify(self) -> None:
+        """Wake the worker after a local submit instead of waiting for the next poll."""
+        if self._wakeup is not None and self._loop_task is not None:
+            # Submits may come from executor threads.
+            self._loop_task.get_loop().call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self) -> None:
+        last_maintenance = 0.0
+        while True:
+            try:
+                now = time.monotonic()
+                if now - last_maintenance >= self.heartbeat_interval:
+                    last_maintenance = now
+                    await self._maintain()
+                claimed = False
+                if len(self._tasks) < self.concurrency:
+                    job = await run_blocking("io", self.store.claim, self.worker_id, list(self.handlers))
+                    if job is not None:
+                        claimed = True
+                        self._tasks[job["job_id"]] = asyncio.ensure_future(self._execute(job))
+                if claimed:
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Job worker {self.worker_id} loop error: {e}")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _maintain(self) -> None:
+        for job_id in await run_blocking("io", self.store.heartbeat, self.worker_id, list(self._tasks)):
+            task = self._tasks.get(job_id)
+            if task is not None and job_id not in self._cancelled:
+                self._cancelled.add(job_id)
+                task.cancel()
+        await run_blocking("io", self.store.recover_stale)
+        await run_blocking("io", self.store.purge_expired)
+        # Cached for stats(), which is called on the event loop.
+        self._queue_counts = await run_blocking("io", self.store.counts)
+
+    def _progress_listener(self, job_id: str) -> Callable[[str, str, str, Dict[str, float]], None]:
+        progress: Dict[str, Any] = {"stages": {}, "current": [], "completed": []}
+        lock = threading.Lock()  # sync graphs report from their pool threads
+        write_lock = threading.Lock()  # keeps writes in order, so a stale snapshot never lands last
+        state = {"pending": False}
+
+        def write() -> None:
+            with write_lock:
+                with lock:
+                    snapshot = json.loads(json.dumps(progress, default=str))
+                    state["pending"] = False
+                self.store.update_progress(job_id, snapshot)
+
+        def listener(graph_name: str, stage_name: str, event: str, timing: Dict[str, float]) -> None:
+            with lock:
+                progress["graph"] = graph_name
+                if event == "start":
+                    progress["stages"][stage_name] = "running"
+                    progress["current"].append(stage_name)
+                else:
+                    progress["stages"][stage_name] = "finished"
+                    if stage_name in progress["current"]:
+                        progress["current"].remove(stage_name)
+                    progress["completed"].append(stage_name)
+                progress["updated_at"] = time.time()
+                if state["pending"]:
+                    return  # the queued write will pick this change up
+                state["pending"] = True
+            # Listeners run on the event loop for async graphs; write in the background.
+            get_executor("io").submit(write)
+
+        return listener
+
+    async def _execute(self, job: Dict[str, Any]) -> None:
+        job_id = job["job_id"]
+        started = time.perf_counter()
+        outcome = "failed"
+        try:
+            with listen_stages(self._progress_listener(job_id)):
+                result = await self.handlers[job["kind"]](job["payload"])
+            outcome = await self._finish(job_id, "succeeded", result=result)
+        except asyncio.CancelledError:
+            if job_id not in self._cancelled:
+                outcome = "released"
+                raise  # worker shutdown; stop() hands the job back to the queue
+            outcome = await self._finish(job_id, "cancelled", error="Cancelled on request.")
+        except Exception as e:
+            logger.warning(f"Job {job_id} ({job['kind']}) failed: {e}")
+            outcome = await self._finish(job_id, "failed", error=str(e))
+        finally:
+            self._tasks.pop(job_id, None)
+            self._cancelled.discard(job_id)
+            with self._stats_lock:
+                self._stats["claimed"] += 1
+                if outcome in self._stats:
+                    self._stats[outcome] += 1
+                self._stats["total_run_seconds"] += time.perf_counter() - started
+            self.notify()
+
+    async def _finish(self, job_id: str, status: str, result: Any = None, error: Optional[str] = None) -> str:
+        if await run_blocking("io", self.store.finish, job_id, self.worker_id, status, result, error):
+            return status
+        # Declared stale and claimed by another worker meanwhile; its run owns the result.
+        logger.warning(f"Job {job_id} is no longer owned by worker {self.worker_id}; dropping its {status} result.")
+        return "lost"
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update(
+            worker_id=self.worker_id,
+            running=self.running,
+            concurrency=self.concurrency,
+            active=len(self._tasks),
+            queue=dict(self._queue_counts),
+        )
+        return stats
+
+
+job_store: Optional[JobStore] = None
+job_worker: Optional[JobWorker] = None
+
+
+def configure_job_queue(
+    config: Union[DictConfig, Dict[str, Any]],
+    handlers: Optional[Dict[str, JobHandler]] = None,
+) -> Optional[JobWorker]:
+    """Build the process-wide job store and worker from ``config``; ``None`` when jobs are disabled."""
+    global job_store, job_worker
+    settings = ensure_config_dict(config).get("jobs", {}) or {}
+    if not settings.get("enabled", True):
+        job_store = job_worker = None
+        return None
+    job_store = JobStore.from_config(config)
+    job_worker = JobWorker(
+        job_store,
+        handlers,
+        concurrency=settings.get("workers", 2),
+        poll_interval=settings.get("poll_interval", 1.0),
+        heartbeat_interval=settings.get("heartbeat_interval", 5.0),
+    )
+    return job_worker
+
+
+def get_job_worker() -> Optional[JobWorker]:
+    return job_worker
+
+
+def job_queue_stats() -> Dict[str, Any]:
+    if job_worker is None:
+        return {"enabled": False}
+    return {"enabled": True, **job_worker.stats()}
@@ -0,0 +1,166 @@
+"""BM25 keyword index kept alongside the vectorstore.
+
+Dense retrieval blurs exact technical terms: a learner asking about
+``pandas.read_csv`` or ``useEffect`` gets chunks about reading files or React
+in general. ``LexicalIndex`` is an SQLite FTS5 inverted index, updated
+incrementally as chunks are ingested, that ranks with BM25 and needs no query
+embedding. Identifiers are indexed whole (``pandas_read_csv``) and by part
+(``pandas``, ``read``, ``csv``), with camelCase split, so both the exact API name and
+its words match.
+
+:func:`reciprocal_rank_fusion` merges BM25 and vector rankings without having
+to calibrate their scores against each other.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me of on or should the this to what when "
+    "where which who why will with you your".split()
+)
+_RAW_TOKEN = re.compile(r"[A-Za-z0-9_#+]+(?:(?:\.|::|->|/)[A-Za-z0-9_#+]+)*")
+_CAMEL_PART = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+_CODE_HINT = re.compile(r"[_.:()#+]|[a-z][A-Z]")
+_QUESTION_WORDS = frozenset(
+    "how what why when where which who whom whose is are was were can could do does did should would will explain".split()
+)
+
+
+def _normalize(raw: str) -> str:
+    return raw.replace("++", "pp").replace("#", "sharp").replace("+", "plus")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase index terms: whole identifiers joined by ``_`` plus their parts, minus stopwords."""
+    tokens: List[str] = []
+    for raw in _RAW_TOKEN.findall(text):
+        raw = _normalize(raw)
+        parts = [part.lower() for piece in re.split(r"[^A-Za-z0-9]+", raw) for part in _CAMEL_PART.findall(piece)]
+        compound = "_".join(part for part in re.split(r"[^a-z0-9_]+", raw.lower()) if part)
+        if compound and compound not in _STOPWORDS:
+            tokens.append(compound)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part not in _STOPWORDS and part != compound)
+    return tokens
+
+
+def is_keyword_query(query: str, max_terms: int = 6) -> bool:
+    """Whether ``query`` is a keyword lookup (e.g. an API name) that BM25 alone answers well.
+
+    Questions never are. Otherwise the query must be a single term, or up to
+    ``max_terms`` terms of which one looks like code (``read_csv``,
+    ``os.path``, ``useEffect``).
+    """
+    words = query.split()
+    if not words or query.rstrip().endswith("?") or words[0].lower() in _QUESTION_WORDS:
+        return False
+    terms = [word.strip("?.,!;") for word in words]
+    terms = [term for term in terms if term and term.lower() not in _STOPWORDS]
+    if len(terms) == 1:
+        return True
+    return 1 < len(terms) <= max_terms and any(_CODE_HINT.search(term) for term in terms)
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Tuple[str, Document]]],
+    k: int,
+    rrf_k: int = 60,
+) -> List[Document]:
+    """Fuse ranked ``(key, document)`` lists by summing ``1 / (rrf_k + rank)`` per key."""
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, (key, doc) in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            documents.setdefault(key, doc)
+    best = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [documents[key] for key in best]
+
+
+class LexicalIndex:
+    """Incrementally updated BM25 index over chunks; ``path=":memory:"`` for a request-local index."""
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                " rowid INTEGER PRIMARY KEY,"
+                " doc_id TEXT NOT NULL UNIQUE,"
+                " page_content TEXT NOT NULL,"
+                " metadata TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS chunk_terms USING fts5(terms, tokenize=\"unicode61 tokenchars '_'\")"
+            )
+            self._conn.commit()
+
+    def add(self, documents: Sequence[Document], ids: Sequence[str]) -> int:
+        """Index ``documents`` under ``ids``; ids already present are skipped. Returns how many were added."""
+        added = 0
+        with self._lock, self._conn:
+            for doc_id, doc in zip(ids, documents):
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO chunks (doc_id, page_content, metadata) VALUES (?, ?, ?)",
+                    (doc_id, doc.page_content, json.dumps(doc.metadata or {}, ensure_ascii=False, default=str)),
+                )
+                if cursor.rowcount:
+                    self._conn.execute(
+                        "INSERT INTO chunk_terms (rowid, terms) VALUES (?, ?)",
+                        (cursor.lastrowid, " ".join(tokenize(doc.page_content))),
+                    )
+                    added += 1
+        return added
+
+    def delete(self, ids: Iterable[str]) -> None:
+        with self._lock, self._conn:
+            for doc_id in ids:
+                row = self._conn.execute("SELECT rowid FROM chunks WHERE doc_id = ?", (doc_id,)).fetchone()
+                if row:
+                    self._conn.execute("DELETE FROM chunk_terms WHERE rowid = ?", row)
+                    self._conn.execute("DELETE FROM chunks WHERE rowid = ?", row)
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[Document, float]]:
+        """Top ``k`` chunks by BM25 (higher is better); empty when no query term is indexed."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or k <= 0:
+            return []
+        match = " OR ".join(f'"{term}"' for term in terms)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT c.doc_id, c.page_content, c.metadata, bm25(chunk_terms) AS score"
+                " FROM chunk_terms JOIN chunks c ON c.rowid = chunk_terms.rowid"
+                " WHERE chunk_terms MATCH ? ORDER BY score LIMIT ?",
+                (match, k),
+            ).fetchall()
+        # FTS5 reports BM25 negated so that smaller sorts first.
+        return [
+            (Document(id=doc_id, page_content=content, metadata=json.loads(metadata)), -score)
+            for doc_id, content, metadata, score in rows
+        ]
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()
+        return count
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,5 +1,9 @@
+import hashlib
 import logging
-from typing import Optional, Union, Any, Dict
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Union, Any, Dict, Hashable
 from omegaconf import DictConfig, OmegaConf
 from utils.config import ensure_config_dict
 
@@ -11,6 +15,112 @@ load_dotenv(override=True)
 logger = logging.getLogger(__name__)
 
 
+def _freeze(value: Any) -> Hashable:
+    """Turn (nested) kwargs into a hashable, order-independent key component."""
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+class LLMClientPool:
+    """Thread-safe, bounded registry of chat model instances.
+
+    Chat model clients hold their own HTTP connection pools, so reusing an
+    instance keeps TCP/TLS connections to the provider warm across requests.
+    Entries are evicted least-recently-used once ``max_size`` is exceeded and
+    after ``idle_ttl`` seconds without use.
+    """
+
+    def __init__(self, max_size: int = 32, idle_ttl: float = 900.0) -> None:
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self._entries: "OrderedDict[Hashable, tuple[BaseChatModel, float]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def make_key(
+        model: str,
+        model_provider: Optional[str],
+        temperature: float,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        **kwargs: Any,
+    ) -> Hashable:
+        # Only a digest of the api key is kept so secrets never sit in the key.
+        api_key_digest = hashlib.sha256(api_key.encode("utf-8")).hexdigest() if api_key else None
+        return (model_provider, model, temperature, base_url, api_key_digest, _freeze(kwargs))
+
+    def configure(self, max_size: Optional[int] = None, idle_ttl: Optional[float] = None) -> None:
+        with self._lock:
+            if max_size is not None:
+                self.max_size = int(max_size)
+            if idle_ttl is not None:
+                self.idle_ttl = float(idle_ttl)
+            self._evict(time.monotonic())
+
+    def get_or_create(self, key: Hashable, factory) -> BaseChatModel:
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._hits += 1
+                self._entries[key] = (entry[0], now)
+                self._entries.move_to_end(key)
+                return entry[0]
+            self._misses += 1
+        # Build outside the lock so a slow client construction doesn't block other keys.
+        llm = factory()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                # Another request built this key meanwhile; share its client.
+                llm = entry[0]
+            self._entries[key] = (llm, now)
+            self._entries.move_to_end(key)
+            self._evict(now)
+            return llm
+
+    def _evict(self, now: float) -> None:
+        if self.idle_ttl and self.idle_ttl > 0:
+            expired = [k for k, (_, last_used) in self._entries.items() if now - last_used > self.idle_ttl]
+            for k in expired:
+                del self._entries[k]
+                self._evictions += 1
+        while len(self._entries) > max(self.max_size, 0):
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "idle_ttl": self.idle_ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+
+llm_pool = LLMClientPool()
+
+
 class LLMFactory:
 
     @staticmethod
@@ -20,6 +130,7 @@ class LLMFactory:
         temperature: float = 0,
         base_url: Optional[str] = None,
         api_key: Optional[str] = None,
+        pooled: bool = True,
         **kwargs
     ) -> BaseChatModel:
         """Initialize LLM client with model parameters.
@@ -30,7 +141,7 @@ class LLMFactory:
             temperature: Temperature for model responses (default: 0)
             base_url: Custom base URL for API endpoint
             api_key: Custom API key
-            llm: Pre-configured LLM instance (if provided, other params ignored)
+            pooled: Reuse a cached client from the process-wide pool (default: True)
             **kwargs: Additional parameters passed to init_chat_model
 
         Raises:
@@ -55,8 +166,15 @@ class LLMFactory:
         elif base_url is not None and model_provider == "openai":
             config_kwargs["api_key"] = "dummy-key-for-vllm"
 
-        llm = init_chat_model(**config_kwargs)
-        return llm
+        if not pooled:
+            return init_chat_model(**config_kwargs)
+        key = llm_pool.make_key(model, model_provider, temperature, base_url, api_key, **kwargs)
+        return llm_pool.get_or_create(key, lambda: init_chat_model(**config_kwargs))
+
+    @staticmethod
+    def pool_stats() -> Dict[str, Any]:
+        """Return hit/miss statistics of the shared LLM client pool."""
+        return llm_pool.stats()
 
     @classmethod
     def from_config(cls, config: Union[DictConfig, OmegaConf, Dict[str, Any]]) -> "LLMFactory":
@@ -72,9 +190,9 @@ class LLMFactory:
             LLMFactory instance initialized from config
         """
         config = ensure_config_dict(config)
-        return init_chat_model(
+        return cls.create(
             model=config.get("model_name", "deepseek-chat"),
-            model_provider=config.get("model_provider", "deepseek"),
+            model_provider=config.get("model_provider", config.get("provider", "deepseek")),
             base_url=config.get("base_url", None),
             # api_key=config.api_key,
             temperature=0,  # Always 0 for deterministic results
@@ -0,0 +1,346 @@
+"""Flat in-process vector store on a contiguous float32 matrix.
+
+For search-scoped retrieval (a few hundred fresh web chunks per request) and
+mid-sized collections, a brute-force scan over L2-normalized rows is both
+exact and faster than Chroma. It also avoids Chroma's SQLite writer
+contention. Rows live in one ``(capacity, dim)`` matrix. Ids, texts and
+metadata live in parallel lists. A query is one matrix-vector product plus
+``argpartition`` for the top k.
+
+With a ``persist_directory``, the matrix is a memory-mapped ``vectors.npy``
+and records are appended to ``records.jsonl``. ``meta.json`` holds the
+committed row count, so a crash mid-write never exposes a half-written row.
+Writes are append-only. Re-adding an id or deleting one tombstones the old
+row, and :meth:`NumpyVectorStore.compact` rewrites the files without dead rows.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+logger = logging.getLogger(__name__)
+
+_MIN_CAPACITY = 1024
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` largest scores, best first."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.shape[0]:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class NumpyVectorStore(VectorStore):
+    """Exact cosine-similarity search over an in-memory or memory-mapped matrix."""
+
+    def __init__(
+        self,
+        embedding_function: Embeddings,
+        collection_name: str = "default",
+        persist_directory: Optional[str] = None,
+    ) -> None:
+        self.embedding_function = embedding_function
+        self.collection_name = collection_name
+        self.directory = os.path.join(persist_directory, collection_name) if persist_directory else None
+        self._lock = threading.RLock()
+        self._matrix: Optional[np.ndarray] = None  # (capacity, dim) float32, rows [:_size] valid
+        self._size = 0
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._row_of: Dict[str, int] = {}
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding_function
+
+    # Persistence
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load(self) -> None:
+        meta_path = self._path("meta.json")
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path, "r", encoding="utf-8") as f:
+            size = int(json.load(f).get("size", 0))
+        if size == 0:
+            return
+        self._matrix = np.load(self._path("vectors.npy"), mmap_mode="r+")
+        tombstones = set()
+        if os.path.exists(self._path("tombstones.txt")):
+            with open(self._path("tombstones.txt"), "r", encoding="utf-8") as f:
+                tombstones = {int(line) for line in f if line.strip()}
+        with open(self._path("records.jsonl"), "rb+") as f:
+            while len(self._ids) < size:
+                line = f.readline()
+                if not line:
+                    break
+                record = json.loads(line)
+                self._ids.append(record["id"])
+                self._texts.append(record["text"])
+                self._metadatas.append(record.get("metadata") or {})
+            # Records past the committed size come from an interrupted write.
+            f.truncate(f.tell())
+        if len(self._ids) != size:
+            raise ValueError(f"Vector store at {self.directory} is missing records ({len(self._ids)} of {size}).")
+        self._size = size
+        self._alive = np.ones(self._matrix.shape[0], dtype=bool)
+        self._alive[list(tombstones)] = False
+        self._row_of = {doc_id: row for row, doc_id in enumerate(self._ids) if self._alive[row]}
+        logger.info(f"Loaded {len(self._row_of)} vectors from {self.directory}")
+
+    def _write_meta(self) -> None:
+        tmp_path = self._path("meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"size": self._size, "dim": int(self._matrix.shape[1])}, f)
+        os.replace(tmp_path, self._path("meta.json"))
+
+    def _ensure_capacity(self, rows: int, dim: int) -> None:
+        if self._matrix is not None and self._matrix.shape[1] != dim:
+            raise ValueError(f"Expected {self._matrix.shape[1]}-d embeddings, got {dim}-d.")
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, capacity * 2, _MIN_CAPACITY)
+        if self.directory:
+            tmp_path = self._path("vectors.npy.tmp")
+            matrix = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(new_capacity, dim))
+            if self._size:
+                matrix[: self._size] = self._matrix[: self._size]
+            matrix.flush()
+            del matrix
+            os.replace(tmp_path, self._path("vectors.npy"))
+            self._matrix = np.load(self._path("vectors.npy"), mmap_mode="r+")
+        else:
+            matrix = np.zeros((new_capacity, dim), dtype=np.float32)
+            if self._size:
+                matrix[: self._size] = self._matrix[: self._size]
+            self._matrix = matrix
+        alive = np.zeros(new_capacity, dtype=bool)
+        alive[: self._size] = self._alive[: self._size]
+        self._alive = alive
+
+    def _tombstone(self, rows: Sequence[int]) -> None:
+        self._alive[list(rows)] = False
+        if self.directory and rows:
+            with open(self._path("tombstones.txt"), "a", encoding="utf-8") as f:
+                f.writelines(f"{row}\n" for row in rows)
+
+    # Writes
+
+    def add_embeddings(
+        self,
+        texts: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+        ids: Optional[Sequence[str]] = None,
+    ) -> List[str]:
+        """Append precomputed embeddings; an existing or repeated id is replaced by its last new row."""
+        texts = list(texts)
+        if not texts:
+            return []
+        vectors = _normalize_rows(np.asarray(embeddings, dtype=np.float32).reshape(len(texts), -1))
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in texts]
+        ids = [doc_id or str(uuid.uuid4()) for doc_id in ids] if ids is not None else [str(uuid.uuid4()) for _ in texts]
+        with self._lock:
+            start = self._size
+            self._ensure_capacity(start + len(texts), vectors.shape[1])
+            self._matrix[start: start + len(texts)] = vectors
+            replaced = [self._row_of[doc_id] for doc_id in set(ids) if doc_id in self._row_of]
+            # An id repeated within the batch keeps only its last row, as for existing ids.
+            last_offset = {doc_id: offset for offset, doc_id in enumerate(ids)}
+            replaced.extend(start + offset for offset, doc_id in enumerate(ids) if last_offset[doc_id] != offset)
+            if self.directory:
+                self._matrix.flush()
+                with open(self._path("records.jsonl"), "a", encoding="utf-8") as f:
+                    for doc_id, text, metadata in zip(ids, texts, metadatas):
+                        f.write(json.dumps({"id": doc_id, "text": text, "metadata": metadata}, ensure_ascii=False) + "\n")
+            self._ids.extend(ids)
+            self._texts.extend(texts)
+            self._metadatas.extend(dict(metadata or {}) for metadata in metadatas)
+            self._alive[start: start + len(texts)] = True
+            for offset, doc_id in enumerate(ids):
+                self._row_of[doc_id] = start + offset
+            self._size = start + len(texts)
+            if self.directory:
+                self._write_meta()
+            self._tombstone(replaced)
+        return ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        return self.add_embeddings(texts, self.embedding_function.embed_documents(texts), metadatas, ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        with self._lock:
+            rows = [self._row_of.pop(doc_id) for doc_id in ids if doc_id in self._row_of]
+            self._tombstone(rows)
+        return bool(rows)
+
+    def compact(self) -> int:
+        """Rewrite storage without tombstoned rows; returns how many rows were dropped."""
+        with self._lock:
+            live = np.flatnonzero(self._alive[: self._size])
+            dropped = self._size - len(live)
+            if dropped == 0:
+                return 0
+            vectors = np.array(self._matrix[live])
+            ids = [self._ids[row] for row in live]
+            texts = [self._texts[row] for row in live]
+            metadatas = [self._metadatas[row] for row in live]
+            if not self.directory:
+                self._reset()
+                self.add_embeddings(texts, vectors, metadatas, ids)
+                return dropped
+            # Build the compacted copy next to the live one and swap directories,
+            # so a crash leaves either the old or the new store intact.
+            parent, name = os.path.split(self.directory)
+            shutil.rmtree(os.path.join(parent, f"{name}.compacting"), ignore_errors=True)
+            staging = NumpyVectorStore(self.embedding_function, f"{name}.compacting", parent)
+            if ids:
+                staging.add_embeddings(texts, vectors, metadatas, ids)
+            retired = f"{self.directory}.old"
+            os.rename(self.directory, retired)
+            os.rename(staging.directory, self.directory)
+            shutil.rmtree(retired, ignore_errors=True)
+            self._reset()
+            self._load()
+        return dropped
+
+    def _reset(self) -> None:
+        self._matrix = None
+        self._size = 0
+        self._ids, self._texts, self._metadatas = [], [], []
+        self._alive = np.zeros(0, dtype=bool)
+        self._row_of = {}
+
+    # Reads
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def __bool__(self) -> bool:
+        # Callers test ``if not vectorstore`` for a missing store; an empty one is still usable.
+        return True
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        with self._lock:
+            rows = [self._row_of[doc_id] for doc_id in ids if doc_id in self._row_of]
+            return [self._document(row) for row in rows]
+
+    def _document(self, row: int) -> Document:
+        return Document(id=self._ids[row], page_content=self._texts[row], metadata=dict(self._metadatas[row]))
+
+    def _search(
+        self,
+        embedding: Sequence[float],
+        k: int,
+        filter: Optional[Dict[str, Any] | Callable[[Document], bool]] = None,
+    ) -> List[Tuple[Document, float]]:
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        with self._lock:
+            size = self._size
+            if size == 0 or k <= 0:
+                return []
+            # Writers only append or swap in new arrays and lists, so these
+            # references stay consistent while the scan runs unlocked.
+            matrix = self._matrix[:size]
+            alive = self._alive[:size].copy()
+            ids, texts, metadatas = self._ids, self._texts, self._metadatas
+            if filter is not None:
+                alive &= self._filter_mask(filter, size)
+        scores = np.where(alive, matrix @ query, -np.inf)
+        rows = [row for row in top_k(scores, k) if np.isfinite(scores[row])]
+        return [
+            (Document(id=ids[row], page_content=texts[row], metadata=dict(metadatas[row])), float(scores[row]))
+            for row in rows
+        ]
+
+    def _filter_mask(self, filter: Dict[str, Any] | Callable[[Document], bool], size: int) -> np.ndarray:
+        if callable(filter):
+            return np.fromiter((filter(self._document(row)) for row in range(size)), dtype=bool, count=size)
+        return np.fromiter(
+            (all(self._metadatas[row].get(key) == value for key, value in filter.items()) for row in range(size)),
+            dtype=bool,
+            count=size,
+        )
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self._search(embedding, k, filter)
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self._search(embedding, k, filter)]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self._search(self.embedding_function.embed_query(query), k, filter)
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        # Scores are cosine similarities in [-1, 1].
+        return lambda score: (score + 1.0) / 2.0
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        collection_name: str = "default",
+        persist_directory: Optional[str] = None,
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(embedding, collection_name=collection_name, persist_directory=persist_directory)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
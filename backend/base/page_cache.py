@@ -0,0 +1,238 @@
+"""On-disk cache of fetched web pages and their parsed documents.
+
+Search results keep pointing at the same pages (Wikipedia, documentation
+sites), so ``WebDocumentLoader`` stores every parsed page keyed by URL along
+with its ``ETag``/``Last-Modified`` validators and a SHA-256 of the body.
+Within ``ttl`` a page is served without any request. After that it is
+revalidated with a conditional request: a ``304`` skips the download, and a
+``200`` whose body hashes to the stored value skips HTML-to-text parsing.
+Parsed text is stored once per content hash, so mirrors share an entry.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Union
+
+from langchain_core.documents import Document
+from omegaconf import DictConfig
+
+from utils.config import ensure_config_dict
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+@dataclass
+class CachedPage:
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: str
+    size: int
+    validated_at: float
+    document: Document
+
+    def is_fresh(self, ttl: float, now: Optional[float] = None) -> bool:
+        return (now or time.time()) - self.validated_at < ttl
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+
+    def __init__(self, path: str, ttl: float = 86400.0, max_entries: int = 5000) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self._counters = {"fresh_hits": 0, "revalidated": 0, "unchanged": 0, "stale_served": 0, "misses": 0, "bytes_saved": 0}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " url TEXT PRIMARY KEY,"
+                " etag TEXT,"
+                " last_modified TEXT,"
+                " content_hash TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " metadata TEXT NOT NULL,"
+                " validated_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS page_documents ("
+                " content_hash TEXT PRIMARY KEY,"
+                " page_content TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_accessed ON pages (accessed_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_content_hash ON pages (content_hash)")
+            self._conn.commit()
+
+    @classmethod
+    def from_config(cls, config: Union[DictConfig, Dict[str, Any]]) -> Optional["PageCache"]:
+        """Build the cache described by ``search.page_cache``, or return ``None`` when it is disabled."""
+        cache_config = (ensure_config_dict(config).get("search", {}) or {}).get("page_cache", {}) or {}
+        if not cache_config.get("enabled", False):
+            return None
+        return cls(
+            path=cache_config.get("persist_path", "data/cache/pages.sqlite"),
+            ttl=cache_config.get("ttl", 86400.0),
+            max_entries=cache_config.get("max_entries", 5000),
+        )
+
+    def get_many(self, urls: Iterable[str]) -> Dict[str, CachedPage]:
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return {}
+        placeholders = ",".join("?" for _ in urls)
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT p.url, p.etag, p.last_modified, p.content_hash, p.size, p.metadata, p.validated_at, d.page_content"
+                " FROM pages p JOIN page_documents d ON d.content_hash = p.content_hash"
+                f" WHERE p.url IN ({placeholders})",
+                urls,
+            ).fetchall()
+            self._conn.executemany("UPDATE pages SET accessed_at = ? WHERE url = ?", [(now, row[0]) for row in rows])
+            self._conn.commit()
+        return {
+            url: CachedPage(
+                url=url,
+                etag=etag,
+                last_modified=last_modified,
+                content_hash=digest,
+                size=size,
+                validated_at=validated_at,
+                document=Document(page_content=page_content, metadata=json.loads(metadata)),
+            )
+            for url, etag, last_modified, digest, size, metadata, validated_at, page_content in rows
+        }
+
+    def store(
+        self,
+        url: str,
+        document: Document,
+        digest: str,
+        size: int,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT content_hash FROM pages WHERE url = ?", (url,)).fetchone()
+            self._conn.execute(
+                "INSERT OR IGNORE INTO page_documents (content_hash, page_content) VALUES (?, ?)",
+                (digest, document.page_content),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages"
+                " (url, etag, last_modified, content_hash, size, metadata, validated_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, digest, size, json.dumps(document.metadata, ensure_ascii=False), now, now),
+            )
+            if previous is not None and previous[0] != digest:
+                # The page changed; drop its old text unless a mirror still points at it.
+                self._conn.execute(
+                    "DELETE FROM page_documents WHERE content_hash = ?"
+                    " AND NOT EXISTS (SELECT 1 FROM pages WHERE content_hash = ?)",
+                    (previous[0], previous[0]),
+                )
+            self._conn.commit()
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= 100:
+                self._prune()
+
+    def touch_validated(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Mark a cached page as revalidated now, keeping any validators the server did not resend."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET validated_at = ?, accessed_at = ?,"
+                " etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                (now, now, etag, last_modified, url),
+            )
+            self._conn.commit()
+
+    def _prune(self) -> None:
+        self._writes_since_prune = 0
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM pages WHERE url IN (SELECT url FROM pages ORDER BY accessed_at ASC LIMIT ?)", (overflow,)
+            )
+        # Also catches documents orphaned by other processes sharing the file.
+        self._conn.execute(
+            "DELETE FROM page_documents WHERE content_hash NOT IN (SELECT content_hash FROM pages)"
+        )
+        self._conn.commit()
+
+    def record(self, outcome: str, bytes_saved: int = 0) -> None:
+        with self._lock:
+            self._counters[outcome] += 1
+            self._counters["bytes_saved"] += bytes_saved
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM pages")
+            self._conn.execute("DELETE FROM page_documents")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, total_bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+            (documents,) = self._conn.execute("SELECT COUNT(*) FROM page_documents").fetchone()
+            counters = dict(self._counters)
+        served = counters["fresh_hits"] + counters["revalidated"] + counters["unchanged"] + counters["stale_served"]
+        lookups = served + counters["misses"]
+        return {
+            "entries": entries,
+            "documents": documents,
+            "size_bytes": total_bytes,
+            **counters,
+            "hit_ratio": served / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+page_cache: Optional[PageCache] = None
+
+
+def configure_page_cache(config: Union[DictConfig, Dict[str, Any]]) -> Optional[PageCache]:
+    """Replace the process-wide page cache with one built from ``config``."""
+    global page_cache
+    previous = page_cache
+    page_cache = PageCache.from_config(config)
+    if previous is not None:
+        previous.close()
+    return page_cache
+
+
+def get_page_cache() -> Optional[PageCache]:
+    return page_cache
+
+
+def page_cache_stats() -> Dict[str, Any]:
+    return page_cache.stats() if page_cache is not None else {"enabled": False}
@@ -50,7 +50,9 @@ class VectorStoreFactory:
         collection_name: str = "default",
         persist_directory: str = "./data/vectorstore",
         embedder: Optional[Embeddings] = None,
+        **kwargs,
     ) -> VectorStore:
+        """Create a vectorstore; ``kwargs`` are backend options (e.g. ``M``/``ef_search`` for ``hnsw``)."""
         vectorstore_type = vectorstore_type.lower()
         if vectorstore_type in ["chroma"]:
             from langchain_chroma import Chroma
@@ -60,6 +62,22 @@ class VectorStoreFactory:
                 persist_directory=persist_directory,
             )
             logger.info(f'There are {vectorstore._collection.count()} records in the collection')
+        elif vectorstore_type in ["numpy"]:
+            from base.numpy_vectorstore import NumpyVectorStore
+            vectorstore = NumpyVectorStore(
+                embedding_function=embedder,
+                collection_name=collection_name,
+                persist_directory=persist_directory,
+            )
+        elif vectorstore_type in ["hnsw"]:
+            from base.hnsw_vectorstore import HnswVectorStore
+            vectorstore = HnswVectorStore(
+                embedding_function=embedder,
+                collection_name=collection_name,
+                persist_directory=persist_directory,
+                **kwargs,
+            )
+            logger.info(f'There are {len(vectorstore)} records in the collection')
         else:
             raise ValueError(f"Unsupported vectorstore type: {vectorstore_type}")
         return vectorstore
@@ -0,0 +1,143 @@
+"""Opt-in exact-match cache for agent responses.
+
+Responses are keyed by a SHA-256 digest of the model identity, system prompt,
+fully formatted task prompt, temperature and output post-processing flags, so
+a hit is only possible for a byte-identical request. By default only
+deterministic (temperature 0) calls are cached. Individual requests can skip
+the lookup with :func:`bypass_response_cache`; their fresh response still
+replaces the cached one.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Mapping, Optional, Union
+
+from omegaconf import DictConfig
+
+from base.cache import LRUCache, SQLiteCache, TieredCache
+from utils.config import ensure_config_dict
+
+logger = logging.getLogger(__name__)
+
+_bypass: ContextVar[bool] = ContextVar("response_cache_bypass", default=False)
+
+
+@contextmanager
+def bypass_response_cache(enabled: bool = True) -> Iterator[None]:
+    """Skip cache lookups for agent calls made inside this context."""
+    token = _bypass.set(enabled)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def describe_model(model: Any) -> str:
+    """Stable identity of a chat model: class plus model name and endpoint."""
+    model_name = getattr(model, "model_name", None) or getattr(model, "model", None)
+    base_url = getattr(model, "openai_api_base", None) or getattr(model, "base_url", None)
+    return f"{type(model).__name__}:{model_name}:{base_url or ''}"
+
+
+class ResponseCache:
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        max_memory_entries: int = 1024,
+        default_ttl: float = 86400.0,
+        ttl_per_agent: Optional[Mapping[str, float]] = None,
+        persist_path: Optional[str] = None,
+        max_disk_entries: int = 100_000,
+        only_deterministic: bool = True,
+    ) -> None:
+        self.enabled = enabled
+        self.default_ttl = default_ttl
+        self.ttl_per_agent = dict(ttl_per_agent or {})
+        self.only_deterministic = only_deterministic
+        disk = SQLiteCache(persist_path, namespace="llm_responses", max_entries=max_disk_entries) if (enabled and persist_path) else None
+        self._cache = TieredCache(LRUCache(max_size=max_memory_entries), disk)
+
+    @classmethod
+    def from_config(cls, config: Union[DictConfig, Dict[str, Any]]) -> "ResponseCache":
+        config = ensure_config_dict(config).get("response_cache", {}) or {}
+        return cls(
+            enabled=config.get("enabled", False),
+            max_memory_entries=config.get("max_memory_entries", 1024),
+            default_ttl=config.get("default_ttl", 86400.0),
+            ttl_per_agent=config.get("ttl_per_agent", {}),
+            persist_path=config.get("persist_path", None),
+            max_disk_entries=config.get("max_disk_entries", 100_000),
+            only_deterministic=config.get("only_deterministic", True),
+        )
+
+    @property
+    def uses_disk(self) -> bool:
+        """Whether lookups and stores touch SQLite (async callers should run them off the event loop)."""
+        return self._cache.disk is not None
+
+    def ttl_for(self, agent_name: str) -> float:
+        return float(self.ttl_per_agent.get(agent_name, self.default_ttl))
+
+    def make_key(
+        self,
+        model: Any,
+        system_prompt: Optional[str],
+        prompt: Any,
+        **output_flags: Any,
+    ) -> Optional[str]:
+        """Return the cache key for a call, or ``None`` when the call must not be cached."""
+        if not self.enabled:
+            return None
+        temperature = getattr(model, "temperature", None)
+        if self.only_deterministic and temperature not in (0, 0.0):
+            return None
+        material = json.dumps(
+            {
+                "model": describe_model(model),
+                "system_prompt": system_prompt,
+                "prompt": prompt,
+                "temperature": temperature,
+                "flags": output_flags,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def lookup(self, key: Optional[str], agent_name: str) -> tuple[bool, Any]:
+        if key is None or _bypass.get() or self.ttl_for(agent_name) <= 0:
+            return False, None
+        found, value = self._cache.get(key)
+        return found, copy.deepcopy(value) if found else None
+
+    def store(self, key: Optional[str], agent_name: str, value: Any) -> None:
+        ttl = self.ttl_for(agent_name)
+        if key is None or ttl <= 0:
+            return
+        self._cache.set(key, copy.deepcopy(value), ttl=ttl)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, **self._cache.stats()}
+
+
+response_cache = ResponseCache()
+
+
+def configure_response_cache(config: Union[DictConfig, Dict[str, Any]]) -> ResponseCache:
+    """Replace the process-wide response cache with one built from ``config``."""
+    global response_cache
+    response_cache = ResponseCache.from_config(config)
+    return response_cache
+
+
+def get_response_cache() -> ResponseCache:
+    return response_cache
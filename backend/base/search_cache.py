@@ -0,0 +1,100 @@
+"""Cache of raw web search results keyed by normalized query.
+
+Drafting the same session for different learners issues the same
+"session title + knowledge point" queries over and over. Caching the raw
+provider results (title, link, snippet) skips the search API round trip and
+keeps us under provider rate limits. Entries are namespaced per provider, so
+switching from DuckDuckGo to Serper never serves stale results from the other.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import unicodedata
+from typing import Any, Dict, List, Optional, Union
+
+from omegaconf import DictConfig
+
+from base.cache import LRUCache, SQLiteCache, TieredCache
+from utils.config import ensure_config_dict
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Unicode-normalize, lowercase, and collapse whitespace and surrounding punctuation."""
+    query = unicodedata.normalize("NFKC", str(query)).lower()
+    query = re.sub(r"\s+", " ", query)
+    return query.strip(" \t\"'.,;:!?")
+
+
+class SearchResultCache:
+
+    def __init__(
+        self,
+        provider: str,
+        ttl: float = 86400.0,
+        max_memory_entries: int = 512,
+        persist_path: Optional[str] = None,
+        max_disk_entries: int = 20_000,
+    ) -> None:
+        self.provider = provider
+        self.namespace = f"search:{provider}"
+        self.ttl = ttl
+        disk = SQLiteCache(persist_path, namespace=self.namespace, max_entries=max_disk_entries) if persist_path else None
+        self._cache = TieredCache(LRUCache(max_size=max_memory_entries), disk)
+
+    @classmethod
+    def from_config(cls, config: Union[DictConfig, Dict[str, Any]], provider: str) -> Optional["SearchResultCache"]:
+        """Build the cache described by ``search.cache``, or return ``None`` when it is disabled."""
+        cache_config = (ensure_config_dict(config).get("search", {}) or {}).get("cache", {}) or {}
+        if not cache_config.get("enabled", False):
+            return None
+        cache = cls(
+            provider=provider,
+            ttl=cache_config.get("ttl", 86400.0),
+            max_memory_entries=cache_config.get("max_memory_entries", 512),
+            persist_path=cache_config.get("persist_path", None),
+            max_disk_entries=cache_config.get("max_disk_entries", 20_000),
+        )
+        _register(cache)
+        return cache
+
+    @staticmethod
+    def make_key(query: str, max_results: int) -> str:
+        material = f"{max_results}\n{normalize_query(query)}"
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, query: str, max_results: int) -> Optional[List[Dict[str, Any]]]:
+        found, results = self._cache.get(self.make_key(query, max_results))
+        if found:
+            logger.debug(f"Search cache hit for '{normalize_query(query)}' ({self.provider}).")
+            return [dict(item) for item in results]
+        return None
+
+    def set(self, query: str, max_results: int, results: List[Dict[str, Any]]) -> None:
+        if not results:
+            # An empty result list is more often a transient provider failure than a real answer.
+            return
+        self._cache.set(self.make_key(query, max_results), [dict(item) for item in results], ttl=self.ttl)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+
+_caches: Dict[str, SearchResultCache] = {}
+_caches_lock = threading.Lock()
+
+
+def _register(cache: SearchResultCache) -> None:
+    with _caches_lock:
+        _caches[cache.namespace] = cache
+
+
+def search_cache_stats() -> Dict[str, Any]:
+    with _caches_lock:
+        return {namespace: cache.stats() for namespace, cache in _caches.items()}
@@ -1,6 +1,12 @@
 import os
+import json
+import hashlib
 import logging
-from typing import List, Optional, Dict, Any, Union
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Literal, Optional, Dict, Any, Tuple, Union, get_args
+import numpy as np
 from omegaconf import DictConfig
 
 from langchain_core.documents import Document
@@ -12,10 +18,29 @@ from base.dataclass import SearchResult
 from base.embedder_factory import EmbedderFactory
 from base.searcher_factory import SearcherFactory, SearchRunner
 from base.rag_factory import TextSplitterFactory, VectorStoreFactory
+from base.context_packer import format_chunk, get_context_packer
+from base.embedding_batcher import embed_queries
+from base.numpy_vectorstore import NumpyVectorStore, top_k
+from base.lexical_index import LexicalIndex, is_keyword_query, reciprocal_rank_fusion
 from utils.config import ensure_config_dict
+from utils.concurrency import get_executor, run_blocking
 
 logger = logging.getLogger(__name__)
 
+# global: ingest, then query the whole collection; ephemeral: rank only the
+# chunks fetched for this request; blended: ephemeral plus persistent hits.
+RETRIEVAL_MODES = ("global", "ephemeral", "blended")
+# vector: dense only; lexical: BM25 only; hybrid: both, rank-fused; auto: lexical
+# for keyword lookups, hybrid otherwise.
+RetrievalMethod = Literal["vector", "lexical", "hybrid", "auto"]
+RETRIEVAL_METHODS = get_args(RetrievalMethod)
+
+
+def _unit_rows(vectors: List[List[float]]) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
 
 class SearchRagManager:
 
@@ -26,21 +51,39 @@ class SearchRagManager:
         vectorstore: Optional[VectorStore] = None,
         search_runner: Optional[SearchRunner] = None,
         max_retrieval_results: int = 5,
+        retrieval_mode: str = "global",
+        lexical_index: Optional[LexicalIndex] = None,
+        retrieval_method: str = "vector",
+        rrf_k: int = 60,
+        hybrid_candidates: int = 20,
     ):
         self.embedder = embedder
         self.text_splitter = text_splitter
         self.vectorstore = vectorstore
         self.search_runner = search_runner
         self.max_retrieval_results = max_retrieval_results
+        self.retrieval_mode = self._check_mode(retrieval_mode)
+        self.lexical_index = lexical_index
+        self.retrieval_method = retrieval_method
+        self.rrf_k = rrf_k
+        self.hybrid_candidates = hybrid_candidates
+        self._known_chunk_ids: set[str] = set()
+        self._ingestion_lock = threading.Lock()
+        self._ingest_lock = threading.Lock()
+        self._ingestion_totals = {"new": 0, "duplicate": 0, "skipped": 0}
+        self._persist_totals = {"queued": 0, "pending": 0, "failed": 0}
 
     @staticmethod
     def from_config(
         config: Union[DictConfig, Dict[str, Any]],
+        shared_embedder: bool = False,
     ) -> "SearchRagManager":
+        """Build a new manager. Request paths should use :func:`get_search_rag_manager` instead."""
         config = ensure_config_dict(config)
-        embedder = EmbedderFactory.create(
-            model=config.get("embedder", {}).get("model_name", "sentence-transformers/all-mpnet-base-v2"),
-            model_provider=config.get("embedder", {}).get("provider", "huggingface"),
+        # `embedding` is the section name in config/default.yaml; `embedder` is accepted for older configs.
+        embedder = EmbedderFactory.from_config(
+            config.get("embedding") or config.get("embedder") or {},
+            shared=shared_embedder,
         )
 
         text_splitter = TextSplitterFactory.create(
@@ -49,25 +92,51 @@ class SearchRagManager:
             chunk_overlap=config.get("rag", {}).get("chunk_overlap", 0),
         )
 
+        vectorstore_type = config.get("vectorstore", {}).get("type", "chroma")
         vectorstore = VectorStoreFactory.create(
-            vectorstore_type=config.get("vectorstore", {}).get("type", "chroma"),
+            vectorstore_type=vectorstore_type,
             collection_name=config.get("vectorstore", {}).get("collection_name", "default_collection"),
             persist_directory=config.get("vectorstore", {}).get("persist_directory", "./data/vectorstore"),
             embedder=embedder,
+            # Backend-specific options live in a subsection named after the type, e.g. `vectorstore.hnsw`.
+            **(config.get("vectorstore", {}).get(vectorstore_type.lower()) or {}),
         )
 
         search_runner = SearchRunner.from_config(
             config=config
         )
 
+        lexical_config = config.get("rag", {}).get("lexical", {}) or {}
+        lexical_index = None
+        if lexical_config.get("enabled", False):
+            vectorstore_config = config.get("vectorstore", {})
+            lexical_index = LexicalIndex(
+                lexical_config.get("persist_path")
+                or os.path.join(
+                    vectorstore_config.get("persist_directory", "./data/vectorstore"),
+                    f"{vectorstore_config.get('collection_name', 'default_collection')}.bm25.sqlite",
+                )
+            )
+
         return SearchRagManager(
             embedder=embedder,
             text_splitter=text_splitter,
             vectorstore=vectorstore,
             search_runner=search_runner,
             max_retrieval_results=config.get("rag", {}).get("num_retrieval_results", 5),
+            retrieval_mode=config.get("rag", {}).get("retrieval_mode", "global"),
+            lexical_index=lexical_index,
+            retrieval_method=config.get("rag", {}).get("retrieval_method", "vector"),
+            rrf_k=lexical_config.get("rrf_k", 60),
+            hybrid_candidates=lexical_config.get("candidates", 20),
         )
 
+    @staticmethod
+    def _check_mode(mode: str) -> str:
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode '{mode}'; expected one of {', '.join(RETRIEVAL_MODES)}.")
+        return mode
+
 
     def search(self, query: str) -> List[SearchResult]:
         if not self.search_runner:
@@ -75,50 +144,468 @@ class SearchRagManager:
         results = self.search_runner.invoke(query)
         return results
 
-    def add_documents(self, documents: List[Document]) -> None:
+    @staticmethod
+    def chunk_id(chunk: Document) -> str:
+        """Deterministic id of a chunk: its source URL plus a hash of its content."""
+        source = (chunk.metadata or {}).get("source", "")
+        content_digest = hashlib.sha256(chunk.page_content.encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{source}\n{content_digest}".encode("utf-8")).hexdigest()
+
+    def add_documents(
+        self, documents: List[Document], embeddings: Optional[List[List[float]]] = None
+    ) -> Dict[str, int]:
+        """Split, deduplicate and index ``documents``.
+
+        Chunks whose id is already in the vectorstore (or repeated within the
+        batch) are dropped before they reach the embedder. Returns counts of
+        ``new`` chunks, ``duplicate`` chunks and ``skipped`` empty documents.
+
+        With ``embeddings`` (one vector per document), ``documents`` are taken
+        as finished chunks, e.g. those ranked by :meth:`retrieve_ephemeral`:
+        they are not split again, and stores that accept precomputed vectors
+        keep these instead of embedding the chunks a second time.
+        """
+        stats = {"new": 0, "duplicate": 0, "skipped": 0}
         if len(documents) == 0:
             logger.warning("No documents to add to the vectorstore.")
-            return
+            return stats
         if not self.vectorstore:
             raise ValueError("VectorStore is not initialized.")
-        documents = [doc for doc in documents if len(doc.page_content.strip()) > 0]
-        if self.text_splitter:
-            split_docs = self.text_splitter.split_documents(documents)
+        vectors: Dict[str, List[float]] = {}
+        if embeddings is None:
+            chunks, split_count, stats["skipped"] = self._split_chunks(documents)
         else:
-            split_docs = documents
-        self.vectorstore.add_documents(split_docs, embedding_function=self.embedder)
-        logger.info(f"Added {len(split_docs)} documents to the vectorstore.")
+            chunks, split_count = {}, len(documents)
+            for chunk, vector in zip(documents, embeddings):
+                chunk_id = self.chunk_id(chunk)
+                chunks.setdefault(chunk_id, chunk)
+                vectors.setdefault(chunk_id, vector)
+        # Held from the id check through the insert, so concurrent calls never store a chunk twice.
+        with self._ingest_lock:
+            existing = self._existing_chunk_ids(list(chunks))
+            new_ids = [chunk_id for chunk_id in chunks if chunk_id not in existing]
+            if new_ids:
+                self._store_chunks([chunks[chunk_id] for chunk_id in new_ids], new_ids, vectors)
+            with self._ingestion_lock:
+                self._known_chunk_ids.update(chunks)
+        stats["new"] = len(new_ids)
+        stats["duplicate"] = split_count - len(new_ids)
+        if self.lexical_index is not None:
+            # Known chunks are offered too, which backfills ones stored before the index existed.
+            self.lexical_index.add(list(chunks.values()), list(chunks))
+        with self._ingestion_lock:
+            for key, value in stats.items():
+                self._ingestion_totals[key] += value
+        logger.info(
+            f"Ingested {stats['new']} new chunks into the vectorstore "
+            f"({stats['duplicate']} duplicate, {stats['skipped']} empty documents skipped)."
+        )
+        return stats
+
+    def _store_chunks(self, chunks: List[Document], ids: List[str], vectors: Dict[str, List[float]]) -> None:
+        if vectors and isinstance(self.vectorstore, NumpyVectorStore):
+            self.vectorstore.add_embeddings(
+                [chunk.page_content for chunk in chunks], [vectors[chunk_id] for chunk_id in ids],
+                [chunk.metadata for chunk in chunks], ids,
+            )
+        else:
+            # Other stores embed on insert; the embedding cache turns a repeat into a lookup.
+            self.vectorstore.add_documents(chunks, ids=ids)
+
+    def _split_chunks(self, documents: List[Document]) -> Tuple[Dict[str, Document], int, int]:
+        """Split non-empty ``documents`` into chunks keyed by :meth:`chunk_id`.
+
+        Returns the unique chunks, the number of chunks before deduplication
+        and the number of empty documents skipped.
+        """
+        non_empty = [doc for doc in documents if len(doc.page_content.strip()) > 0]
+        split_docs = self.text_splitter.split_documents(non_empty) if self.text_splitter else non_empty
+        chunks: Dict[str, Document] = {}
+        for chunk in split_docs:
+            chunks.setdefault(self.chunk_id(chunk), chunk)
+        return chunks, len(split_docs), len(documents) - len(non_empty)
 
-    def retrieve(self, query: str, k: Optional[int] = None) -> List[Document]:
+    def _existing_chunk_ids(self, chunk_ids: List[str]) -> set[str]:
+        with self._ingestion_lock:
+            existing = {chunk_id for chunk_id in chunk_ids if chunk_id in self._known_chunk_ids}
+        unknown = [chunk_id for chunk_id in chunk_ids if chunk_id not in existing]
+        if unknown:
+            try:
+                existing.update(doc.id for doc in self.vectorstore.get_by_ids(unknown) if doc.id)
+            except NotImplementedError:
+                # Stores without id lookup only dedupe against what this process ingested.
+                pass
+        return existing
+
+    def ingestion_stats(self) -> Dict[str, int]:
+        with self._ingestion_lock:
+            return {**self._ingestion_totals, **{f"persist_{key}": value for key, value in self._persist_totals.items()}}
+
+    def _resolve_method(self, method: Optional[str], query: str) -> str:
+        method = method or self.retrieval_method
+        if method not in RETRIEVAL_METHODS:
+            raise ValueError(f"Unknown retrieval method '{method}'; expected one of {', '.join(RETRIEVAL_METHODS)}.")
+        if method == "auto":
+            return "lexical" if is_keyword_query(query) else "hybrid"
+        return method
+
+    def _keyed(self, docs: List[Document]) -> List[Tuple[str, Document]]:
+        return [(doc.id or self.chunk_id(doc), doc) for doc in docs]
+
+    def _fuse(self, rankings: List[List[Tuple[str, Document]]], k: int) -> List[Document]:
+        rankings = [ranking for ranking in rankings if ranking]
+        if len(rankings) == 1:
+            return [doc for _, doc in rankings[0][:k]]
+        return reciprocal_rank_fusion(rankings, k, rrf_k=self.rrf_k)
+
+    def retrieve(self, query: str, k: Optional[int] = None, method: Optional[str] = None) -> List[Document]:
+        """Retrieve from the shared collection.
+
+        ``method`` overrides :attr:`retrieval_method`: ``vector`` (dense only),
+        ``lexical`` (BM25 only, no query embedding), ``hybrid`` (both, fused with
+        reciprocal rank fusion) or ``auto`` (``lexical`` for short keyword
+        queries, else ``hybrid``). Without a lexical index everything is ``vector``.
+        """
+        return self.retrieve_many([query], k, method)[0]
+
+    def retrieve_many(self, queries: List[str], k: Optional[int] = None, method: Optional[str] = None) -> List[List[Document]]:
+        """Batch form of :meth:`retrieve`; the queries that need a vector are embedded together."""
         k = k or self.max_retrieval_results
         if not self.vectorstore:
             raise ValueError("VectorStore is not initialized.")
-        retrieval = self.vectorstore.similarity_search(query, k=k)
-        return retrieval
+        candidates = max(k, self.hybrid_candidates)
+        methods = [
+            "vector" if self.lexical_index is None else self._resolve_method(method, query) for query in queries
+        ]
+        lexical_hits = {
+            row: [doc for doc, _ in self.lexical_index.search(query, k if methods[row] == "lexical" else candidates)]
+            for row, query in enumerate(queries)
+            if methods[row] in ("lexical", "hybrid")
+        }
+        # A lexical query with no indexed term falls back to dense retrieval.
+        dense_rows = [row for row, method in enumerate(methods) if method != "lexical" or not lexical_hits[row]]
+        query_vectors = embed_queries(self.embedder, [queries[row] for row in dense_rows]) if dense_rows else []
+        dense_hits = {
+            row: self.vectorstore.similarity_search_by_vector(vector, k=candidates if methods[row] == "hybrid" else k)
+            for row, vector in zip(dense_rows, query_vectors)
+        }
+        results = []
+        for row, method in enumerate(methods):
+            if method == "hybrid":
+                results.append(self._fuse([self._keyed(dense_hits[row]), self._keyed(lexical_hits[row])], k))
+            else:
+                results.append(dense_hits[row] if row in dense_hits else lexical_hits[row])
+        return results
+
+    def retrieve_ephemeral(
+        self,
+        query: str,
+        documents: List[Document],
+        k: Optional[int] = None,
+        blend: bool = False,
+        method: Optional[str] = None,
+    ) -> List[Document]:
+        """Rank the chunks of just-fetched ``documents`` for ``query`` without touching the shared collection.
+
+        The chunks are indexed in a request-local flat vector index and/or BM25
+        index, depending on ``method`` (see :meth:`retrieve`). With
+        ``blend=True`` the top persistent hits are merged in. Chunks are queued
+        for persistence in the background, so latency does not grow with the
+        collection.
+        """
+        return self.retrieve_ephemeral_many([query], documents, k, blend, method)[0]
+
+    def retrieve_ephemeral_many(
+        self,
+        queries: List[str],
+        documents: List[Document],
+        k: Optional[int] = None,
+        blend: bool = False,
+        method: Optional[str] = None,
+    ) -> List[List[Document]]:
+        """Batch form of :meth:`retrieve_ephemeral` over one shared pool of fetched ``documents``.
+
+        The documents are split and embedded once, all queries are embedded in
+        one batch, and a single matrix product ranks the chunks for every query.
+        """
+        k = k or self.max_retrieval_results
+        methods = [self._resolve_method(method, query) for query in queries]
+        candidates = [max(k, self.hybrid_candidates) if method == "hybrid" else k for method in methods]
+        chunks, _, _ = self._split_chunks(documents)
+        # With nothing fetched (e.g. the search failed), fall back to the collection.
+        use_persistent = blend or not chunks
+        rankings: List[List[List[Tuple[str, Document]]]] = [[] for _ in queries]
+        lexical_rows = [row for row, method in enumerate(methods) if method in ("lexical", "hybrid")]
+        if lexical_rows:
+            local = LexicalIndex()
+            local.add(list(chunks.values()), list(chunks))
+            for row in lexical_rows:
+                rankings[row].append(self._keyed([doc for doc, _ in local.search(queries[row], candidates[row])]))
+                if use_persistent and self.lexical_index is not None:
+                    rankings[row].append(
+                        self._keyed([doc for doc, _ in self.lexical_index.search(queries[row], candidates[row])])
+                    )
+            local.close()
+        dense_rows = [
+            row for row, method in enumerate(methods) if method in ("vector", "hybrid") or not any(rankings[row])
+        ]
+        chunk_vectors = None
+        if dense_rows:
+            dense_rankings, chunk_vectors = self._vector_rankings(
+                [queries[row] for row in dense_rows], chunks, max(candidates[row] for row in dense_rows), use_persistent
+            )
+            for row, ranking in zip(dense_rows, dense_rankings):
+                rankings[row].append(ranking[: candidates[row]])
+        if chunks:
+            self.persist_in_background(list(chunks.values()), chunk_vectors)
+        return [self._fuse(query_rankings, k) for query_rankings in rankings]
+
+    def _vector_rankings(
+        self,
+        queries: List[str],
+        chunks: Dict[str, Document],
+        k: int,
+        use_persistent: bool,
+    ) -> Tuple[List[List[Tuple[str, Document]]], Optional[List[List[float]]]]:
+        """Rank ``chunks`` (plus persistent hits) by cosine similarity; also returns the chunk vectors, in order."""
+        ranked: List[Dict[str, Tuple[float, Document]]] = [{} for _ in queries]
+        raw_query_vectors = embed_queries(self.embedder, queries)
+        query_matrix = _unit_rows(raw_query_vectors)
+        chunk_vectors = None
+        if chunks:
+            chunk_ids = list(chunks)
+            chunk_vectors = self.embedder.embed_documents([chunks[chunk_id].page_content for chunk_id in chunk_ids])
+            scores = query_matrix @ _unit_rows(chunk_vectors).T
+            for row, query_scores in enumerate(scores):
+                for column in top_k(query_scores, k).tolist():
+                    chunk_id = chunk_ids[column]
+                    ranked[row][chunk_id] = (float(query_scores[column]), chunks[chunk_id].model_copy(update={"id": chunk_id}))
+        if use_persistent and self.vectorstore:
+            for row, hits in enumerate(self._persistent_hits(raw_query_vectors, query_matrix, k)):
+                for key, scored in hits.items():
+                    ranked[row].setdefault(key, scored)
+        rankings = [
+            [(key, doc) for key, (_, doc) in sorted(query_ranked.items(), key=lambda item: item[1][0], reverse=True)[:k]]
+            for query_ranked in ranked
+        ]
+        return rankings, chunk_vectors
+
+    def _persistent_hits(
+        self, query_vectors: List[List[float]], query_matrix: np.ndarray, k: int
+    ) -> List[Dict[str, Tuple[float, Document]]]:
+        """Top ``k`` collection hits per query, scored as cosine similarities like the fresh chunks."""
+        if isinstance(self.vectorstore, NumpyVectorStore):
+            # Its scores already are cosine similarities of the stored unit vectors.
+            return [
+                {doc.id or self.chunk_id(doc): (float(score), doc) for doc, score in
+                 self.vectorstore.similarity_search_with_score_by_vector(vector, k=k)}
+                for vector in query_vectors
+            ]
+        hits = [self._keyed(self.vectorstore.similarity_search_by_vector(vector, k=k)) for vector in query_vectors]
+        unique = {key: doc for row_hits in hits for key, doc in row_hits}
+        if not unique:
+            return [{} for _ in hits]
+        # Other stores score on their own scales, so re-score from the stored vectors.
+        keys = list(unique)
+        vectors = self._stored_vectors(keys)
+        if vectors is None:
+            vectors = self.embedder.embed_documents([unique[key].page_content for key in keys])
+        column_of = {key: column for column, key in enumerate(keys)}
+        scores = query_matrix @ _unit_rows(vectors).T
+        return [
+            {key: (float(scores[row, column_of[key]]), doc) for key, doc in row_hits}
+            for row, row_hits in enumerate(hits)
+        ]
 
-    def invoke(self, query: str) -> List[Document]:
+    def _stored_vectors(self, ids: List[str]) -> Optional[List[List[float]]]:
+        """Stored embeddings of ``ids`` in order, from stores that return them (Chroma's ``get``)."""
+        get = getattr(self.vectorstore, "get", None)
+        if get is None:
+            return None
+        stored = get(ids=ids, include=["embeddings"])
+        embeddings = stored.get("embeddings")
+        if embeddings is None:
+            return None
+        by_id = dict(zip(stored.get("ids") or [], embeddings))
+        if any(doc_id not in by_id for doc_id in ids):
+            return None
+        return [list(by_id[doc_id]) for doc_id in ids]
+
+    def persist_in_background(
+        self, documents: List[Document], embeddings: Optional[List[List[float]]] = None
+    ) -> Optional[Future]:
+        """Queue ``documents`` for :meth:`add_documents` on the single-threaded ``ingest`` executor.
+
+        Pass ``embeddings`` when the chunks were already embedded, so they are stored as-is.
+        """
+        if not documents or not self.vectorstore:
+            return None
+        with self._ingestion_lock:
+            self._persist_totals["queued"] += 1
+            self._persist_totals["pending"] += 1
+        future = get_executor("ingest").submit(self.add_documents, documents, embeddings)
+        future.add_done_callback(self._persisted)
+        return future
+
+    def _persisted(self, future: Future) -> None:
+        error = None if future.cancelled() else future.exception()
+        with self._ingestion_lock:
+            self._persist_totals["pending"] -= 1
+            if future.cancelled() or error is not None:
+                self._persist_totals["failed"] += 1
+        if error is not None:
+            logger.warning(f"Background persistence of search chunks failed: {error}")
+
+    def invoke(self, query: str, mode: Optional[str] = None, method: Optional[str] = None) -> List[Document]:
+        """Search the web for ``query`` and retrieve the best chunks.
+
+        ``mode`` overrides :attr:`retrieval_mode`: ``global`` ingests the results
+        and queries the whole collection, ``ephemeral`` ranks only the fetched
+        chunks and ``blended`` also mixes in persistent hits. ``method`` picks
+        the ranking, see :meth:`retrieve`.
+        """
+        mode = self._check_mode(mode or self.retrieval_mode)
         results = self.search(query)
         documents = [res.document for res in results if res.document is not None]
+        if mode != "global":
+            return self.retrieve_ephemeral(query, documents, blend=mode == "blended", method=method)
         self.add_documents(documents=documents)
-        retrieved_docs = self.retrieve(query)
+        retrieved_docs = self.retrieve(query, method=method)
         return retrieved_docs
 
+    def search_many(self, queries: List[str]) -> List[List[SearchResult]]:
+        if not self.search_runner:
+            raise ValueError("SearcherRunner is not initialized.")
+        return self.search_runner.invoke_many(queries)
+
+    @staticmethod
+    def _unique_documents(results: List[List[SearchResult]]) -> List[Document]:
+        documents: Dict[str, Document] = {}
+        for query_results in results:
+            for res in query_results:
+                if res.document is not None:
+                    documents.setdefault(res.document.metadata.get("source") or res.link, res.document)
+        return list(documents.values())
+
+    def invoke_many(self, queries: List[str], mode: Optional[str] = None, method: Optional[str] = None) -> List[List[Document]]:
+        """Batch form of :meth:`invoke` for related queries, e.g. the knowledge points of one session.
+
+        The web is searched once per distinct query, each page is fetched and
+        chunked once, and the pooled chunks are ingested or ranked in one pass.
+        Returns the retrieved chunks for each query, in input order.
+        """
+        mode = self._check_mode(mode or self.retrieval_mode)
+        documents = self._unique_documents(self.search_many(queries))
+        if mode != "global":
+            return self.retrieve_ephemeral_many(queries, documents, blend=mode == "blended", method=method)
+        self.add_documents(documents=documents)
+        return self.retrieve_many(queries, method=method)
+
+    async def asearch(self, query: str) -> List[SearchResult]:
+        return await run_blocking("io", self.search, query)
+
+    async def aadd_documents(self, documents: List[Document]) -> Dict[str, int]:
+        return await run_blocking("embedding", self.add_documents, documents)
+
+    async def aretrieve(self, query: str, k: Optional[int] = None, method: Optional[str] = None) -> List[Document]:
+        return await run_blocking("embedding", self.retrieve, query, k, method)
+
+    async def ainvoke(self, query: str, mode: Optional[str] = None, method: Optional[str] = None) -> List[Document]:
+        """Async counterpart of :meth:`invoke`; blocking steps run in bounded executors."""
+        mode = self._check_mode(mode or self.retrieval_mode)
+        results = await self.asearch(query)
+        documents = [res.document for res in results if res.document is not None]
+        if mode != "global":
+            return await run_blocking(
+                "embedding", self.retrieve_ephemeral, query, documents, None, mode == "blended", method
+            )
+        await self.aadd_documents(documents)
+        return await self.aretrieve(query, method=method)
+
+    async def ainvoke_many(
+        self, queries: List[str], mode: Optional[str] = None, method: Optional[str] = None
+    ) -> List[List[Document]]:
+        """Async counterpart of :meth:`invoke_many`."""
+        mode = self._check_mode(mode or self.retrieval_mode)
+        documents = self._unique_documents(await run_blocking("io", self.search_many, queries))
+        if mode != "global":
+            return await run_blocking(
+                "embedding", self.retrieve_ephemeral_many, queries, documents, None, mode == "blended", method
+            )
+        await self.aadd_documents(documents)
+        return await run_blocking("embedding", self.retrieve_many, queries, None, method)
+
+
+_RAG_CONFIG_SECTIONS = ("embedding", "embedder", "search", "vectorstore", "rag")
+_managers: Dict[str, SearchRagManager] = {}
+_managers_lock = threading.Lock()
+
+
+def _manager_key(config: Dict[str, Any]) -> str:
+    sections = {name: config.get(name) for name in _RAG_CONFIG_SECTIONS}
+    return json.dumps(sections, sort_keys=True, default=str)
+
+
+def get_search_rag_manager(config: Optional[Union[DictConfig, Dict[str, Any]]] = None) -> SearchRagManager:
+    """Return the process-wide manager for ``config``, building it on first use.
+
+    Managers are keyed by the embedding/search/vectorstore/rag sections, so
+    every caller with the same settings shares one embedding model and one
+    vectorstore client. Defaults to ``config.default_config``.
+    """
+    if config is None:
+        from config.loader import default_config
+        config = default_config
+    config = ensure_config_dict(config)
+    key = _manager_key(config)
+    manager = _managers.get(key)
+    if manager is not None:
+        return manager
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            start = time.perf_counter()
+            manager = SearchRagManager.from_config(config, shared_embedder=True)
+            _managers[key] = manager
+            logger.info(f"Initialized shared SearchRagManager in {time.perf_counter() - start:.2f}s.")
+        return manager
+
+
+def search_rag_stats() -> Dict[str, Any]:
+    """Ingestion totals of every shared manager."""
+    with _managers_lock:
+        managers = list(_managers.values())
+    return {
+        f"{type(manager.vectorstore).__name__}:{index}": {"ingestion": manager.ingestion_stats()}
+        for index, manager in enumerate(managers)
+    }
+
+
+def warmup_search_rag_manager(config: Optional[Union[DictConfig, Dict[str, Any]]] = None) -> SearchRagManager:
+    """Build the shared manager and run one embedding so model weights are loaded before the first request."""
+    manager = get_search_rag_manager(config)
+    start = time.perf_counter()
+    manager.embedder.embed_query("warmup")
+    logger.info(f"Warmed up embedding model in {time.perf_counter() - start:.2f}s.")
+    return manager
+
 
-def format_docs(docs: List[Document]) -> str:
-    formatted_chunks: List[str] = []
-    for idx, doc in enumerate(docs):
-        title = doc.metadata.get("title") if doc.metadata else None
-        source = doc.metadata.get("source") if doc.metadata else None
-        header_parts = [f"[{idx}]"]
-        if title:
-            header_parts.append(title)
-        if source:
-            header_parts.append(f"Source: {source}")
-        header = " | ".join(header_parts)
-        body = doc.page_content.strip()
-        formatted_chunks.append(f"{header}\n{body}")
-    return "\n\n".join(formatted_chunks)
+def format_docs(
+    docs: List[Document],
+    query: Optional[str] = None,
+    agent_name: Optional[str] = None,
+    existing_context: str = "",
+) -> str:
+    """Format retrieved chunks as numbered prompt context.
 
+    With ``context_packing`` enabled, near-duplicates are dropped and only the
+    most relevant, diverse chunks that fit ``agent_name``'s token budget are
+    kept (see ``base.context_packer``).
+    """
+    packer = get_context_packer()
+    if packer.enabled:
+        return packer.pack(docs, query=query, agent_name=agent_name, existing_context=existing_context)
+    return "\n\n".join(format_chunk(idx, doc) for idx, doc in enumerate(docs))
 
 
 if __name__ == "__main__":
@@ -159,8 +646,7 @@ if __name__ == "__main__":
         search_runner=search_runner,
     )
 
-    from config import default_config
-    rag_manager = SearchRagManager.from_config(default_config)
+    rag_manager = get_search_rag_manager()
 
     results = rag_manager.search("LangChain community utilities")
     print(f"Retrieved {len(results)} search results.")
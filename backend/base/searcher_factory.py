@@ -6,14 +6,20 @@ instead of hand-written HTTP code. It supports Bing, Tavily, and Serper.dev.
 
 from __future__ import annotations
 
+import logging
 from pydoc import doc
-from typing import Any, Dict, List, Union, cast
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Union, cast
 from langchain_core.documents import Document
 from .dataclass import SearchResult
+from .search_cache import SearchResultCache
+from .page_cache import CachedPage, PageCache, content_hash, get_page_cache
+from .web_fetcher import FetchedPage, get_web_fetcher
 from pydantic import BaseModel
 from omegaconf import OmegaConf, DictConfig
 from utils.config import ensure_config_dict
 
+logger = logging.getLogger(__name__)
 
 class SearcherFactory:
     """Create concise searchers backed by LangChain community utilities."""
@@ -45,25 +51,93 @@ class SearcherFactory:
 class WebDocumentLoader:
 
     @staticmethod
-    def invoke(urls: List[str], loader_type: str = "web") -> List[Document]:
-        """Load documents from the provided URLs using the specified loader."""
+    def invoke(urls: List[str], loader_type: str = "web", deadline: Optional[float] = None) -> List[Document]:
+        """Load documents from the provided URLs using the specified loader.
+
+        URLs that fail or miss the fetch deadline are skipped (or served from a
+        stale page cache entry); the documents that did load are returned with
+        their URL as ``metadata["source"]``.
+        """
         if not urls:
             return []
         if loader_type == "docling":
-            from langchain_docling import DoclingLoader
-            loader = DoclingLoader(urls)
-        elif loader_type == "web":
-            from langchain_community.document_loaders import WebBaseLoader
-            import bs4
-            # bs4_strainer = bs4.SoupStrainer(class_=("post-title", "post-header", "post-content"))
-            # loader = WebBaseLoader(urls, bs_kwargs={"parse_only": bs4_strainer},)
-            # 'verify':False, 
-            loader = WebBaseLoader(urls, requests_kwargs={'timeout':10})
-        try:
-            documents = loader.load()
-        except Exception as e:
-            print(f"Error loading documents from URLs: {e}")
-            documents = []
+            return WebDocumentLoader._load_with_docling(urls)
+        page_cache = get_page_cache()
+        cached = page_cache.get_many(urls) if page_cache is not None else {}
+        documents_by_url: Dict[str, Document] = {}
+        to_fetch, conditional_headers = [], {}
+        for url in dict.fromkeys(urls):
+            entry = cached.get(url)
+            if entry is not None and entry.is_fresh(page_cache.ttl):
+                documents_by_url[url] = entry.document
+                page_cache.record("fresh_hits", bytes_saved=entry.size)
+                continue
+            to_fetch.append(url)
+            if entry is not None:
+                conditional_headers[url] = entry.conditional_headers()
+
+        pages = get_web_fetcher().fetch_many(to_fetch, deadline=deadline, headers=conditional_headers)
+        for url in to_fetch:
+            page, entry = pages.get(url), cached.get(url)
+            if page is None:
+                if entry is not None:
+                    # Fetch failed or missed the deadline; a stale copy beats no copy.
+                    documents_by_url[url] = entry.document
+                    page_cache.record("stale_served", bytes_saved=entry.size)
+                continue
+            try:
+                documents_by_url[url] = WebDocumentLoader._document_from_fetch(page, entry, page_cache)
+            except Exception as e:
+                logger.warning(f"Failed to parse {url}: {e}")
+        return [documents_by_url[url] for url in urls if url in documents_by_url]
+
+    @staticmethod
+    def _document_from_fetch(page: FetchedPage, entry: Optional[CachedPage], page_cache: Optional[PageCache]) -> Document:
+        """Turn a fetch into a document, reusing the cached parse when the page has not changed."""
+        etag = page.headers.get("etag")
+        last_modified = page.headers.get("last-modified")
+        if page.status_code == 304 and entry is not None:
+            page_cache.touch_validated(page.url, etag, last_modified)
+            page_cache.record("revalidated", bytes_saved=entry.size)
+            return entry.document
+        digest = content_hash(page.content)
+        if entry is not None and entry.content_hash == digest:
+            page_cache.touch_validated(page.url, etag, last_modified)
+            page_cache.record("unchanged")
+            return entry.document
+        document = WebDocumentLoader.page_to_document(page)
+        if page_cache is not None:
+            page_cache.record("misses")
+            page_cache.store(page.url, document, digest, len(page.content), etag, last_modified)
+        return document
+
+    @staticmethod
+    def page_to_document(page: FetchedPage) -> Document:
+        """Extract text and metadata from a fetched page, like ``WebBaseLoader`` does."""
+        metadata = {"source": page.url}
+        if "html" not in page.content_type.lower() and page.content_type:
+            return Document(page_content=page.text, metadata=metadata)
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(page.text, "html.parser")
+        if soup.title and soup.title.get_text():
+            metadata["title"] = soup.title.get_text().strip()
+        description = soup.find("meta", attrs={"name": "description"})
+        if description and description.get("content"):
+            metadata["description"] = description.get("content")
+        html = soup.find("html")
+        if html and html.get("lang"):
+            metadata["language"] = html.get("lang")
+        return Document(page_content=soup.get_text(), metadata=metadata)
+
+    @staticmethod
+    def _load_with_docling(urls: List[str]) -> List[Document]:
+        from langchain_docling import DoclingLoader
+        documents = []
+        for url in urls:
+            try:
+                documents.extend(DoclingLoader([url]).load())
+            except Exception as e:
+                logger.warning(f"Error loading document from {url}: {e}")
         return documents
 
 
@@ -75,11 +149,13 @@ class SearchRunner:
             searcher: BaseModel,
             loader_type: str = "web",
             max_search_results: int = 5,
+            result_cache: Optional[SearchResultCache] = None,
             **kwargs: Any
         ) -> None:
         self.searcher = searcher
         self.loader_type = loader_type
         self.max_search_results = max_search_results
+        self.result_cache = result_cache
 
     @staticmethod
     def from_config(
@@ -87,33 +163,71 @@ class SearchRunner:
         ) -> "SearchRunner":
   
         config_dict = ensure_config_dict(config)
+        provider = config_dict.get("search", {}).get("provider", "duckduckgo")
         searcher = SearcherFactory.create(
-            provider=config_dict.get("search", {}).get("provider", "duckduckgo"),
+            provider=provider,
             **config_dict,
         )
         return SearchRunner(
             searcher=searcher,
             loader_type=config_dict.get("search", {}).get("loader_type", "web"),
             max_search_results=config_dict.get("search", {}).get("max_results", 5),
+            result_cache=SearchResultCache.from_config(config_dict, provider=provider),
         )
 
+    def search_raw(self, query: str) -> List[Dict[str, Any]]:
+        """Return the provider's raw results for ``query``, served from the result cache when possible."""
+        if self.result_cache is not None:
+            cached = self.result_cache.get(query, self.max_search_results)
+            if cached is not None:
+                return cached
+        raw_results = self.searcher.results(query, max_results=self.max_search_results)
+        if self.result_cache is not None:
+            self.result_cache.set(query, self.max_search_results, raw_results)
+        return raw_results
+
     def invoke(self, query: str) -> List[SearchResult]:
         """Perform a search and return structured results."""
-        raw_results = self.searcher.results(query, max_results=self.max_search_results)
+        raw_results = self.search_raw(query)
         urls = [item.get("link", "") for item in raw_results if item.get("link")]
         url_contents = WebDocumentLoader.invoke(urls, loader_type=self.loader_type)
-        url_docs_dict = {url: doc for url, doc in zip(urls, url_contents)}
-        url_content_dict = {url: doc.page_content for url, doc in url_docs_dict.items()}
+        # Failed URLs are skipped, so match documents by source rather than by position.
+        url_docs_dict = {doc.metadata.get("source"): doc for doc in url_contents}
+        return self._structure(raw_results, url_docs_dict)
+
+    def invoke_many(self, queries: Sequence[str]) -> List[List[SearchResult]]:
+        """Search several queries at once and return one result list per query.
+
+        Repeated queries are searched once, the provider calls run concurrently,
+        and every page found is fetched in a single batch, however many
+        queries returned it.
+        """
+        unique_queries = list(dict.fromkeys(queries))
+        if not unique_queries:
+            return []
+        # A private pool: callers may already be running on the shared "io" executor.
+        with ThreadPoolExecutor(max_workers=min(len(unique_queries), 8), thread_name_prefix="genmentor-search") as pool:
+            raw_by_query = dict(zip(unique_queries, pool.map(self.search_raw, unique_queries)))
+        urls = list(dict.fromkeys(
+            item.get("link", "") for raw_results in raw_by_query.values() for item in raw_results if item.get("link")
+        ))
+        url_contents = WebDocumentLoader.invoke(urls, loader_type=self.loader_type)
+        url_docs_dict = {doc.metadata.get("source"): doc for doc in url_contents}
+        structured = {query: self._structure(raw_results, url_docs_dict) for query, raw_results in raw_by_query.items()}
+        return [structured[query] for query in queries]
 
+    @staticmethod
+    def _structure(raw_results: List[Dict[str, Any]], url_docs_dict: Dict[str, Document]) -> List[SearchResult]:
         structured_results: List[SearchResult] = []
         for item in raw_results:
+            document = url_docs_dict.get(item.get("link", ""), None)
             structured_results.append(
                 SearchResult(
                     title=item.get("title", ""),
                     link=item.get("link", ""),
-                    content=url_content_dict.get(item.get("link", ""), ""),
+                    content=document.page_content if document is not None else "",
                     snippet=item.get("snippet", None),
-                    document=url_docs_dict.get(item.get("link", ""), None)
+                    document=document
                 )
             )
 
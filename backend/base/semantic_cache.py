@@ -0,0 +1,296 @@
+"""Embedding-similarity cache for LLM results keyed by free-text inputs.
+
+Learners phrase the same goal in many ways ("become a data scientist",
+"learn data science"). ``SemanticCache`` embeds a normalized form of the input
+and returns the stored value of the most similar earlier input when the cosine
+similarity clears a threshold. Entries live in one contiguous float32 matrix
+of L2-normalized rows, so a lookup is a single matrix-vector product.
+
+Vectors are only comparable within one embedding model, so the persisted
+cache records the model and dimension it was built with and is discarded
+when either changes.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from omegaconf import DictConfig
+
+from utils.config import ensure_config_dict
+
+logger = logging.getLogger(__name__)
+
+_FILLER_PREFIXES = (
+    "i want to ",
+    "i would like to ",
+    "i'd like to ",
+    "i wish to ",
+    "help me ",
+    "how to ",
+    "how do i ",
+)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation and filler openings, collapse whitespace."""
+    text = re.sub(r"[^\w\s+#.-]", " ", str(text).lower())
+    text = re.sub(r"\s+", " ", text).strip(" .-")
+    for prefix in _FILLER_PREFIXES:
+        if text.startswith(prefix):
+            text = text[len(prefix):]
+            break
+    return text
+
+
+class SemanticCache:
+
+    def __init__(
+        self,
+        embedder: Embeddings,
+        namespace: str = "default",
+        similarity_threshold: float = 0.92,
+        max_entries: int = 5000,
+        persist_directory: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> None:
+        self.embedder = embedder
+        self.namespace = namespace
+        self.model = model
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.persist_directory = persist_directory
+        self._lock = threading.RLock()
+        self._reset()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        if persist_directory:
+            self._load()
+
+    def _reset(self) -> None:
+        self._matrix: Optional[np.ndarray] = None  # (capacity, dim) float32, rows [:size] valid
+        self._size = 0
+        self._keys: List[str] = []
+        self._values: List[Any] = []
+        self._last_used: List[float] = []
+        self._index: Dict[str, int] = {}
+
+    def _check_dimension(self, vector: np.ndarray) -> None:
+        """Drop every entry when ``vector`` comes from a model with another dimension."""
+        if self._matrix is not None and self._matrix.shape[1] != vector.shape[0]:
+            logger.warning(
+                f"Semantic cache '{self.namespace}' holds {self._matrix.shape[1]}-d vectors but the embedder "
+                f"returns {vector.shape[0]}-d ones; discarding {self._size} entries."
+            )
+            self._reset()
+
+    @property
+    def _matrix_path(self) -> str:
+        return os.path.join(self.persist_directory, f"{self.namespace}.npy")
+
+    @property
+    def _entries_path(self) -> str:
+        return os.path.join(self.persist_directory, f"{self.namespace}.json")
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embedder.embed_query(text), dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else vector
+
+    def lookup(self, text: str) -> Optional[Any]:
+        """Return the cached value for the most similar stored input, if similar enough."""
+        key = normalize_text(text)
+        if not key:
+            return None
+        with self._lock:
+            row = self._index.get(key)
+            if row is not None:
+                return self._hit(row)
+            if self._size == 0:
+                self._misses += 1
+                return None
+        query = self._embed(key)
+        with self._lock:
+            self._check_dimension(query)
+            if self._size == 0:
+                self._misses += 1
+                return None
+            scores = self._matrix[: self._size] @ query
+            row = int(np.argmax(scores))
+            if float(scores[row]) >= self.similarity_threshold:
+                logger.debug(f"Semantic cache hit ({scores[row]:.3f}): '{key}' ~ '{self._keys[row]}'")
+                return self._hit(row)
+            self._misses += 1
+            return None
+
+    def _hit(self, row: int) -> Any:
+        self._hits += 1
+        self._last_used[row] = time.time()
+        return json.loads(json.dumps(self._values[row]))
+
+    def store(self, text: str, value: Any) -> None:
+        """Store a JSON-serializable value for ``text``, evicting the least recently used entry when full."""
+        key = normalize_text(text)
+        if not key:
+            return
+        vector = self._embed(key)
+        with self._lock:
+            self._check_dimension(vector)
+            row = self._index.get(key)
+            if row is None:
+                if self._size >= self.max_entries:
+                    self._evict_lru()
+                row = self._append(vector)
+                self._keys.append(key)
+                self._values.append(value)
+                self._last_used.append(time.time())
+                self._index[key] = row
+            else:
+                self._matrix[row] = vector
+                self._values[row] = value
+                self._last_used[row] = time.time()
+            if self.persist_directory:
+                self._save()
+
+    def _append(self, vector: np.ndarray) -> int:
+        if self._matrix is None:
+            self._matrix = np.zeros((min(64, max(self.max_entries, 1)), vector.shape[0]), dtype=np.float32)
+        elif self._size >= self._matrix.shape[0]:
+            capacity = min(max(self._matrix.shape[0] * 2, 1), max(self.max_entries, 1))
+            grown = np.zeros((capacity, self._matrix.shape[1]), dtype=np.float32)
+            grown[: self._size] = self._matrix[: self._size]
+            self._matrix = grown
+        self._matrix[self._size] = vector
+        self._size += 1
+        return self._size - 1
+
+    def _evict_lru(self) -> None:
+        victim = int(np.argmin(self._last_used))
+        last = self._size - 1
+        del self._index[self._keys[victim]]
+        if victim != last:
+            # Move the last row into the freed slot to keep the matrix dense.
+            self._matrix[victim] = self._matrix[last]
+            self._keys[victim] = self._keys[last]
+            self._values[victim] = self._values[last]
+            self._last_used[victim] = self._last_used[last]
+            self._index[self._keys[victim]] = victim
+        self._keys.pop()
+        self._values.pop()
+        self._last_used.pop()
+        self._size -= 1
+        self._evictions += 1
+
+    def _save(self) -> None:
+        os.makedirs(self.persist_directory, exist_ok=True)
+        tmp_matrix = f"{self._matrix_path}.tmp.npy"
+        tmp_entries = f"{self._entries_path}.tmp"
+        np.save(tmp_matrix, self._matrix[: self._size])
+        with open(tmp_entries, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "model": self.model,
+                    "dim": int(self._matrix.shape[1]),
+                    "keys": self._keys,
+                    "values": self._values,
+                    "last_used": self._last_used,
+                },
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_matrix, self._matrix_path)
+        os.replace(tmp_entries, self._entries_path)
+
+    def _load(self) -> None:
+        if not (os.path.exists(self._matrix_path) and os.path.exists(self._entries_path)):
+            return
+        try:
+            matrix = np.load(self._matrix_path)
+            with open(self._entries_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable semantic cache '{self.namespace}': {e}")
+            return
+        if matrix.ndim != 2 or len(entries.get("keys", [])) != matrix.shape[0]:
+            logger.warning(f"Ignoring inconsistent semantic cache '{self.namespace}'.")
+            return
+        if entries.get("model") != self.model or entries.get("dim", matrix.shape[1]) != matrix.shape[1]:
+            logger.info(
+                f"Discarding semantic cache '{self.namespace}' built with model '{entries.get('model')}' "
+                f"(now '{self.model}')."
+            )
+            return
+        keep = min(matrix.shape[0], self.max_entries)
+        self._matrix = np.ascontiguousarray(matrix[:keep], dtype=np.float32)
+        self._size = keep
+        self._keys = list(entries["keys"][:keep])
+        self._values = list(entries["values"][:keep])
+        self._last_used = list(entries.get("last_used", [0.0] * keep)[:keep])
+        self._index = {key: row for row, key in enumerate(self._keys)}
+        logger.info(f"Loaded {self._size} semantic cache entries for '{self.namespace}'.")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": self._size,
+                "max_entries": self.max_entries,
+                "similarity_threshold": self.similarity_threshold,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+
+_settings: Dict[str, Any] = {"enabled": False}
+_caches: Dict[str, SemanticCache] = {}
+_caches_lock = threading.Lock()
+
+
+def configure_semantic_cache(config: Union[DictConfig, Dict[str, Any]]) -> None:
+    """Record semantic cache settings; caches are built lazily on first use."""
+    global _settings
+    config = ensure_config_dict(config)
+    with _caches_lock:
+        _settings = {
+            **(config.get("semantic_cache", {}) or {}),
+            "embedding": config.get("embedding", {}) or {},
+        }
+        _caches.clear()
+
+
+def get_semantic_cache(namespace: str) -> Optional[SemanticCache]:
+    """Return the shared cache for ``namespace``, or ``None`` when semantic caching is disabled."""
+    if not _settings.get("enabled", False):
+        return None
+    cache = _caches.get(namespace)
+    if cache is not None:
+        return cache
+    with _caches_lock:
+        cache = _caches.get(namespace)
+        if cache is None:
+            from base.embedder_factory import EmbedderFactory
+
+            embedder = EmbedderFactory.from_config(_settings.get("embedding", {}), shared=True)
+            cache = SemanticCache(
+                embedder,
+                namespace=namespace,
+                similarity_threshold=_settings.get("similarity_threshold", 0.92),
+                max_entries=_settings.get("max_entries", 5000),
+                persist_directory=_settings.get("persist_directory", None),
+                model=_settings.get("embedding", {}).get("model_name"),
+            )
+            _caches[namespace] = cache
+        return cache
+
+
+def semantic_cache_stats() -> Dict[str, Any]:
+    return {namespace: cache.stats() for namespace, cache in list(_caches.items())}
@@ -0,0 +1,251 @@
+"""Concurrent, connection-pooled fetching of search result pages.
+
+All pages are fetched by one ``httpx.AsyncClient`` that runs on a dedicated
+background event loop, so synchronous callers (``SearchRunner.invoke`` runs in
+worker threads) and async callers share the same connection pool. Each batch
+of URLs is bounded by a global deadline: whatever has arrived when it expires
+is returned and the remaining requests are cancelled. Per-host semaphores keep
+one site from taking the whole pool, bodies are capped at ``max_bytes`` and a
+failing URL only drops that URL.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterable, List, Mapping, Optional, Union
+from urllib.parse import urlsplit
+
+import httpx
+from omegaconf import DictConfig
+
+from utils.config import ensure_config_dict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/124.0 Safari/537.36"
+)
+_TEXTUAL_CONTENT_TYPES = ("text/", "application/xhtml", "application/xml", "application/json")
+
+
+@dataclass
+class FetchedPage:
+    url: str
+    final_url: str
+    status_code: int
+    content: bytes
+    content_type: str = ""
+    encoding: Optional[str] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    truncated: bool = False
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+class WebFetcher:
+
+    def __init__(
+        self,
+        max_connections: int = 32,
+        max_keepalive_connections: int = 16,
+        per_host_limit: int = 2,
+        timeout: float = 10.0,
+        deadline: float = 15.0,
+        max_bytes: int = 2_000_000,
+        user_agent: str = DEFAULT_USER_AGENT,
+    ) -> None:
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.per_host_limit = max(1, per_host_limit)
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_bytes = max_bytes
+        self.user_agent = user_agent
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._start_lock = threading.Lock()
+        # host -> [semaphore, active users]; only touched from the fetcher loop.
+        self._host_slots: Dict[str, List[Any]] = {}
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "fetched": 0, "errors": 0, "deadline_skipped": 0, "truncated": 0, "bytes": 0}
+
+    @classmethod
+    def from_config(cls, config: Union[DictConfig, Dict[str, Any]]) -> "WebFetcher":
+        fetch_config = (ensure_config_dict(config).get("search", {}) or {}).get("fetch", {}) or {}
+        return cls(**{key: value for key, value in fetch_config.items() if value is not None})
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        if self._loop is not None:
+            return self._loop
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="genmentor-web-fetcher", daemon=True)
+                thread.start()
+                self._client = asyncio.run_coroutine_threadsafe(self._create_client(), loop).result()
+                self._thread = thread
+                self._loop = loop
+        return self._loop
+
+    async def _create_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+            ),
+            timeout=httpx.Timeout(self.timeout),
+            headers={"User-Agent": self.user_agent},
+            follow_redirects=True,
+        )
+
+    def fetch_many(
+        self,
+        urls: Iterable[str],
+        deadline: Optional[float] = None,
+        headers: Optional[Mapping[str, Mapping[str, str]]] = None,
+    ) -> Dict[str, FetchedPage]:
+        """Fetch ``urls`` concurrently and return the pages that arrived before the deadline.
+
+        ``headers`` optionally maps a URL to extra request headers. Must not be
+        called from the fetcher's own event loop.
+        """
+        loop = self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(self._fetch_all(list(urls), deadline, headers), loop)
+        return future.result()
+
+    async def afetch_many(
+        self,
+        urls: Iterable[str],
+        deadline: Optional[float] = None,
+        headers: Optional[Mapping[str, Mapping[str, str]]] = None,
+    ) -> Dict[str, FetchedPage]:
+        """Async counterpart of :meth:`fetch_many`, usable from any event loop."""
+        loop = self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(self._fetch_all(list(urls), deadline, headers), loop)
+        return await asyncio.wrap_future(future)
+
+    async def _fetch_all(
+        self,
+        urls: List[str],
+        deadline: Optional[float],
+        headers: Optional[Mapping[str, Mapping[str, str]]],
+    ) -> Dict[str, FetchedPage]:
+        deadline = self.deadline if deadline is None else deadline
+        headers = headers or {}
+        tasks = {
+            asyncio.ensure_future(self._fetch_one(url, headers.get(url))): url
+            for url in dict.fromkeys(url for url in urls if url)
+        }
+        if not tasks:
+            return {}
+        start = time.perf_counter()
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        pages: Dict[str, FetchedPage] = {}
+        for task in done:
+            url = tasks[task]
+            error = task.exception()
+            if error is not None:
+                self._count(errors=1)
+                logger.debug(f"Failed to fetch {url}: {error!r}")
+                continue
+            pages[url] = task.result()
+        if pending:
+            self._count(deadline_skipped=len(pending))
+            logger.info(
+                f"Fetch deadline of {deadline:.1f}s reached after {time.perf_counter() - start:.1f}s; "
+                f"returning {len(pages)} of {len(tasks)} pages."
+            )
+        return pages
+
+    async def _fetch_one(self, url: str, extra_headers: Optional[Mapping[str, str]]) -> FetchedPage:
+        self._count(requests=1)
+        async with self._host_slot(urlsplit(url).hostname or ""):
+            async with self._client.stream("GET", url, headers=dict(extra_headers or {})) as response:
+                if response.status_code != 304:
+                    response.raise_for_status()
+                content_type = response.headers.get("content-type", "")
+                if content_type and not content_type.lower().startswith(_TEXTUAL_CONTENT_TYPES):
+                    raise ValueError(f"Unsupported content type '{content_type}'")
+                content, truncated = await self._read_capped(response)
+                page = FetchedPage(
+                    url=url,
+                    final_url=str(response.url),
+                    status_code=response.status_code,
+                    content=content,
+                    content_type=content_type,
+                    encoding=response.charset_encoding,
+                    headers=dict(response.headers),
+                    truncated=truncated,
+                )
+        self._count(fetched=1, bytes=len(content), truncated=int(truncated))
+        return page
+
+    async def _read_capped(self, response: httpx.Response) -> tuple[bytes, bool]:
+        chunks: List[bytes] = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            remaining = self.max_bytes - size
+            if len(chunk) > remaining:
+                chunks.append(chunk[:remaining])
+                return b"".join(chunks), True
+            chunks.append(chunk)
+            size += len(chunk)
+        return b"".join(chunks), False
+
+    @asynccontextmanager
+    async def _host_slot(self, host: str) -> AsyncIterator[None]:
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = [asyncio.Semaphore(self.per_host_limit), 0]
+        slot[1] += 1
+        try:
+            async with slot[0]:
+                yield
+        finally:
+            slot[1] -= 1
+            if slot[1] == 0:
+                self._host_slots.pop(host, None)
+
+    def _count(self, **increments: int) -> None:
+        with self._stats_lock:
+            for name, value in increments.items():
+                self._stats[name] += value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def close(self) -> None:
+        loop, client = self._loop, self._client
+        if loop is None:
+            return
+        if client is not None:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        self._loop = None
+        self._client = None
+
+
+web_fetcher = WebFetcher()
+
+
+def configure_web_fetcher(config: Union[DictConfig, Dict[str, Any]]) -> WebFetcher:
+    """Replace the process-wide fetcher with one built from the ``search.fetch`` config section."""
+    global web_fetcher
+    previous = web_fetcher
+    web_fetcher = WebFetcher.from_config(config)
+    previous.close()
+    return web_fetcher
+
+
+def get_web_fetcher() -> WebFetcher:
+    return web_fetcher
@@ -0,0 +1,72 @@
+"""Micro-benchmark: per-call overhead of building agents with and without the registry.
+
+Uses a fake chat model so only the framework overhead (``create_agent`` graph
+compilation plus a graph invocation) is measured, not network latency.
+
+    python -m benchmarks.agent_construction --iterations 200
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from base.agent_registry import agent_registry
+from modules.skill_gap_identification.agents.skill_requirement_mapper import SkillRequirementMapper
+
+FAKE_RESPONSE = json.dumps(
+    {"skill_requirements": [{"name": "Python programming", "required_level": "intermediate"}]}
+)
+
+
+def _time_calls(fn, iterations: int) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _summary(label: str, timings: list[float]) -> str:
+    ordered = sorted(timings)
+    p95 = ordered[int(0.95 * (len(ordered) - 1))]
+    return f"{label:<34} mean={statistics.mean(timings):8.3f} ms  p50={statistics.median(timings):8.3f} ms  p95={p95:8.3f} ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    llm = FakeListChatModel(responses=[FAKE_RESPONSE])
+    payload = {"learning_goal": "Become a data scientist"}
+
+    def build_fresh():
+        # An empty registry reproduces the old behaviour: compile a graph per agent.
+        agent_registry.clear()
+        return SkillRequirementMapper(llm)
+
+    def build_shared():
+        return SkillRequirementMapper(llm)
+
+    fresh_build = _time_calls(build_fresh, args.iterations)
+    build_shared()  # warm the registry entry
+    shared_build = _time_calls(build_shared, args.iterations)
+    fresh_call = _time_calls(lambda: build_fresh().map_goal_to_skill(payload), args.iterations)
+    build_shared()
+    shared_call = _time_calls(lambda: build_shared().map_goal_to_skill(payload), args.iterations)
+
+    print(_summary("construct (create_agent each time)", fresh_build))
+    print(_summary("construct (registry)", shared_build))
+    print(_summary("construct+invoke (create_agent)", fresh_call))
+    print(_summary("construct+invoke (registry)", shared_call))
+    saved = statistics.mean(fresh_call) - statistics.mean(shared_call)
+    print(f"per-call overhead removed: {saved:.3f} ms ({saved / statistics.mean(fresh_call):.0%} of a fake-model call)")
+    print(f"registry stats: {agent_registry.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark: QPS and recall@k of the HNSW vector store against exact search.
+
+Builds ``HnswVectorStore`` over synthetic clustered unit vectors (see
+``benchmarks.vectorstore_search``). It then sweeps ``ef_search`` and reports
+single-query QPS and recall@k against brute-force results from the NumPy flat
+store. Requires hnswlib.
+
+    python -m benchmarks.ann_search --size 1000000 --ef 16,32,64,128,256
+    python -m benchmarks.ann_search --size 200000 -M 32 --ef-construction 400
+"""
+
+import argparse
+import time
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from base.hnsw_vectorstore import HnswVectorStore
+from base.numpy_vectorstore import NumpyVectorStore
+from benchmarks.vectorstore_search import exact_neighbours, make_corpus, make_queries, recall_at_k
+
+
+def _load(store: NumpyVectorStore, corpus: np.ndarray) -> float:
+    start = time.perf_counter()
+    for offset in range(0, len(corpus), 50_000):
+        batch = corpus[offset: offset + 50_000]
+        store.add_embeddings(
+            [f"chunk {offset + i}" for i in range(len(batch))], batch, ids=[str(offset + i) for i in range(len(batch))]
+        )
+    return time.perf_counter() - start
+
+
+def _query_all(store: NumpyVectorStore, queries: np.ndarray, k: int) -> tuple[float, list]:
+    start = time.perf_counter()
+    found = [[int(doc.id) for doc in store.similarity_search_by_vector(query.tolist(), k=k)] for query in queries]
+    return len(queries) / (time.perf_counter() - start), found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("-M", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--ef", default="16,32,64,128,256", help="ef_search values to sweep")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.size, args.dim, args.clusters)
+    queries = make_queries(corpus, args.queries)
+    truth = exact_neighbours(corpus, queries, args.k)
+    embedder = DeterministicFakeEmbedding(size=args.dim)
+
+    exact = NumpyVectorStore(embedder, "exact")
+    _load(exact, corpus)
+    qps, found = _query_all(exact, queries, args.k)
+    print(f"exact          n={args.size:,}  qps={qps:9.1f}  recall@{args.k}={recall_at_k(found, truth, args.k):.3f}")
+
+    ann = HnswVectorStore(embedder, "ann", M=args.M, ef_construction=args.ef_construction)
+    build_s = _load(ann, corpus)
+    print(f"hnsw build     M={args.M} ef_construction={args.ef_construction}  {build_s:.1f} s")
+    for ef in (int(value) for value in args.ef.split(",")):
+        ann.set_ef_search(ef)
+        qps, found = _query_all(ann, queries, args.k)
+        print(f"hnsw ef={ef:<5}  n={args.size:,}  qps={qps:9.1f}  recall@{args.k}={recall_at_k(found, truth, args.k):.3f}")
+
+
+if __name__ == "__main__":
+    main()
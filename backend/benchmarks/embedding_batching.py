@@ -0,0 +1,98 @@
+"""Throughput benchmark: concurrent embedding calls with and without micro-batching.
+
+Each of ``--threads`` workers embeds ``--calls`` short texts one at a time, the
+way concurrent tutor and drafting requests do. By default a fake model with a
+fixed per-call cost plus a small per-text cost stands in for a CPU
+sentence-transformers model; pass ``--model`` to measure a real one.
+
+    python -m benchmarks.embedding_batching --threads 16 --calls 50
+    python -m benchmarks.embedding_batching --model sentence-transformers/all-MiniLM-L6-v2
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from base.embedder_factory import EmbedderFactory
+from base.embedding_batcher import BatchingEmbeddings
+
+
+class SlowFakeEmbeddings(Embeddings):
+    """Stand-in for a local model: one forward pass costs ``call_ms`` plus ``text_ms`` per text."""
+
+    def __init__(self, call_ms: float, text_ms: float, dim: int = 384) -> None:
+        self.call_ms = call_ms
+        self.text_ms = text_ms
+        self.dim = dim
+        # A local model runs one forward pass at a time.
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            time.sleep((self.call_ms + self.text_ms * len(texts)) / 1000)
+        return [[float(len(text))] * self.dim for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def _run(embedder: Embeddings, threads: int, calls: int) -> tuple[float, List[float]]:
+    def worker(worker_id: int) -> List[float]:
+        latencies = []
+        for i in range(calls):
+            start = time.perf_counter()
+            embedder.embed_query(f"learner {worker_id} asks about topic {i}")
+            latencies.append((time.perf_counter() - start) * 1000)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = [latency for result in pool.map(worker, range(threads)) for latency in result]
+    return time.perf_counter() - start, latencies
+
+
+def _summary(label: str, elapsed: float, latencies: List[float]) -> str:
+    ordered = sorted(latencies)
+    p95 = ordered[int(0.95 * (len(ordered) - 1))]
+    return (
+        f"{label:<10} {len(latencies) / elapsed:9.1f} texts/s  "
+        f"p50={statistics.median(latencies):8.2f} ms  p95={p95:8.2f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--calls", type=int, default=50, help="embed calls per thread")
+    parser.add_argument("--model", default=None, help="real model, e.g. sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--call-ms", type=float, default=8.0, help="fake model cost per forward pass")
+    parser.add_argument("--text-ms", type=float, default=0.3, help="fake model cost per text")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    if args.model:
+        model = EmbedderFactory.create(model=args.model)
+        model.embed_query("warm up")
+    else:
+        model = SlowFakeEmbeddings(args.call_ms, args.text_ms)
+
+    elapsed, latencies = _run(model, args.threads, args.calls)
+    print(_summary("per-call", elapsed, latencies))
+
+    batcher = BatchingEmbeddings(model, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    try:
+        batched_elapsed, batched_latencies = _run(batcher, args.threads, args.calls)
+    finally:
+        batcher.close()
+    print(_summary("batched", batched_elapsed, batched_latencies))
+    print(f"speedup: {elapsed / batched_elapsed:.2f}x  batcher stats: {batcher.stats()}")
+
+
+if __name__ == "__main__":
+    main()
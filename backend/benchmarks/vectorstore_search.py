@@ -0,0 +1,134 @@
+"""Benchmark: top-k latency and recall of the NumPy flat store against Chroma.
+
+Synthetic clustered unit vectors (like sentence embeddings of web chunks) are
+loaded into each store with precomputed embeddings, so only indexing and
+search are timed. Recall@k is measured against exact brute-force results.
+Chroma is skipped when ``langchain_chroma`` is not installed.
+
+    python -m benchmarks.vectorstore_search --sizes 10000,100000,1000000
+    python -m benchmarks.vectorstore_search --sizes 10000 --persist
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from typing import Callable, List, Sequence
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from base.numpy_vectorstore import NumpyVectorStore, top_k
+
+
+def make_corpus(size: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = np.empty((size, dim), dtype=np.float32)
+    for start in range(0, size, 100_000):
+        stop = min(start + 100_000, size)
+        vectors[start:stop] = centers[rng.integers(0, clusters, stop - start)]
+        vectors[start:stop] += 0.6 * rng.standard_normal((stop - start, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def make_queries(corpus: np.ndarray, count: int, noise: float = 0.3, seed: int = 1) -> np.ndarray:
+    """Perturbed corpus rows, like a question close to a stored chunk; ``noise`` is the perturbation norm."""
+    rng = np.random.default_rng(seed)
+    dim = corpus.shape[1]
+    queries = corpus[rng.integers(0, len(corpus), count)] + (noise / np.sqrt(dim)) * rng.standard_normal((count, dim)).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def exact_neighbours(corpus: np.ndarray, queries: np.ndarray, k: int) -> List[set]:
+    return [set(int(row) for row in top_k(corpus @ query, k)) for query in queries]
+
+
+def recall_at_k(found: Sequence[Sequence[int]], truth: Sequence[set], k: int) -> float:
+    return statistics.mean(len(set(rows) & expected) / k for rows, expected in zip(found, truth))
+
+
+def _time_queries(search: Callable[[np.ndarray], List[int]], queries: np.ndarray) -> tuple[List[float], List[List[int]]]:
+    timings, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query))
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, results
+
+
+def _report(label: str, size: int, load_s: float, timings: List[float], recall: float) -> None:
+    ordered = sorted(timings)
+    p95 = ordered[int(0.95 * (len(ordered) - 1))]
+    print(
+        f"{label:<8} n={size:>9,}  load={load_s:7.1f} s  "
+        f"p50={statistics.median(timings):8.2f} ms  p95={p95:8.2f} ms  recall@k={recall:.3f}"
+    )
+
+
+def bench_numpy(corpus: np.ndarray, queries: np.ndarray, truth: List[set], k: int, persist: bool) -> None:
+    directory = tempfile.mkdtemp(prefix="numpy-vs-") if persist else None
+    store = NumpyVectorStore(DeterministicFakeEmbedding(size=corpus.shape[1]), "bench", directory)
+    start = time.perf_counter()
+    for offset in range(0, len(corpus), 50_000):
+        batch = corpus[offset: offset + 50_000]
+        store.add_embeddings(
+            [f"chunk {offset + i}" for i in range(len(batch))], batch, ids=[str(offset + i) for i in range(len(batch))]
+        )
+    load_s = time.perf_counter() - start
+    search = lambda query: [int(doc.id) for doc in store.similarity_search_by_vector(query.tolist(), k=k)]
+    search(queries[0])
+    timings, found = _time_queries(search, queries)
+    _report("numpy", len(corpus), load_s, timings, recall_at_k(found, truth, k))
+
+
+def bench_chroma(corpus: np.ndarray, queries: np.ndarray, truth: List[set], k: int) -> None:
+    try:
+        from langchain_chroma import Chroma
+    except ImportError:
+        print("chroma   skipped (langchain_chroma is not installed)")
+        return
+    store = Chroma(
+        collection_name="bench",
+        embedding_function=DeterministicFakeEmbedding(size=corpus.shape[1]),
+        persist_directory=tempfile.mkdtemp(prefix="chroma-vs-"),
+        collection_metadata={"hnsw:space": "cosine"},
+    )
+    start = time.perf_counter()
+    for offset in range(0, len(corpus), 5_000):
+        batch = corpus[offset: offset + 5_000]
+        store._collection.add(
+            ids=[str(offset + i) for i in range(len(batch))],
+            embeddings=batch.tolist(),
+            documents=[f"chunk {offset + i}" for i in range(len(batch))],
+        )
+    load_s = time.perf_counter() - start
+    search = lambda query: [int(doc.id) for doc in store.similarity_search_by_vector(query.tolist(), k=k)]
+    search(queries[0])
+    timings, found = _time_queries(search, queries)
+    _report("chroma", len(corpus), load_s, timings, recall_at_k(found, truth, k))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--persist", action="store_true", help="memory-map the NumPy store from a temp directory")
+    parser.add_argument("--skip-chroma", action="store_true")
+    args = parser.parse_args()
+
+    for size in (int(value) for value in args.sizes.split(",")):
+        corpus = make_corpus(size, args.dim, args.clusters)
+        queries = make_queries(corpus, args.queries)
+        truth = exact_neighbours(corpus, queries, args.k)
+        bench_numpy(corpus, queries, truth, args.k, args.persist)
+        if not args.skip_chroma:
+            bench_chroma(corpus, queries, truth, args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Dict, Optional
+
+
+@dataclass
+class LLMPoolConfig:
+    """Process-wide pool of chat model clients reused across requests."""
+    max_size: int = 32
+    idle_ttl: float = 900.0  # seconds a client may sit unused before eviction
 
 
 @dataclass
@@ -10,24 +17,105 @@ class LLMConfig:
     provider: str = "deepseek"  # e.g., openai, azure-openai, ollama, anthropic, groq
     model_name: str = "deepseek-chat"
     base_url: Optional[str] = None
+    pool: LLMPoolConfig = field(default_factory=LLMPoolConfig)
+
+
+@dataclass
+class EmbeddingServerConfig:
+    """Shared embedding server (``python -m base.embedding_server``) used with ``provider: remote``."""
+    url: str = "http://127.0.0.1:5100"
+    provider: str = "huggingface"
+    timeout: float = 30.0
+    threads: int = 32
+
+
+@dataclass
+class EmbeddingBatchingConfig:
+    enabled: bool = True
+    max_batch_size: int = 64
+    max_wait_ms: float = 5.0
+    queries_as_documents: bool = True
+    timeout: Optional[float] = 120.0
+
+
+@dataclass
+class EmbeddingCacheConfig:
+    enabled: bool = True
+    directory: Optional[str] = "data/cache/embeddings"
+    max_memory_entries: int = 10_000
+    max_disk_entries: int = 1_000_000
 
 
 @dataclass
 class EmbeddingConfig:
     provider: str = "huggingface"
     model_name: str = "sentence-transformers/all-mpnet-base-v2"
+    server: EmbeddingServerConfig = field(default_factory=EmbeddingServerConfig)
+    batching: EmbeddingBatchingConfig = field(default_factory=EmbeddingBatchingConfig)
+    cache: EmbeddingCacheConfig = field(default_factory=EmbeddingCacheConfig)
+
+
+@dataclass
+class WebFetchConfig:
+    max_connections: int = 32
+    max_keepalive_connections: int = 16
+    per_host_limit: int = 2
+    timeout: float = 10.0
+    deadline: float = 15.0
+    max_bytes: int = 2_000_000
+
+
+@dataclass
+class SearchCacheConfig:
+    enabled: bool = True
+    ttl: float = 86400.0
+    max_memory_entries: int = 512
+    persist_path: Optional[str] = "data/cache/search.sqlite"
+    max_disk_entries: int = 20_000
+
+
+@dataclass
+class PageCacheConfig:
+    enabled: bool = True
+    persist_path: str = "data/cache/pages.sqlite"
+    ttl: float = 86400.0
+    max_entries: int = 5000
 
 
 @dataclass
 class SearchConfig:
     provider: str = "duckduckgo"  # tavily, serper, bing, duckduckgo, brave, searx, you
     max_results: int = 5
+    loader_type: str = "web"
+    fetch: WebFetchConfig = field(default_factory=WebFetchConfig)
+    cache: SearchCacheConfig = field(default_factory=SearchCacheConfig)
+    page_cache: PageCacheConfig = field(default_factory=PageCacheConfig)
+
+
+@dataclass
+class HnswConfig:
+    M: int = 16
+    ef_construction: int = 200
+    ef_search: int = 64
+    snapshot_every: int = 10_000
 
 
 @dataclass
 class VectorstoreConfig:
+    type: str = "chroma"  # chroma | numpy | hnsw
     persist_directory: str = "data/vectorstore"
     collection_name: str = "genmentor"
+    hnsw: HnswConfig = field(default_factory=HnswConfig)
+
+
+@dataclass
+class LexicalConfig:
+    """BM25 index kept next to the vectorstore for keyword and hybrid retrieval."""
+    enabled: bool = False
+    persist_path: Optional[str] = None
+    rrf_k: int = 60
+    candidates: int = 20
+
 
 @dataclass
 class RAGConfig:
@@ -35,6 +123,71 @@ class RAGConfig:
     num_retrieval_results: int = 5
     allow_parallel: bool = True
     max_workers: int = 3
+    warmup: bool = True
+    retrieval_mode: str = "global"  # global | ephemeral | blended
+    retrieval_method: str = "vector"  # vector | lexical | hybrid | auto
+    lexical: LexicalConfig = field(default_factory=LexicalConfig)
+
+
+@dataclass
+class ContextPackingConfig:
+    """Token-budgeted MMR selection of retrieved chunks for prompts."""
+    enabled: bool = True
+    encoding: str = "cl100k_base"
+    default_budget: int = 1500
+    budget_per_agent: Dict[str, int] = field(default_factory=dict)
+    lambda_mult: float = 0.7
+    duplicate_threshold: float = 0.8
+    min_chunk_tokens: int = 64
+
+
+@dataclass
+class ResponseCacheConfig:
+    """Opt-in exact-match cache of agent responses (memory LRU + SQLite)."""
+    enabled: bool = False
+    max_memory_entries: int = 1024
+    default_ttl: float = 86400.0  # seconds
+    persist_path: Optional[str] = "data/cache/llm_responses.sqlite"
+    max_disk_entries: int = 100000
+    only_deterministic: bool = True  # cache temperature-0 calls only
+    ttl_per_agent: Dict[str, float] = field(default_factory=dict)  # agent name -> seconds, 0 disables
+
+
+@dataclass
+class SemanticCacheConfig:
+    """Embedding-similarity cache for learning goal -> skill requirement mapping."""
+    enabled: bool = False
+    similarity_threshold: float = 0.92  # cosine similarity required for a hit
+    max_entries: int = 5000
+    persist_directory: Optional[str] = "data/cache/semantic"
+
+
+@dataclass
+class ContentConfig:
+    """Defaults for learning-content generation; requests may override them."""
+    speculative_drafting: bool = False
+
+
+@dataclass
+class JobsConfig:
+    """SQLite-backed background job queue for long-running generation endpoints."""
+    enabled: bool = True
+    persist_path: str = "data/jobs.sqlite"
+    workers: int = 2  # concurrent jobs per server process
+    result_ttl: float = 86400.0  # seconds finished jobs are kept
+    poll_interval: float = 1.0
+    heartbeat_interval: float = 5.0
+    stale_after: float = 120.0  # seconds without a heartbeat before a running job is queued again
+    max_attempts: int = 2
+
+
+@dataclass
+class ExecutorConfig:
+    """Worker counts of the bounded pools used for blocking work in async endpoints."""
+    io: int = 16
+    embedding: int = 4
+    pdf: int = 2
+    ingest: int = 1
 
 
 @dataclass
@@ -47,3 +200,9 @@ class AppConfig:
     search: SearchConfig = field(default_factory=SearchConfig)
     vectorstore: VectorstoreConfig = field(default_factory=VectorstoreConfig)
     rag: RAGConfig = field(default_factory=RAGConfig)
+    executors: ExecutorConfig = field(default_factory=ExecutorConfig)
+    context_packing: ContextPackingConfig = field(default_factory=ContextPackingConfig)
+    content: ContentConfig = field(default_factory=ContentConfig)
+    response_cache: ResponseCacheConfig = field(default_factory=ResponseCacheConfig)
+    semantic_cache: SemanticCacheConfig = field(default_factory=SemanticCacheConfig)
+    jobs: JobsConfig = field(default_factory=JobsConfig)
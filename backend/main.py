@@ -1,27 +1,73 @@
 import ast
 import json
+import logging
 import time
+from contextlib import asynccontextmanager
 import uvicorn
 import hydra
 from omegaconf import DictConfig, OmegaConf
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import FastAPI, HTTPException, File, UploadFile, Form
-from base.llm_factory import LLMFactory
+from fastapi import FastAPI, HTTPException, File, UploadFile, Form, Request
+from base.llm_factory import LLMFactory, llm_pool
+from base.agent_registry import agent_registry
+from base.response_cache import bypass_response_cache, configure_response_cache, get_response_cache
+from base.semantic_cache import configure_semantic_cache, semantic_cache_stats
 from base.searcher_factory import SearchRunner
-from base.search_rag import SearchRagManager
+from base.search_rag import get_search_rag_manager, search_rag_stats, warmup_search_rag_manager
+from base.web_fetcher import configure_web_fetcher, get_web_fetcher
+from base.search_cache import search_cache_stats
+from base.page_cache import configure_page_cache, page_cache_stats
+from base.embedding_cache import embedding_cache_stats
+from base.embedding_batcher import embedding_batcher_stats
+from base.context_packer import configure_context_packer, get_context_packer
+from base.job_queue import configure_job_queue, get_job_worker, job_queue_stats
 from utils.preprocess import extract_text_from_pdf
-from fastapi.responses import JSONResponse
+from utils.concurrency import configure_executors, run_blocking
+from utils.stage_graph import stage_graph_stats
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
 from modules.skill_gap_identification import *
 from modules.adaptive_learner_modeling import *
 from modules.personalized_resource_delivery import *
-from modules.ai_chatbot_tutor import chat_with_tutor_with_llm
+from modules.ai_chatbot_tutor import achat_with_tutor_with_llm, astream_chat_with_tutor_with_llm
 from api_schemas import *
 from config import load_config
 
 app_config = load_config(config_name="main")
-search_rag_manager = SearchRagManager.from_config(app_config)
+llm_pool.configure(**app_config.llm.get("pool", {}))
+configure_executors(**app_config.get("executors", {}))
+configure_response_cache(app_config)
+configure_semantic_cache(app_config)
+configure_web_fetcher(app_config)
+configure_page_cache(app_config)
+configure_context_packer(app_config)
 
-app = FastAPI()
+_rag_manager = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _rag_manager
+    if app_config.rag.get("warmup", True):
+        try:
+            _rag_manager = await run_blocking("embedding", warmup_search_rag_manager, app_config)
+        except Exception as e:
+            # Search stays available; the manager is built again on first use.
+            logging.getLogger(__name__).warning(f"Search RAG warmup failed: {e}")
+    job_worker = get_job_worker()
+    if job_worker is not None:
+        job_worker.start()
+    yield
+    if job_worker is not None:
+        await job_worker.stop()
+
+async def get_rag_manager():
+    """Shared search RAG manager for this app's configuration; only the first-time build runs off the event loop."""
+    global _rag_manager
+    if _rag_manager is None:
+        _rag_manager = await run_blocking("embedding", get_search_rag_manager, app_config)
+    return _rag_manager
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -30,6 +76,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+CACHE_BYPASS_HEADER = "x-genmentor-cache"
+
+@app.middleware("http")
+async def response_cache_bypass(request: Request, call_next):
+    """Skip LLM response cache lookups for requests sent with
+    `X-GenMentor-Cache: bypass` or `Cache-Control: no-cache`."""
+    bypass = request.headers.get(CACHE_BYPASS_HEADER, "").lower() in ("bypass", "no-cache", "refresh")
+    bypass = bypass or "no-cache" in request.headers.get("cache-control", "").lower()
+    with bypass_response_cache(bypass):
+        return await call_next(request)
+
 def get_llm(model_provider: str | None = None, model_name: str | None = None, **kwargs):
     model_provider = model_provider or "deepseek"
     model_name = model_name or "deepseek-chat"
@@ -37,6 +94,10 @@ def get_llm(model_provider: str | None = None, model_name: str | None = None, **
 
 UPLOAD_LOCATION = "/mnt/datadrive/tfwang/code/llm-mentor/data/cv/"
 
+def _write_file(path: str, content: bytes) -> None:
+    with open(path, "wb") as file_object:
+        file_object.write(content)
+
 @app.get("/list-llm-models")
 async def list_llm_models():
     try:
@@ -49,6 +110,24 @@ async def list_llm_models():
     except Exception as e:
         return JSONResponse(status_code=500, content={"detail": str(e)})
 
+@app.get("/runtime-stats")
+async def runtime_stats():
+    return {
+        "llm_pool": LLMFactory.pool_stats(),
+        "agent_registry": agent_registry.stats(),
+        "response_cache": get_response_cache().stats(),
+        "semantic_cache": semantic_cache_stats(),
+        "web_fetcher": get_web_fetcher().stats(),
+        "search_cache": search_cache_stats(),
+        "page_cache": page_cache_stats(),
+        "search_rag": search_rag_stats(),
+        "embedding_cache": embedding_cache_stats(),
+        "embedding_batcher": embedding_batcher_stats(),
+        "context_packer": get_context_packer().stats(),
+        "stage_graphs": stage_graph_stats(),
+        "jobs": job_queue_stats(),
+    }
+
 @app.post("/chat-with-tutor")
 async def chat_with_autor(request: ChatWithAutorRequest):
     llm = get_llm(request.model_provider, request.model_name)
@@ -58,22 +137,65 @@ async def chat_with_autor(request: ChatWithAutorRequest):
             converted_messages = ast.literal_eval(request.messages)
         else:
             return JSONResponse(status_code=400, content={"detail": "messages must be a JSON array string"})
-        response = chat_with_tutor_with_llm(
+        response = await achat_with_tutor_with_llm(
             llm,
             converted_messages,
             learner_profile,
-            search_rag_manager=search_rag_manager,
+            search_rag_manager=await get_rag_manager(),
             use_search=True,
+            retrieval_method=request.retrieval_method,
         )
         return {"response": response}
     except Exception as e:
         return JSONResponse(status_code=500, content={"detail": str(e)})
 
+def _sse_event(data: dict, event: str | None = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/chat-with-tutor-stream")
+async def chat_with_autor_stream(request: ChatWithAutorRequest):
+    """Server-sent events variant of `/chat-with-tutor`.
+
+    Emits `data: {"token": ...}` events as the reply is generated, then a final
+    `done` event carrying the full reply, or an `error` event on failure.
+    """
+    llm = get_llm(request.model_provider, request.model_name)
+    if not (isinstance(request.messages, str) and request.messages.strip().startswith("[")):
+        return JSONResponse(status_code=400, content={"detail": "messages must be a JSON array string"})
+    try:
+        converted_messages = ast.literal_eval(request.messages)
+    except (ValueError, SyntaxError) as e:
+        return JSONResponse(status_code=400, content={"detail": str(e)})
+
+    async def event_stream():
+        chunks = []
+        try:
+            async for text in astream_chat_with_tutor_with_llm(
+                llm,
+                converted_messages,
+                request.learner_profile,
+                search_rag_manager=await get_rag_manager(),
+                use_search=True,
+                retrieval_method=request.retrieval_method,
+            ):
+                chunks.append(text)
+                yield _sse_event({"token": text})
+            yield _sse_event({"response": "".join(chunks)}, event="done")
+        except Exception as e:
+            yield _sse_event({"detail": str(e)}, event="error")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.post("/refine-learning-goal")
 async def refine_learning_goal(request: LearningGoalRefinementRequest):
     llm = get_llm(request.model_provider, request.model_name)
     try:
-        refined_learning_goal = refine_learning_goal_with_llm(llm, request.learning_goal, request.learner_information)
+        refined_learning_goal = await arefine_learning_goal_with_llm(llm, request.learning_goal, request.learner_information)
         return refined_learning_goal
     except Exception as e:
         return JSONResponse(status_code=500, content={"detail": str(e)})
@@ -89,7 +211,7 @@ async def identify_skill_gap_with_info(request: SkillGapIdentificationRequest):
             skill_requirements = ast.literal_eval(skill_requirements)
         if not isinstance(skill_requirements, dict):
             skill_requirements = None
-        skill_gaps, skill_requirements = identify_skill_gap_with_llm(
+        skill_gaps, skill_requirements = await aidentify_skill_gap_with_llm(
             llm, learning_goal, learner_information, skill_requirements
         )
         results = {**skill_gaps, **skill_requirements}
@@ -107,14 +229,13 @@ async def identify_skill_gap(goal: str = Form(...), cv: UploadFile = File(...),
         file_location = f"{UPLOAD_LOCATION}{cv.filename}"
 #         with open(file_location, "wb") as file_object:
 #             file_object.write(await cv.read())
-        with open(file_location, "wb") as file_object:
-            file_object.write(await cv.read())
-        # print(file_location)
-        cv_text = extract_text_from_pdf(file_location)  
-        skill_requirements = mapper.map_goal_to_skill({
+        cv_content = await cv.read()
+        await run_blocking("pdf", _write_file, file_location, cv_content)
+        cv_text = await run_blocking("pdf", extract_text_from_pdf, file_location)
+        skill_requirements = await mapper.amap_goal_to_skill({
             "learning_goal": goal
         })
-        skill_gaps = skill_gap_identifier.identify_skill_gap({
+        skill_gaps = await skill_gap_identifier.aidentify_skill_gap({
             "learning_goal": goal,
             "skill_requirements": skill_requirements,
             "learner_information": cv_text
@@ -141,7 +262,7 @@ async def create_learner_profile_with_info(request: LearnerProfileInitialization
                 skill_gaps = ast.literal_eval(skill_gaps)
             except Exception:
                 skill_gaps = {"raw": skill_gaps}
-        learner_profile = initialize_learner_profile_with_llm(
+        learner_profile = await ainitialize_learner_profile_with_llm(
             llm, learning_goal, learner_information, skill_gaps
         )
         return {"learner_profile": learner_profile}
@@ -152,7 +273,7 @@ async def create_learner_profile_with_info(request: LearnerProfileInitialization
 async def create_learner_profile(request: LearnerProfileInitializationRequest):
     llm = get_llm(request.model_provider, request.model_name)
     file_location = f"{UPLOAD_LOCATION}{request.cv_path}"
-    learner_information = extract_text_from_pdf(file_location)
+    learner_information = await run_blocking("pdf", extract_text_from_pdf, file_location)
     learning_goal = request.learning_goal
     skill_gaps = request.skill_gaps
     try:
@@ -161,7 +282,7 @@ async def create_learner_profile(request: LearnerProfileInitializationRequest):
                 skill_gaps = ast.literal_eval(skill_gaps)
             except Exception:
                 skill_gaps = {"raw": skill_gaps}
-        learner_profile = initialize_learner_profile_with_llm(
+        learner_profile = await ainitialize_learner_profile_with_llm(
             llm, learning_goal, {"raw": learner_information}, skill_gaps
         )
         return {"learner_profile": learner_profile}
@@ -184,7 +305,7 @@ async def update_learner_profile(request: LearnerProfileUpdateRequest):
                 except Exception:
                     if name != "session_information":
                         locals()[name] = {"raw": val}
-        learner_profile = update_learner_profile_with_llm(
+        learner_profile = await aupdate_learner_profile_with_llm(
             llm,
             locals()["learner_profile"],
             locals()["learner_interactions"],
@@ -195,17 +316,20 @@ async def update_learner_profile(request: LearnerProfileUpdateRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/schedule-learning-path")
-async def schedule_learning_path(request: LearningPathSchedulingRequest):
+async def run_schedule_learning_path(request: LearningPathSchedulingRequest):
     llm = get_llm(request.model_provider, request.model_name)
     learner_profile = request.learner_profile
     session_count = request.session_count
+    if isinstance(learner_profile, str) and learner_profile.strip():
+        learner_profile = ast.literal_eval(learner_profile)
+    if not isinstance(learner_profile, dict):
+        learner_profile = {}
+    return await aschedule_learning_path_with_llm(llm, learner_profile, session_count)
+
+@app.post("/schedule-learning-path")
+async def schedule_learning_path(request: LearningPathSchedulingRequest):
     try:
-        if isinstance(learner_profile, str) and learner_profile.strip():
-            learner_profile = ast.literal_eval(learner_profile)
-        if not isinstance(learner_profile, dict):
-            learner_profile = {}
-        learning_path = schedule_learning_path_with_llm(llm, learner_profile, session_count)
+        learning_path = await run_schedule_learning_path(request)
         return learning_path
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -229,7 +353,7 @@ async def reschedule_learning_path(request: LearningPathReschedulingRequest):
                 other_feedback = ast.literal_eval(other_feedback)
             except Exception:
                 pass
-        learning_path = reschedule_learning_path_with_llm(
+        learning_path = await areschedule_learning_path_with_llm(
             llm, learning_path, learner_profile, session_count, other_feedback
         )
         return learning_path
@@ -249,7 +373,7 @@ async def explore_knowledge_points(request: KnowledgePointExplorationRequest):
     if isinstance(learning_session, str) and learning_session.strip():
         learning_session = ast.literal_eval(learning_session)
     try:
-        knowledge_points = explore_knowledge_points_with_llm(llm, learner_profile, learning_path, learning_session)
+        knowledge_points = await aexplore_knowledge_points_with_llm(llm, learner_profile, learning_path, learning_session)
         return knowledge_points
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -264,13 +388,15 @@ async def draft_knowledge_point(request: KnowledgePointDraftingRequest):
     knowledge_point = request.knowledge_point
     use_search = request.use_search
     try:
-        knowledge_draft = draft_knowledge_point_with_llm(llm, learner_profile, learning_path, learning_session, knowledge_points, knowledge_point, use_search)
+        knowledge_draft = await adraft_knowledge_point_with_llm(
+            llm, learner_profile, learning_path, learning_session, knowledge_points, knowledge_point, use_search,
+            search_rag_manager=await get_rag_manager() if use_search else None,
+        )
         return {"knowledge_draft": knowledge_draft}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/draft-knowledge-points")
-async def draft_knowledge_points(request: KnowledgePointsDraftingRequest):
+async def run_draft_knowledge_points(request: KnowledgePointsDraftingRequest):
     llm = get_llm()
     learner_profile = request.learner_profile
     learning_path = request.learning_path
@@ -278,12 +404,54 @@ async def draft_knowledge_points(request: KnowledgePointsDraftingRequest):
     knowledge_points = request.knowledge_points
     use_search = request.use_search
     allow_parallel = request.allow_parallel
+    knowledge_drafts = await adraft_knowledge_points_with_llm(
+        llm, learner_profile, learning_path, learning_session, knowledge_points, allow_parallel, use_search,
+        search_rag_manager=await get_rag_manager() if use_search else None,
+    )
+    return {"knowledge_drafts": knowledge_drafts}
+
+@app.post("/draft-knowledge-points")
+async def draft_knowledge_points(request: KnowledgePointsDraftingRequest):
     try:
-        knowledge_drafts = draft_knowledge_points_with_llm(llm, learner_profile, learning_path, learning_session, knowledge_points, allow_parallel, use_search)
-        return {"knowledge_drafts": knowledge_drafts}
+        return await run_draft_knowledge_points(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/draft-knowledge-points-stream")
+async def draft_knowledge_points_stream(request: KnowledgePointsDraftingRequest):
+    """NDJSON variant of `/draft-knowledge-points`.
+
+    Writes one `{"index": i, "knowledge_draft": {...}}` line per draft as soon as
+    it completes (in completion order), then `{"done": true, "count": n}`, or an
+    `{"error": ...}` line if drafting fails.
+    """
+    llm = get_llm()
+
+    async def line_stream():
+        count = 0
+        try:
+            async for index, knowledge_draft in aiter_knowledge_drafts_with_llm(
+                llm,
+                request.learner_profile,
+                request.learning_path,
+                request.learning_session,
+                request.knowledge_points,
+                request.allow_parallel,
+                request.use_search,
+                search_rag_manager=await get_rag_manager() if request.use_search else None,
+            ):
+                count += 1
+                yield json.dumps({"index": index, "knowledge_draft": knowledge_draft}, ensure_ascii=False) + "\n"
+            yield json.dumps({"done": True, "count": count}) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": str(e)}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(
+        line_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.post("/integrate-learning-document")
 async def integrate_learning_document(request: LearningDocumentIntegrationRequest):
     llm = get_llm()
@@ -294,7 +462,7 @@ async def integrate_learning_document(request: LearningDocumentIntegrationReques
     knowledge_drafts = request.knowledge_drafts
     output_markdown = request.output_markdown
     try:
-        learning_document = integrate_learning_document_with_llm(llm, learner_profile, learning_path, learning_session, knowledge_points, knowledge_drafts, output_markdown)
+        learning_document = await aintegrate_learning_document_with_llm(llm, learner_profile, learning_path, learning_session, knowledge_points, knowledge_drafts, output_markdown)
         return {"learning_document": learning_document}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -309,13 +477,12 @@ async def generate_document_quizzes(request: KnowledgeQuizGenerationRequest):
     true_false_count = request.true_false_count
     short_answer_count = request.short_answer_count
     try:
-        document_quiz = generate_document_quizzes_with_llm(llm, learner_profile, learning_document, single_choice_count, multiple_choice_count, true_false_count, short_answer_count)
+        document_quiz = await agenerate_document_quizzes_with_llm(llm, learner_profile, learning_document, single_choice_count, multiple_choice_count, true_false_count, short_answer_count)
         return {"document_quiz": document_quiz}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/tailor-knowledge-content")
-async def tailor_knowledge_content(request: TailoredContentGenerationRequest):
+async def run_tailor_knowledge_content(request: TailoredContentGenerationRequest):
     llm = get_llm()
     learning_path = request.learning_path
     learner_profile = request.learner_profile
@@ -323,13 +490,70 @@ async def tailor_knowledge_content(request: TailoredContentGenerationRequest):
     use_search = request.use_search
     allow_parallel = request.allow_parallel
     with_quiz = request.with_quiz
+    speculative_drafting = request.speculative_drafting
+    if speculative_drafting is None:
+        speculative_drafting = app_config.get("content", {}).get("speculative_drafting", False)
+    tailored_content = await acreate_learning_content_with_llm(
+        llm, learner_profile, learning_path, learning_session, allow_parallel=allow_parallel, with_quiz=with_quiz, use_search=use_search,
+        search_rag_manager=await get_rag_manager() if use_search else None, speculative_drafting=speculative_drafting,
+    )
+    return {"tailored_content": tailored_content}
+
+@app.post("/tailor-knowledge-content")
+async def tailor_knowledge_content(request: TailoredContentGenerationRequest):
     try:
-        tailored_content = create_learning_content_with_llm(
-            llm, learner_profile, learning_path, learning_session, allow_parallel=allow_parallel, with_quiz=with_quiz, use_search=use_search
-        )
-        return {"tailored_content": tailored_content}
+        return await run_tailor_knowledge_content(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+# Long-running endpoints that can also run as background jobs: kind -> (request schema, runner).
+JOB_KINDS = {
+    "schedule-learning-path": (LearningPathSchedulingRequest, run_schedule_learning_path),
+    "draft-knowledge-points": (KnowledgePointsDraftingRequest, run_draft_knowledge_points),
+    "tailor-knowledge-content": (TailoredContentGenerationRequest, run_tailor_knowledge_content),
+}
+
+def _job_handler(schema, runner):
+    async def handler(payload: dict):
+        return await runner(schema.model_validate(payload))
+    return handler
+
+configure_job_queue(app_config, {kind: _job_handler(schema, runner) for kind, (schema, runner) in JOB_KINDS.items()})
+
+def _require_job_worker():
+    job_worker = get_job_worker()
+    if job_worker is None:
+        raise HTTPException(status_code=503, detail="Background jobs are disabled.")
+    return job_worker
+
+@app.post("/jobs/{kind}", status_code=202)
+async def submit_job(kind: str, payload: dict):
+    """Queue a long-running endpoint call; the body is that endpoint's request."""
+    job_worker = _require_job_worker()
+    if kind not in JOB_KINDS:
+        raise HTTPException(status_code=404, detail=f"Unknown job kind '{kind}'. Available: {', '.join(JOB_KINDS)}.")
+    schema, _ = JOB_KINDS[kind]
+    try:
+        request = schema.model_validate(payload)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
+    job = await run_blocking("io", job_worker.store.submit, kind, request.model_dump())
+    job_worker.notify()
+    return job
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await run_blocking("io", _require_job_worker().store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found or expired.")
+    return job
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    job = await run_blocking("io", _require_job_worker().cancel, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found or expired.")
+    return job
     
 if __name__ == "__main__":
     server_cfg = app_config.get("server", {})
@@ -1 +1,2 @@
-from .agents.adaptive_learning_profiler import AdaptiveLearnerProfiler, initialize_learner_profile_with_llm, update_learner_profile_with_llm
\ No newline at end of file
+from .agents.adaptive_learning_profiler import AdaptiveLearnerProfiler, initialize_learner_profile_with_llm, update_learner_profile_with_llm
+from .agents.adaptive_learning_profiler import ainitialize_learner_profile_with_llm, aupdate_learner_profile_with_llm, update_learner_profiles_with_llm, aupdate_learner_profiles_with_llm
\ No newline at end of file
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import ast
 import logging
-from typing import Any, Dict, List, Mapping, Optional, Union, Protocol, runtime_checkable
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union, Protocol, runtime_checkable
 
 from base import BaseAgent
 from ..schemas import LearnerProfile
@@ -35,6 +35,14 @@ class LearnerProfileUpdatePayload(BaseModel):
     session_information: Optional[Union[str, Dict[str, Any], Mapping[str, Any]]] = None
 
 
+def _update_payload(input_dict: Mapping[str, Any]) -> Dict[str, Any]:
+    return LearnerProfileUpdatePayload(**input_dict).model_dump()
+
+
+def _validated_profile(raw_output: Any) -> Dict[str, Any]:
+    return LearnerProfile.model_validate(raw_output).model_dump()
+
+
 class AdaptiveLearnerProfiler(BaseAgent):
     """Agent wrapper that coordinates the prompts required for learner profiling."""
 
@@ -63,6 +71,58 @@ class AdaptiveLearnerProfiler(BaseAgent):
         validated_output = LearnerProfile.model_validate(raw_output)
         return validated_output.model_dump()
 
+    def update_profiles(
+        self,
+        input_dicts: Sequence[Mapping[str, Any]],
+        max_concurrency: Optional[int] = None,
+        return_exceptions: bool = True,
+    ) -> List[Any]:
+        """Update several learner profiles (e.g. a cohort) in one batched model call.
+
+        By default a failed update is returned as its exception so it cannot
+        abort the rest of the cohort.
+        """
+        return self.batch(
+            input_dicts,
+            task_prompt=adaptive_learner_profiler_task_prompt_update,
+            max_concurrency=max_concurrency,
+            validate_input=_update_payload,
+            validate_output=_validated_profile,
+            return_exceptions=return_exceptions,
+        )
+
+    async def aupdate_profiles(
+        self,
+        input_dicts: Sequence[Mapping[str, Any]],
+        max_concurrency: Optional[int] = None,
+        return_exceptions: bool = True,
+    ) -> List[Any]:
+        """Async counterpart of :meth:`update_profiles`."""
+        return await self.abatch(
+            input_dicts,
+            task_prompt=adaptive_learner_profiler_task_prompt_update,
+            max_concurrency=max_concurrency,
+            validate_input=_update_payload,
+            validate_output=_validated_profile,
+            return_exceptions=return_exceptions,
+        )
+
+    async def ainitialize_profile(self, input_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """Async counterpart of :meth:`initialize_profile`."""
+        task_prompt = adaptive_learner_profiler_task_prompt_initialization
+        payload_dict = LearnerProfileInitializationPayload(**input_dict).model_dump()
+        raw_output = await self.ainvoke(payload_dict, task_prompt=task_prompt)
+        validated_output = LearnerProfile.model_validate(raw_output)
+        return validated_output.model_dump()
+
+    async def aupdate_profile(self, input_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """Async counterpart of :meth:`update_profile`."""
+        task_prompt = adaptive_learner_profiler_task_prompt_update
+        payload_dict = LearnerProfileUpdatePayload(**input_dict).model_dump()
+        raw_output = await self.ainvoke(payload_dict, task_prompt=task_prompt)
+        validated_output = LearnerProfile.model_validate(raw_output)
+        return validated_output.model_dump()
+
 
 def initialize_learner_profile_with_llm(
     llm: Any,
@@ -99,6 +159,62 @@ def update_learner_profile_with_llm(
     }
     return learner_profiler.update_profile(payload_dict)
 
+
+def update_learner_profiles_with_llm(
+    llm: Any,
+    updates: Sequence[Mapping[str, Any]],
+    max_concurrency: Optional[int] = None,
+) -> List[Any]:
+    """Update a cohort of learner profiles.
+
+    Each item of ``updates`` holds the keyword arguments of
+    :func:`update_learner_profile_with_llm`. Results keep input order; a
+    failed update is returned as its exception.
+    """
+    return AdaptiveLearnerProfiler(llm).update_profiles(updates, max_concurrency=max_concurrency)
+
+
+async def ainitialize_learner_profile_with_llm(
+    llm: Any,
+    learning_goal: str,
+    learner_information: Union[str, Mapping[str, Any]],
+    skill_gaps: Union[str, Mapping[str, Any], List[Any]],
+) -> Dict[str, Any]:
+    """Async counterpart of :func:`initialize_learner_profile_with_llm`."""
+    learner_profiler = AdaptiveLearnerProfiler(llm)
+    payload_dict = {
+        "learning_goal": learning_goal,
+        "learner_information": learner_information,
+        "skill_gaps": skill_gaps,
+    }
+    return await learner_profiler.ainitialize_profile(payload_dict)
+
+
+async def aupdate_learner_profile_with_llm(
+    llm: Any,
+    learner_profile: Union[str, Mapping[str, Any]],
+    learner_interactions: Union[str, Mapping[str, Any]],
+    learner_information: Union[str, Mapping[str, Any]],
+    session_information: Optional[Union[str, Mapping[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """Async counterpart of :func:`update_learner_profile_with_llm`."""
+    learner_profiler = AdaptiveLearnerProfiler(llm)
+    payload_dict = {
+        "learner_profile": learner_profile,
+        "learner_interactions": learner_interactions,
+        "learner_information": learner_information,
+        "session_information": session_information,
+    }
+    return await learner_profiler.aupdate_profile(payload_dict)
+
+async def aupdate_learner_profiles_with_llm(
+    llm: Any,
+    updates: Sequence[Mapping[str, Any]],
+    max_concurrency: Optional[int] = None,
+) -> List[Any]:
+    """Async counterpart of :func:`update_learner_profiles_with_llm`."""
+    return await AdaptiveLearnerProfiler(llm).aupdate_profiles(updates, max_concurrency=max_concurrency)
+
 if __name__ == "__main__":
     from base.llm_factory import LLMFactory
 
@@ -1,12 +1,12 @@
 from __future__ import annotations
 
 import ast
-from typing import Any, List, Mapping, Optional, Sequence
+from typing import Any, AsyncIterator, Iterator, List, Mapping, Optional, Sequence
 
 from pydantic import BaseModel, field_validator
 
 from base import BaseAgent
-from base.search_rag import SearchRagManager, format_docs
+from base.search_rag import RetrievalMethod, SearchRagManager, format_docs
 from modules.ai_chatbot_tutor.prompts.ai_chatbot_tutor import (
 	ai_tutor_chatbot_system_prompt,
 	ai_tutor_chatbot_task_prompt,
@@ -58,6 +58,7 @@ class TutorChatPayload(BaseModel):
 	messages: Any
 	use_search: bool = True
 	top_k: int = 5
+	retrieval_method: Optional[RetrievalMethod] = None  # None uses rag.retrieval_method
 	external_resources: Optional[str] = None
 
 	@field_validator("learner_profile")
@@ -78,35 +79,83 @@ class AITutorChatbot(BaseAgent):
 		self.search_rag_manager = search_rag_manager
 
 	def chat(self, payload: TutorChatPayload | Mapping[str, Any] | str):
+		data = self._validate_payload(payload)
+		input_vars = self._build_input_vars(data, self._retrieve_docs(data))
+		raw_reply = self.invoke(input_vars, task_prompt=ai_tutor_chatbot_task_prompt)
+		return raw_reply
+
+	async def achat(self, payload: TutorChatPayload | Mapping[str, Any] | str):
+		"""Async counterpart of :meth:`chat`."""
+		data = self._validate_payload(payload)
+		input_vars = self._build_input_vars(data, await self._aretrieve_docs(data))
+		return await self.ainvoke(input_vars, task_prompt=ai_tutor_chatbot_task_prompt)
+
+	def stream_chat(self, payload: TutorChatPayload | Mapping[str, Any] | str) -> Iterator[str]:
+		"""Like :meth:`chat`, but yield the reply in text chunks as they are generated."""
+		data = self._validate_payload(payload)
+		input_vars = self._build_input_vars(data, self._retrieve_docs(data))
+		yield from self.stream(input_vars, task_prompt=ai_tutor_chatbot_task_prompt)
+
+	async def astream_chat(self, payload: TutorChatPayload | Mapping[str, Any] | str) -> AsyncIterator[str]:
+		"""Async counterpart of :meth:`stream_chat`."""
+		data = self._validate_payload(payload)
+		input_vars = self._build_input_vars(data, await self._aretrieve_docs(data))
+		async for text in self.astream(input_vars, task_prompt=ai_tutor_chatbot_task_prompt):
+			yield text
+
+	def _retrieve_docs(self, data: Mapping[str, Any]) -> Optional[Sequence[Any]]:
+		query = _last_user_query(data.get("messages"))
+		if self.search_rag_manager is None or not query:
+			return None
+		try:
+			method = data.get("retrieval_method")
+			if data.get("use_search", True):
+				return self.search_rag_manager.invoke(query, method=method)
+			# Vectorstore-only retrieval
+			return self.search_rag_manager.retrieve(query, k=max(1, int(data.get("top_k", 5))), method=method)
+		except Exception:
+			return None
+
+	async def _aretrieve_docs(self, data: Mapping[str, Any]) -> Optional[Sequence[Any]]:
+		query = _last_user_query(data.get("messages"))
+		if self.search_rag_manager is None or not query:
+			return None
+		try:
+			method = data.get("retrieval_method")
+			if data.get("use_search", True):
+				return await self.search_rag_manager.ainvoke(query, method=method)
+			return await self.search_rag_manager.aretrieve(query, k=max(1, int(data.get("top_k", 5))), method=method)
+		except Exception:
+			return None
+
+	@staticmethod
+	def _validate_payload(payload: TutorChatPayload | Mapping[str, Any] | str) -> dict:
 		if not isinstance(payload, TutorChatPayload):
 			payload = TutorChatPayload.model_validate(payload)
+		return payload.model_dump()
 
-		data = payload.model_dump()
-		messages = data.get("messages")
-		history_text = _stringify_history(messages)
-		query = _last_user_query(messages)
-
+	@classmethod
+	def _build_input_vars(cls, data: Mapping[str, Any], docs: Optional[Sequence[Any]]) -> dict:
 		external_context = data.get("external_resources") or ""
-		if self.search_rag_manager is not None and query:
+		context = ""
+		if docs:
 			try:
-				if data.get("use_search", True):
-					docs = self.search_rag_manager.invoke(query)
-				else:
-					# Vectorstore-only retrieval
-					docs = self.search_rag_manager.retrieve(query, k=max(1, int(data.get("top_k", 5))))
-				context = format_docs(docs)
-				if context:
-					external_context = f"{external_context}\n{context}" if external_context else context
+				context = format_docs(
+					list(docs),
+					query=_last_user_query(data.get("messages")),
+					agent_name=cls.name,
+					existing_context=external_context,
+				)
 			except Exception:
-				pass
-
-		input_vars = {
+				# Like a failed retrieval, a failed packing step only drops the retrieved context.
+				context = ""
+		if context:
+			external_context = f"{external_context}\n{context}" if external_context else context
+		return {
 			"learner_profile": data.get("learner_profile", ""),
-			"messages": history_text,
+			"messages": _stringify_history(data.get("messages")),
 			"external_resources": external_context,
 		}
-		raw_reply = self.invoke(input_vars, task_prompt=ai_tutor_chatbot_task_prompt)
-		return raw_reply
 
 
 def chat_with_tutor_with_llm(
@@ -117,12 +166,14 @@ def chat_with_tutor_with_llm(
 	search_rag_manager: Optional[SearchRagManager] = None,
 	use_search: bool = True,
 	top_k: int = 5,
+	retrieval_method: Optional[str] = None,
 ):
 	"""Convenience helper to run an AI tutor chat turn with optional RAG.
 
 	- If a SearchRagManager is provided and use_search=True, performs web search + retrieval.
 	- If provided and use_search=False, performs vectorstore-only retrieval.
 	- If not provided, replies without external context.
+	- ``retrieval_method`` picks vector, lexical (BM25), hybrid or auto ranking for this turn.
 	"""
 	agent = AITutorChatbot(llm, search_rag_manager=search_rag_manager)
 	payload = {
@@ -130,5 +181,51 @@ def chat_with_tutor_with_llm(
 		"messages": messages,
 		"use_search": use_search,
 		"top_k": top_k,
+		"retrieval_method": retrieval_method,
 	}
 	return agent.chat(payload)
+
+
+async def achat_with_tutor_with_llm(
+	llm: Any,
+	messages: Optional[Sequence[Mapping[str, Any]]] | str = None,
+	learner_profile: Any = "",
+	*,
+	search_rag_manager: Optional[SearchRagManager] = None,
+	use_search: bool = True,
+	top_k: int = 5,
+	retrieval_method: Optional[str] = None,
+):
+	"""Async counterpart of :func:`chat_with_tutor_with_llm`."""
+	agent = AITutorChatbot(llm, search_rag_manager=search_rag_manager)
+	payload = {
+		"learner_profile": learner_profile,
+		"messages": messages,
+		"use_search": use_search,
+		"top_k": top_k,
+		"retrieval_method": retrieval_method,
+	}
+	return await agent.achat(payload)
+
+
+async def astream_chat_with_tutor_with_llm(
+	llm: Any,
+	messages: Optional[Sequence[Mapping[str, Any]]] | str = None,
+	learner_profile: Any = "",
+	*,
+	search_rag_manager: Optional[SearchRagManager] = None,
+	use_search: bool = True,
+	top_k: int = 5,
+	retrieval_method: Optional[str] = None,
+) -> AsyncIterator[str]:
+	"""Streaming counterpart of :func:`achat_with_tutor_with_llm`; yields reply text chunks."""
+	agent = AITutorChatbot(llm, search_rag_manager=search_rag_manager)
+	payload = {
+		"learner_profile": learner_profile,
+		"messages": messages,
+		"use_search": use_search,
+		"top_k": top_k,
+		"retrieval_method": retrieval_method,
+	}
+	async for text in agent.astream_chat(payload):
+		yield text
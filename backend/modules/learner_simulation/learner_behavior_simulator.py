@@ -3,7 +3,7 @@ from __future__ import annotations
 import ast
 import json
 import os
-from typing import Any, Dict, Mapping, Union
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
 
 from base import BaseAgent
 from .schemas import parse_learner_behavior_log
@@ -63,26 +63,41 @@ class LearnerInteractionSimulator(BaseAgent):
         validated = parse_learner_behavior_log(raw_output)
         return validated.model_dump()
 
+    def simulate_many(
+        self,
+        input_dicts: Sequence[Mapping[str, Any]],
+        max_concurrency: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Simulate several independent sessions in one batched model call, in input order."""
+        return self.batch(
+            input_dicts,
+            task_prompt=learner_interaction_simulator_task_prompt,
+            max_concurrency=max_concurrency,
+            validate_input=lambda input_dict: LearnerInteractionPayload(**input_dict).model_dump(),
+            validate_output=lambda raw_output: parse_learner_behavior_log(raw_output).model_dump(),
+        )
+
 
 def simulate_learner_interactions_with_llm(
     llm: Any,
     ground_truth_profile: Union[str, Mapping[str, Any]],
     session_count: int = 5,
+    max_concurrency: Optional[int] = None,
 ) -> list[Dict[str, Any]]:
     """Simulate interactions for multiple sessions and persist logs."""
 
     print("==== Step 2: Simulate Learner Interactions ====")
     learner_behavior_simulator = LearnerInteractionSimulator(llm)
-    behavior_logs: list[Dict[str, Any]] = []
-
-    for session in range(1, session_count + 1):
-        behavior_log = learner_behavior_simulator.simulate_interactions(
+    behavior_logs: list[Dict[str, Any]] = learner_behavior_simulator.simulate_many(
+        [
             {
                 "ground_truth_profile": ground_truth_profile,
                 "session_number": session,
             }
-        )
-        behavior_logs.append(behavior_log)
+            for session in range(1, session_count + 1)
+        ],
+        max_concurrency=max_concurrency,
+    )
 
     # Save logs to data/output/behavior_logs.json
     out_dir = os.path.join("data", "output")
@@ -1,15 +1,19 @@
 from __future__ import annotations
 
-from typing import Any, Mapping
+import logging
+from typing import Any, AsyncIterator, Iterator, List, Mapping
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, ValidationError, field_validator
 
 from base import BaseAgent
 from modules.personalized_resource_delivery.prompts.goal_oriented_knowledge_explorer import (
     goal_oriented_knowledge_explorer_system_prompt,
     goal_oriented_knowledge_explorer_task_prompt,
 )
-from modules.personalized_resource_delivery.schemas import KnowledgePoints
+from modules.personalized_resource_delivery.schemas import KnowledgePoint, KnowledgePoints
+from utils.llm_output import JsonArrayItemParser, convert_json_output
+
+logger = logging.getLogger(__name__)
 
 
 class KnowledgeExplorePayload(BaseModel):
@@ -30,6 +34,64 @@ class GoalOrientedKnowledgeExplorer(BaseAgent):
         validated_output = KnowledgePoints.model_validate(raw_output)
         return validated_output.model_dump()
 
+    async def aexplore(self, payload: KnowledgeExplorePayload | Mapping[str, Any] | str | dict):
+        if not isinstance(payload, KnowledgeExplorePayload):
+            payload = KnowledgeExplorePayload.model_validate(payload)
+        raw_output = await self.ainvoke(payload.model_dump(), task_prompt=goal_oriented_knowledge_explorer_task_prompt)
+        validated_output = KnowledgePoints.model_validate(raw_output)
+        return validated_output.model_dump()
+
+    def iter_knowledge_points(self, payload: KnowledgeExplorePayload | Mapping[str, Any] | str | dict) -> Iterator[dict]:
+        """Yield each knowledge point as soon as the model has written it, before the list is complete.
+
+        The reply is streamed (and so not served from the response cache) and
+        parsed incrementally; points the incremental parser missed are yielded
+        after the whole reply has been validated.
+        """
+        if not isinstance(payload, KnowledgeExplorePayload):
+            payload = KnowledgeExplorePayload.model_validate(payload)
+        parser = JsonArrayItemParser("knowledge_points")
+        yielded: List[dict] = []
+        for text in self.stream(payload.model_dump(), task_prompt=goal_oriented_knowledge_explorer_task_prompt):
+            for point in self._validate_points(parser.feed(text)):
+                yielded.append(point)
+                yield point
+        yield from self._missed_points(parser.text, yielded)
+
+    async def aiter_knowledge_points(self, payload: KnowledgeExplorePayload | Mapping[str, Any] | str | dict) -> AsyncIterator[dict]:
+        """Async counterpart of :meth:`iter_knowledge_points`."""
+        if not isinstance(payload, KnowledgeExplorePayload):
+            payload = KnowledgeExplorePayload.model_validate(payload)
+        parser = JsonArrayItemParser("knowledge_points")
+        yielded: List[dict] = []
+        async for text in self.astream(payload.model_dump(), task_prompt=goal_oriented_knowledge_explorer_task_prompt):
+            for point in self._validate_points(parser.feed(text)):
+                yielded.append(point)
+                yield point
+        for point in self._missed_points(parser.text, yielded):
+            yield point
+
+    @staticmethod
+    def _validate_points(items: List[Any]) -> List[dict]:
+        points = []
+        for item in items:
+            try:
+                points.append(KnowledgePoint.model_validate(item).model_dump())
+            except ValidationError as e:
+                logger.warning(f"Skipping malformed streamed knowledge point {item!r}: {e}")
+        return points
+
+    @staticmethod
+    def _missed_points(text: str, yielded: List[dict]) -> List[dict]:
+        try:
+            points = KnowledgePoints.model_validate(convert_json_output(text)).model_dump()["knowledge_points"]
+        except (ValueError, ValidationError):
+            if not yielded:
+                raise
+            logger.warning("Explorer output did not validate as a whole; keeping the knowledge points parsed so far.")
+            return []
+        return [point for point in points if point not in yielded]
+
 
 def explore_knowledge_points_with_llm(llm, learner_profile, learning_path, learning_session):
     """Convenience wrapper to explore knowledge points for a session using the agent.
@@ -43,3 +105,37 @@ def explore_knowledge_points_with_llm(llm, learner_profile, learning_path, learn
     }
     explorer = GoalOrientedKnowledgeExplorer(llm)
     return explorer.explore(input_dict)
+
+
+async def aexplore_knowledge_points_with_llm(llm, learner_profile, learning_path, learning_session):
+    """Async counterpart of :func:`explore_knowledge_points_with_llm`."""
+    input_dict = {
+        "learner_profile": learner_profile,
+        "learning_path": learning_path,
+        "learning_session": learning_session,
+    }
+    explorer = GoalOrientedKnowledgeExplorer(llm)
+    return await explorer.aexplore(input_dict)
+
+
+def iter_knowledge_points_with_llm(llm, learner_profile, learning_path, learning_session) -> Iterator[dict]:
+    """Streaming form of :func:`explore_knowledge_points_with_llm`: yields knowledge points one by one."""
+    input_dict = {
+        "learner_profile": learner_profile,
+        "learning_path": learning_path,
+        "learning_session": learning_session,
+    }
+    explorer = GoalOrientedKnowledgeExplorer(llm)
+    yield from explorer.iter_knowledge_points(input_dict)
+
+
+async def aiter_knowledge_points_with_llm(llm, learner_profile, learning_path, learning_session) -> AsyncIterator[dict]:
+    """Async counterpart of :func:`iter_knowledge_points_with_llm`."""
+    input_dict = {
+        "learner_profile": learner_profile,
+        "learning_path": learning_path,
+        "learning_session": learning_session,
+    }
+    explorer = GoalOrientedKnowledgeExplorer(llm)
+    async for point in explorer.aiter_knowledge_points(input_dict):
+        yield point
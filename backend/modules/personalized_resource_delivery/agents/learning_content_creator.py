@@ -1,11 +1,16 @@
 from __future__ import annotations
 
-from typing import Any, Mapping, Optional
+import ast
+import asyncio
+import contextvars
+import queue
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, List, Mapping, Optional
 
 from pydantic import BaseModel, Field, field_validator
 
 from base import BaseAgent
-from base.search_rag import SearchRagManager, format_docs
+from base.search_rag import SearchRagManager, format_docs, get_search_rag_manager
 from modules.personalized_resource_delivery.prompts.learning_content_creator import (
     learning_content_creator_system_prompt,
     learning_content_creator_task_prompt_content,
@@ -13,6 +18,8 @@ from modules.personalized_resource_delivery.prompts.learning_content_creator imp
     learning_content_creator_task_prompt_outline,
 )
 from modules.personalized_resource_delivery.schemas import ContentOutline, KnowledgeDraft, LearningContent
+from utils.concurrency import run_blocking
+from utils.stage_graph import StageGraph
 
 
 class ContentBasePayload(BaseModel):
@@ -54,6 +61,20 @@ class LearningContentCreator(BaseAgent):
         validated_output = LearningContent.model_validate(raw_output)
         return validated_output.model_dump()
 
+    async def aprepare_outline(self, payload: ContentBasePayload | Mapping[str, Any] | str):
+        if not isinstance(payload, ContentBasePayload):
+            payload = ContentBasePayload.model_validate(payload)
+        raw_output = await self.ainvoke(payload.model_dump(), task_prompt=learning_content_creator_task_prompt_outline)
+        validated_output = ContentOutline.model_validate(raw_output)
+        return validated_output.model_dump()
+
+    async def acreate_content(self, payload: ContentBasePayload | Mapping[str, Any] | str):
+        if not isinstance(payload, ContentBasePayload):
+            payload = ContentBasePayload.model_validate(payload)
+        raw_output = await self.ainvoke(payload.model_dump(), task_prompt=learning_content_creator_task_prompt_content)
+        validated_output = LearningContent.model_validate(raw_output)
+        return validated_output.model_dump()
+
 
 def prepare_content_outline_with_llm(llm, learner_profile, learning_path, learning_session, *, search_rag_manager: Optional[SearchRagManager] = None):
     creator = LearningContentCreator(llm, search_rag_manager=search_rag_manager)
@@ -65,6 +86,56 @@ def prepare_content_outline_with_llm(llm, learner_profile, learning_path, learni
     return creator.prepare_outline(payload)
 
 
+async def aprepare_content_outline_with_llm(llm, learner_profile, learning_path, learning_session, *, search_rag_manager: Optional[SearchRagManager] = None):
+    creator = LearningContentCreator(llm, search_rag_manager=search_rag_manager)
+    payload = {
+        "learner_profile": learner_profile,
+        "learning_path": learning_path,
+        "learning_session": learning_session,
+    }
+    return await creator.aprepare_outline(payload)
+
+
+def _learning_content_graph(explore, draft, integrate, quiz=None) -> StageGraph:
+    """explore -> draft, then integration and quizzes side by side; both only need the drafts."""
+    graph = StageGraph("learning_content")
+    graph.add("explore", explore)
+    graph.add("draft", draft, deps=["explore"])
+    graph.add("integrate", integrate, deps=["explore", "draft"])
+    if quiz is not None:
+        graph.add("quiz", quiz, deps=["explore", "draft"])
+    return graph
+
+
+def _draft_payload(learner_profile, learning_path, learning_session, knowledge_points, knowledge_point) -> dict:
+    """Drafting payload for a point that arrived while exploration is still streaming.
+
+    Only the points generated so far are known, so they stand in for the
+    session's full list.
+    """
+    from .search_enhanced_knowledge_drafter import KnowledgeDraftPayload
+
+    if isinstance(learning_session, str):
+        learning_session = ast.literal_eval(learning_session)
+    return KnowledgeDraftPayload(
+        learner_profile=learner_profile,
+        learning_path=learning_path,
+        learning_session=learning_session,
+        knowledge_points=list(knowledge_points),
+        knowledge_point=knowledge_point,
+    ).model_dump()
+
+
+def _drafts_document(knowledge_points, knowledge_drafts) -> str:
+    """Markdown of the drafts alone, enough to write quizzes before the document is integrated."""
+    sections = [
+        f"### {draft.get('title', '')}\n\n{draft.get('content', '')}"
+        for draft in knowledge_drafts or []
+        if isinstance(draft, dict)
+    ]
+    return "\n\n".join(sections)
+
+
 def create_learning_content_with_llm(
     llm,
     learner_profile,
@@ -79,49 +150,108 @@ def create_learning_content_with_llm(
     method_name="genmentor",
     *,
     search_rag_manager: Optional[SearchRagManager] = None,
+    speculative_drafting: bool = False,
 ):
-    from .goal_oriented_knowledge_explorer import explore_knowledge_points_with_llm
-    from .search_enhanced_knowledge_drafter import draft_knowledge_points_with_llm
+    """Create a session's learning content.
+
+    By default the drafts wait for the full list of knowledge points and
+    share one batched search. With ``speculative_drafting`` the explorer's
+    reply is streamed and each knowledge point is drafted as soon as it is
+    parsed, overlapping the two slowest stages. Points parsed while a search
+    is running are searched together in the next batch, so a session makes a
+    few searches rather than one per point.
+    """
+    from .goal_oriented_knowledge_explorer import explore_knowledge_points_with_llm, iter_knowledge_points_with_llm
+    from .search_enhanced_knowledge_drafter import SearchEnhancedKnowledgeDrafter, draft_knowledge_points_with_llm
     from .learning_document_integrator import integrate_learning_document_with_llm
     from .document_quiz_generator import generate_document_quizzes_with_llm
 
     if method_name == "genmentor":
-        knowledge_points = explore_knowledge_points_with_llm(
-            llm, learner_profile, learning_path, learning_session
-        )
-        knowledge_drafts = draft_knowledge_points_with_llm(
-            llm,
-            learner_profile,
-            learning_path,
-            learning_session,
-            knowledge_points,
-            allow_parallel=allow_parallel,
-            use_search=use_search,
-            max_workers=max_workers,
-            search_rag_manager=search_rag_manager,
-        )
-        learning_document = integrate_learning_document_with_llm(
-            llm,
-            learner_profile,
-            learning_path,
-            learning_session,
-            knowledge_points,
-            knowledge_drafts,
-            output_markdown=output_markdown,
-        )
-        learning_content = {"document": learning_document}
-        if not with_quiz:
-            return learning_content
-        document_quiz = generate_document_quizzes_with_llm(
-            llm,
-            learner_profile,
-            learning_document,
-            single_choice_count=3,
-            multiple_choice_count=0,
-            true_false_count=0,
-            short_answer_count=0,
-        )
-        learning_content["quizzes"] = document_quiz
+        in_flight: List[Future] = []
+        pool = searcher = search_done = None
+        if speculative_drafting:
+            drafter = SearchEnhancedKnowledgeDrafter(llm, search_rag_manager=search_rag_manager, use_search=use_search)
+            pool = ThreadPoolExecutor(max_workers=max_workers if allow_parallel else 1, thread_name_prefix="genmentor-drafts")
+            searcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="genmentor-draft-search")
+            pending: queue.Queue = queue.Queue()  # draft payloads, then None once exploration ends
+
+            def search_and_submit():
+                finished = False
+                while not finished:
+                    batch = [pending.get()]
+                    while not pending.empty():
+                        batch.append(pending.get_nowait())
+                    finished = batch[-1] is None
+                    datas = [data for data in batch if data is not None]
+                    if datas:
+                        for data in drafter.enrich_many(datas):
+                            in_flight.append(pool.submit(contextvars.copy_context().run, drafter.draft, data, enrich=False))
+
+            search_done = searcher.submit(contextvars.copy_context().run, search_and_submit)
+
+            def explore():
+                knowledge_points = []
+                try:
+                    for knowledge_point in iter_knowledge_points_with_llm(llm, learner_profile, learning_path, learning_session):
+                        knowledge_points.append(knowledge_point)
+                        pending.put(_draft_payload(learner_profile, learning_path, learning_session, knowledge_points, knowledge_point))
+                finally:
+                    pending.put(None)
+                return knowledge_points
+
+            def draft(explore):
+                search_done.result()
+                return [future.result() for future in in_flight]
+        else:
+            def explore():
+                return explore_knowledge_points_with_llm(llm, learner_profile, learning_path, learning_session)["knowledge_points"]
+
+            def draft(explore):
+                return draft_knowledge_points_with_llm(
+                    llm,
+                    learner_profile,
+                    learning_path,
+                    learning_session,
+                    explore,
+                    allow_parallel=allow_parallel,
+                    use_search=use_search,
+                    max_workers=max_workers,
+                    search_rag_manager=search_rag_manager,
+                )
+
+        def integrate(explore, draft):
+            return integrate_learning_document_with_llm(
+                llm,
+                learner_profile,
+                learning_path,
+                learning_session,
+                explore,
+                draft,
+                output_markdown=output_markdown,
+            )
+
+        def quiz(explore, draft):
+            return generate_document_quizzes_with_llm(
+                llm,
+                learner_profile,
+                _drafts_document(explore, draft),
+                single_choice_count=3,
+                multiple_choice_count=0,
+                true_false_count=0,
+                short_answer_count=0,
+            )
+
+        try:
+            results = _learning_content_graph(explore, draft, integrate, quiz if with_quiz else None).run().results
+        finally:
+            for future in in_flight:
+                future.cancel()
+            if pool is not None:
+                pool.shutdown(wait=False)
+                searcher.shutdown(wait=False)
+        learning_content = {"document": results["integrate"]}
+        if with_quiz:
+            learning_content["quizzes"] = results["quiz"]
         return learning_content
     else:
         creator = LearningContentCreator(llm, search_rag_manager=search_rag_manager)
@@ -141,3 +271,138 @@ def create_learning_content_with_llm(
             "external_resources": "",
         }
         return creator.create_content(payload)
+
+
+async def acreate_learning_content_with_llm(
+    llm,
+    learner_profile,
+    learning_path,
+    learning_session,
+    document_outline=None,
+    allow_parallel=True,
+    with_quiz=True,
+    max_workers=3,
+    use_search=True,
+    output_markdown=True,
+    method_name="genmentor",
+    *,
+    search_rag_manager: Optional[SearchRagManager] = None,
+    speculative_drafting: bool = False,
+):
+    """Async counterpart of :func:`create_learning_content_with_llm`."""
+    from .goal_oriented_knowledge_explorer import aexplore_knowledge_points_with_llm, aiter_knowledge_points_with_llm
+    from .search_enhanced_knowledge_drafter import SearchEnhancedKnowledgeDrafter, adraft_knowledge_points_with_llm
+    from .learning_document_integrator import aintegrate_learning_document_with_llm
+    from .document_quiz_generator import agenerate_document_quizzes_with_llm
+
+    if method_name == "genmentor":
+        in_flight: List[asyncio.Future] = []
+        search_done = None
+        if speculative_drafting:
+            if search_rag_manager is None and use_search:
+                # First use loads the embedding model; keep that off the event loop.
+                search_rag_manager = await run_blocking("embedding", get_search_rag_manager)
+            drafter = SearchEnhancedKnowledgeDrafter(llm, search_rag_manager=search_rag_manager, use_search=use_search)
+            semaphore = asyncio.Semaphore(max_workers if allow_parallel else 1)
+            pending: asyncio.Queue = asyncio.Queue()  # draft payloads, then None once exploration ends
+
+            async def draft_one(data):
+                async with semaphore:
+                    return await drafter.adraft(data, enrich=False)
+
+            async def search_and_submit():
+                finished = False
+                while not finished:
+                    batch = [await pending.get()]
+                    while not pending.empty():
+                        batch.append(pending.get_nowait())
+                    finished = batch[-1] is None
+                    datas = [data for data in batch if data is not None]
+                    if datas:
+                        for data in await drafter.aenrich_many(datas):
+                            in_flight.append(asyncio.ensure_future(draft_one(data)))
+
+            search_done = asyncio.ensure_future(search_and_submit())
+
+            async def explore():
+                knowledge_points = []
+                try:
+                    async for knowledge_point in aiter_knowledge_points_with_llm(llm, learner_profile, learning_path, learning_session):
+                        knowledge_points.append(knowledge_point)
+                        pending.put_nowait(_draft_payload(learner_profile, learning_path, learning_session, knowledge_points, knowledge_point))
+                finally:
+                    pending.put_nowait(None)
+                return knowledge_points
+
+            async def draft(explore):
+                await search_done
+                return list(await asyncio.gather(*in_flight))
+        else:
+            async def explore():
+                return (await aexplore_knowledge_points_with_llm(
+                    llm, learner_profile, learning_path, learning_session
+                ))["knowledge_points"]
+
+            async def draft(explore):
+                return await adraft_knowledge_points_with_llm(
+                    llm,
+                    learner_profile,
+                    learning_path,
+                    learning_session,
+                    explore,
+                    allow_parallel=allow_parallel,
+                    use_search=use_search,
+                    max_workers=max_workers,
+                    search_rag_manager=search_rag_manager,
+                )
+
+        async def integrate(explore, draft):
+            return await aintegrate_learning_document_with_llm(
+                llm,
+                learner_profile,
+                learning_path,
+                learning_session,
+                explore,
+                draft,
+                output_markdown=output_markdown,
+            )
+
+        async def quiz(explore, draft):
+            return await agenerate_document_quizzes_with_llm(
+                llm,
+                learner_profile,
+                _drafts_document(explore, draft),
+                single_choice_count=3,
+                multiple_choice_count=0,
+                true_false_count=0,
+                short_answer_count=0,
+            )
+
+        try:
+            results = (await _learning_content_graph(explore, draft, integrate, quiz if with_quiz else None).arun()).results
+        finally:
+            for task in in_flight:
+                task.cancel()
+            if search_done is not None:
+                search_done.cancel()
+        learning_content = {"document": results["integrate"]}
+        if with_quiz:
+            learning_content["quizzes"] = results["quiz"]
+        return learning_content
+    else:
+        creator = LearningContentCreator(llm, search_rag_manager=search_rag_manager)
+        if document_outline is None:
+            document_outline = await aprepare_content_outline_with_llm(
+                llm,
+                learner_profile,
+                learning_path,
+                learning_session,
+                search_rag_manager=search_rag_manager,
+            )
+        payload = {
+            "learner_profile": learner_profile,
+            "learning_path": learning_path,
+            "learning_session": learning_session,
+            "external_resources": "",
+        }
+        return await creator.acreate_content(payload)
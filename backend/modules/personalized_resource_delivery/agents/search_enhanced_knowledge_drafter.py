@@ -1,19 +1,19 @@
 from __future__ import annotations
 
 import ast
-from typing import Any, Mapping, Optional, List
-from concurrent.futures import ThreadPoolExecutor
+import asyncio
+from typing import Any, AsyncIterator, List, Mapping, Optional, Sequence, Tuple
 
 from pydantic import BaseModel, field_validator
 
 from base import BaseAgent
-from base.search_rag import SearchRagManager, format_docs
+from base.search_rag import RetrievalMethod, SearchRagManager, format_docs, get_search_rag_manager
 from modules.personalized_resource_delivery.prompts.search_enhanced_knowledge_drafter import (
     search_enhanced_knowledge_drafter_system_prompt,
     search_enhanced_knowledge_drafter_task_prompt,
 )
 from modules.personalized_resource_delivery.schemas import KnowledgeDraft
-from config.loader import default_config
+from utils.concurrency import run_blocking
 
 
 class KnowledgeDraftPayload(BaseModel):
@@ -23,6 +23,7 @@ class KnowledgeDraftPayload(BaseModel):
     knowledge_points: Any
     knowledge_point: Any
     external_resources: str | None = ""
+    retrieval_method: Optional[RetrievalMethod] = None  # None uses rag.retrieval_method
 
     @field_validator("learner_profile", "learning_path", "learning_session", "knowledge_points", "knowledge_point")
     @classmethod
@@ -42,28 +43,110 @@ class SearchEnhancedKnowledgeDrafter(BaseAgent):
 
     def __init__(self, model: Any, *, search_rag_manager: Optional[SearchRagManager] = None, use_search: bool = True):
         super().__init__(model=model, system_prompt=search_enhanced_knowledge_drafter_system_prompt, jsonalize_output=True)
-        self.search_rag_manager = search_rag_manager or SearchRagManager.from_config(default_config)
+        if search_rag_manager is None and use_search:
+            search_rag_manager = get_search_rag_manager()
+        self.search_rag_manager = search_rag_manager
         self.use_search = use_search
 
-    def draft(self, payload: KnowledgeDraftPayload | Mapping[str, Any] | str):
+    def draft(self, payload: KnowledgeDraftPayload | Mapping[str, Any] | str, *, enrich: bool = True):
+        data = self._validate_payload(payload)
+        if enrich:
+            data = self._enrich(data)
+        raw_output = self.invoke(data, task_prompt=search_enhanced_knowledge_drafter_task_prompt)
+        return self._validate_draft(raw_output)
+
+    async def adraft(self, payload: KnowledgeDraftPayload | Mapping[str, Any] | str, *, enrich: bool = True):
+        """Async counterpart of :meth:`draft`; ``enrich=False`` skips the search for payloads from :meth:`aenrich_many`."""
+        data = self._validate_payload(payload)
+        if enrich:
+            data = await self._aenrich(data)
+        raw_output = await self.ainvoke(data, task_prompt=search_enhanced_knowledge_drafter_task_prompt)
+        return self._validate_draft(raw_output)
+
+    def draft_many(self, payloads: Sequence[KnowledgeDraftPayload | Mapping[str, Any] | str], max_concurrency: Optional[int] = None) -> List[dict]:
+        """Draft several knowledge points; context is gathered once for all of them, then model calls run as one batch."""
+        datas = self.enrich_many([self._validate_payload(payload) for payload in payloads])
+        return self.batch(
+            datas,
+            task_prompt=search_enhanced_knowledge_drafter_task_prompt,
+            max_concurrency=max_concurrency,
+            validate_output=self._validate_draft,
+        )
+
+    async def adraft_many(self, payloads: Sequence[KnowledgeDraftPayload | Mapping[str, Any] | str], max_concurrency: Optional[int] = None) -> List[dict]:
+        """Async counterpart of :meth:`draft_many`."""
+        datas = await self.aenrich_many([self._validate_payload(payload) for payload in payloads])
+        return await self.abatch(
+            datas,
+            task_prompt=search_enhanced_knowledge_drafter_task_prompt,
+            max_concurrency=max_concurrency,
+            validate_output=self._validate_draft,
+        )
+
+    def _enrich(self, data: dict) -> dict:
+        """Optionally enrich external resources using the search RAG manager."""
+        if self.use_search and self.search_rag_manager is not None:
+            docs = self.search_rag_manager.invoke(self._build_query(data), method=data.get("retrieval_method"))
+            self._merge_context(data, docs)
+        return data
+
+    async def _aenrich(self, data: dict) -> dict:
+        if self.use_search and self.search_rag_manager is not None:
+            docs = await self.search_rag_manager.ainvoke(self._build_query(data), method=data.get("retrieval_method"))
+            self._merge_context(data, docs)
+        return data
+
+    def enrich_many(self, datas: List[dict]) -> List[dict]:
+        """Enrich validated payloads of one session with a single batched search (see ``SearchRagManager.invoke_many``)."""
+        if self.use_search and self.search_rag_manager is not None:
+            for method, group in self._group_by_method(datas).items():
+                docs_per_query = self.search_rag_manager.invoke_many([self._build_query(data) for data in group], method=method)
+                for data, docs in zip(group, docs_per_query):
+                    self._merge_context(data, docs)
+        return datas
+
+    async def aenrich_many(self, datas: List[dict]) -> List[dict]:
+        """Async counterpart of :meth:`enrich_many`."""
+        if self.use_search and self.search_rag_manager is not None:
+            for method, group in self._group_by_method(datas).items():
+                docs_per_query = await self.search_rag_manager.ainvoke_many(
+                    [self._build_query(data) for data in group], method=method
+                )
+                for data, docs in zip(group, docs_per_query):
+                    self._merge_context(data, docs)
+        return datas
+
+    @staticmethod
+    def _group_by_method(datas: List[dict]) -> dict:
+        groups: dict = {}
+        for data in datas:
+            groups.setdefault(data.get("retrieval_method"), []).append(data)
+        return groups
+
+    @staticmethod
+    def _validate_draft(raw_output: Any) -> dict:
+        return KnowledgeDraft.model_validate(raw_output).model_dump()
+
+    @staticmethod
+    def _validate_payload(payload: KnowledgeDraftPayload | Mapping[str, Any] | str) -> dict:
         if not isinstance(payload, KnowledgeDraftPayload):
             payload = KnowledgeDraftPayload.model_validate(payload)
-        data = payload.model_dump()
-        # Optionally enrich external resources using the search RAG manager
-        if self.use_search and self.search_rag_manager is not None:
-            session = data.get("learning_session") or {}
-            session_title = str(session.get("title", "")).strip() or "learning_session"
-            knowledge_point = data.get("knowledge_point") or {}
-            knowledge_point_name = str(knowledge_point.get('name', '')).strip()
-            query = f"{session_title} {knowledge_point_name}".strip()
-            docs = self.search_rag_manager.invoke(query)
-            context = format_docs(docs)
-            if context:
-                ext = data.get("external_resources") or ""
-                data["external_resources"] = f"{ext}{context}"
-        raw_output = self.invoke(data, task_prompt=search_enhanced_knowledge_drafter_task_prompt)
-        validated_output = KnowledgeDraft.model_validate(raw_output)
-        return validated_output.model_dump()
+        return payload.model_dump()
+
+    @staticmethod
+    def _build_query(data: Mapping[str, Any]) -> str:
+        session = data.get("learning_session") or {}
+        session_title = str(session.get("title", "")).strip() or "learning_session"
+        knowledge_point = data.get("knowledge_point") or {}
+        knowledge_point_name = str(knowledge_point.get('name', '')).strip()
+        return f"{session_title} {knowledge_point_name}".strip()
+
+    @classmethod
+    def _merge_context(cls, data: dict, docs) -> None:
+        ext = data.get("external_resources") or ""
+        context = format_docs(docs, query=cls._build_query(data), agent_name=cls.name, existing_context=ext)
+        if context:
+            data["external_resources"] = f"{ext}{context}"
 
 def draft_knowledge_point_with_llm(
     llm,
@@ -75,6 +158,7 @@ def draft_knowledge_point_with_llm(
     use_search: bool = True,
     *,
     search_rag_manager: Optional[SearchRagManager] = None,
+    retrieval_method: Optional[str] = None,
 ):
     """Draft a single knowledge point using the agent, optionally enriching with a SearchRagManager."""
     drafter = SearchEnhancedKnowledgeDrafter(llm, search_rag_manager=search_rag_manager, use_search=use_search)
@@ -84,6 +168,7 @@ def draft_knowledge_point_with_llm(
         "learning_session": learning_session,
         "knowledge_points": knowledge_points,
         "knowledge_point": knowledge_point,
+        "retrieval_method": retrieval_method,
     }
     return drafter.draft(payload)
 
@@ -99,34 +184,141 @@ def draft_knowledge_points_with_llm(
     max_workers: int = 8,
     *,
     search_rag_manager: Optional[SearchRagManager] = None,
+    retrieval_method: Optional[str] = None,
 ):
     """Draft multiple knowledge points in parallel or sequentially using the agent."""
     if isinstance(learning_session, str):
         learning_session = ast.literal_eval(learning_session)
     if isinstance(knowledge_points, str):
         knowledge_points = ast.literal_eval(knowledge_points)
+    drafter = SearchEnhancedKnowledgeDrafter(llm, search_rag_manager=search_rag_manager, use_search=use_search)
+    payloads = [
+        {
+            "learner_profile": learner_profile,
+            "learning_path": learning_path,
+            "learning_session": learning_session,
+            "knowledge_points": knowledge_points,
+            "knowledge_point": kp,
+            "retrieval_method": retrieval_method,
+        }
+        for kp in knowledge_points
+    ]
+    return drafter.draft_many(payloads, max_concurrency=max_workers if allow_parallel else 1)
+
+
+async def adraft_knowledge_point_with_llm(
+    llm,
+    learner_profile,
+    learning_path,
+    learning_session,
+    knowledge_points,
+    knowledge_point,
+    use_search: bool = True,
+    *,
+    search_rag_manager: Optional[SearchRagManager] = None,
+    retrieval_method: Optional[str] = None,
+):
+    """Async counterpart of :func:`draft_knowledge_point_with_llm`."""
     if search_rag_manager is None and use_search:
-        search_rag_manager = SearchRagManager.from_config(default_config)
-    def draft_one(kp):
-        return draft_knowledge_point_with_llm(
-            llm,
-            learner_profile,
-            learning_path,
-            learning_session,
-            knowledge_points,
-            kp,
-            use_search=use_search,
-            search_rag_manager=search_rag_manager,
-        )
+        # First use loads the embedding model; keep that off the event loop.
+        search_rag_manager = await run_blocking("embedding", get_search_rag_manager)
+    drafter = SearchEnhancedKnowledgeDrafter(llm, search_rag_manager=search_rag_manager, use_search=use_search)
+    payload = {
+        "learner_profile": learner_profile,
+        "learning_path": learning_path,
+        "learning_session": learning_session,
+        "knowledge_points": knowledge_points,
+        "knowledge_point": knowledge_point,
+        "retrieval_method": retrieval_method,
+    }
+    return await drafter.adraft(payload)
+
+
+async def adraft_knowledge_points_with_llm(
+    llm,
+    learner_profile,
+    learning_path,
+    learning_session,
+    knowledge_points,
+    allow_parallel: bool = True,
+    use_search: bool = True,
+    max_workers: int = 8,
+    *,
+    search_rag_manager: Optional[SearchRagManager] = None,
+    retrieval_method: Optional[str] = None,
+):
+    """Async counterpart of :func:`draft_knowledge_points_with_llm`; at most ``max_workers`` drafts run at once."""
+    if isinstance(learning_session, str):
+        learning_session = ast.literal_eval(learning_session)
+    if isinstance(knowledge_points, str):
+        knowledge_points = ast.literal_eval(knowledge_points)
+    if search_rag_manager is None and use_search:
+        search_rag_manager = await run_blocking("embedding", get_search_rag_manager)
+    drafter = SearchEnhancedKnowledgeDrafter(llm, search_rag_manager=search_rag_manager, use_search=use_search)
+    payloads = [
+        {
+            "learner_profile": learner_profile,
+            "learning_path": learning_path,
+            "learning_session": learning_session,
+            "knowledge_points": knowledge_points,
+            "knowledge_point": kp,
+            "retrieval_method": retrieval_method,
+        }
+        for kp in knowledge_points
+    ]
+    return await drafter.adraft_many(payloads, max_concurrency=max_workers if allow_parallel else 1)
+
+
+async def aiter_knowledge_drafts_with_llm(
+    llm,
+    learner_profile,
+    learning_path,
+    learning_session,
+    knowledge_points,
+    allow_parallel: bool = True,
+    use_search: bool = True,
+    max_workers: int = 8,
+    *,
+    search_rag_manager: Optional[SearchRagManager] = None,
+    retrieval_method: Optional[str] = None,
+) -> AsyncIterator[Tuple[int, dict]]:
+    """Yield ``(index, knowledge_draft)`` pairs in completion order.
+
+    ``index`` is the position of the knowledge point in ``knowledge_points``.
+    Drafts still running are cancelled if the consumer stops iterating early.
+    """
+    if isinstance(learning_session, str):
+        learning_session = ast.literal_eval(learning_session)
+    if isinstance(knowledge_points, str):
+        knowledge_points = ast.literal_eval(knowledge_points)
+    if search_rag_manager is None and use_search:
+        search_rag_manager = await run_blocking("embedding", get_search_rag_manager)
+    drafter = SearchEnhancedKnowledgeDrafter(llm, search_rag_manager=search_rag_manager, use_search=use_search)
+    # Context for the whole session is gathered up front, in one batched search.
+    datas = await drafter.aenrich_many([
+        drafter._validate_payload({
+            "learner_profile": learner_profile,
+            "learning_path": learning_path,
+            "learning_session": learning_session,
+            "knowledge_points": knowledge_points,
+            "knowledge_point": kp,
+            "retrieval_method": retrieval_method,
+        })
+        for kp in knowledge_points
+    ])
+    semaphore = asyncio.Semaphore(max_workers if allow_parallel else 1)
+
+    async def draft_one(index, data):
+        async with semaphore:
+            return index, await drafter.adraft(data, enrich=False)
 
-    if allow_parallel:
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            return list(executor.map(draft_one, knowledge_points))
-    else:
-        results: List[Any] = []
-        for kp in knowledge_points:
-            results.append(draft_one(kp))
-        return results
+    tasks = [asyncio.ensure_future(draft_one(index, data)) for index, data in enumerate(datas)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
 
 
 if __name__ == "__main__":
@@ -135,7 +327,7 @@ if __name__ == "__main__":
     import logging
 
     llm = LLMFactory.from_config(default_config.llm)
-    search_rag_manager = SearchRagManager.from_config(default_config)
+    search_rag_manager = get_search_rag_manager(default_config)
     logging.basicConfig(level=default_config.log_level)
     logger = logging.getLogger(__name__)
 
@@ -38,6 +38,17 @@ class LearningGoalRefiner(BaseAgent):
 		validated = RefinedLearningGoal.model_validate(raw_output)
 		return validated.model_dump()
 
+	async def arefine_goal(
+		self,
+		input_dict: Mapping[str, Any],
+	) -> JSONDict:
+		"""Async counterpart of :meth:`refine_goal`."""
+
+		payload_dict = RefineGoalPayload(**input_dict).model_dump()
+		raw_output = await self.ainvoke(payload_dict, task_prompt=learning_goal_refiner_task_prompt)
+		validated = RefinedLearningGoal.model_validate(raw_output)
+		return validated.model_dump()
+
 def refine_learning_goal_with_llm(
 	llm: Any,
 	learning_goal: str,
@@ -52,3 +63,19 @@ def refine_learning_goal_with_llm(
 			"learner_information": learner_information,
 		}
 	)
+
+
+async def arefine_learning_goal_with_llm(
+	llm: Any,
+	learning_goal: str,
+	learner_information: str = "",
+) -> JSONDict:
+	"""Async counterpart of :func:`refine_learning_goal_with_llm`."""
+
+	refiner = LearningGoalRefiner(llm)
+	return await refiner.arefine_goal(
+		{
+			"learning_goal": learning_goal,
+			"learner_information": learner_information,
+		}
+	)
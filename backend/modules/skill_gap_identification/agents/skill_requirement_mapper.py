@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 from collections.abc import Mapping
-from typing import Any, Dict, TypeAlias
+from typing import Any, Dict, Optional, TypeAlias
 
 from pydantic import BaseModel, Field
 from base import BaseAgent
+from base.semantic_cache import SemanticCache, get_semantic_cache
+from utils.concurrency import run_blocking
 from ..prompts.skill_requirement_mapper import skill_requirement_mapper_system_prompt, skill_requirement_mapper_task_prompt
 from ..schemas import SkillRequirements
 
@@ -22,18 +24,40 @@ class SkillRequirementMapper(BaseAgent):
 
 	name: str = "SkillRequirementMapper"
 
-	def __init__(self, model: Any) -> None:
+	def __init__(self, model: Any, semantic_cache: Optional[SemanticCache] = None) -> None:
 		super().__init__(
 			model=model,
 			system_prompt=skill_requirement_mapper_system_prompt,
 			jsonalize_output=True,
 		)
+		# Goals phrased differently but meaning the same reuse earlier mappings.
+		self.semantic_cache = semantic_cache if semantic_cache is not None else get_semantic_cache("skill_requirements")
 
 	def map_goal_to_skill(self, input_dict: Mapping[str, Any]) -> JSONDict:
 		payload_dict = Goal2SkillPayload(**input_dict).model_dump()
+		learning_goal = payload_dict["learning_goal"]
+		if self.semantic_cache is not None:
+			cached = self.semantic_cache.lookup(learning_goal)
+			if cached is not None:
+				return SkillRequirements.model_validate(cached).model_dump()
 		task_prompt = skill_requirement_mapper_task_prompt
 		raw_output = self.invoke(payload_dict, task_prompt=task_prompt)
 		validated = SkillRequirements.model_validate(raw_output)
+		if self.semantic_cache is not None:
+			self.semantic_cache.store(learning_goal, validated.model_dump(mode="json"))
+		return validated.model_dump()
+
+	async def amap_goal_to_skill(self, input_dict: Mapping[str, Any]) -> JSONDict:
+		payload_dict = Goal2SkillPayload(**input_dict).model_dump()
+		learning_goal = payload_dict["learning_goal"]
+		if self.semantic_cache is not None:
+			cached = await run_blocking("embedding", self.semantic_cache.lookup, learning_goal)
+			if cached is not None:
+				return SkillRequirements.model_validate(cached).model_dump()
+		raw_output = await self.ainvoke(payload_dict, task_prompt=skill_requirement_mapper_task_prompt)
+		validated = SkillRequirements.model_validate(raw_output)
+		if self.semantic_cache is not None:
+			await run_blocking("embedding", self.semantic_cache.store, learning_goal, validated.model_dump(mode="json"))
 		return validated.model_dump()
 
 
@@ -41,3 +65,7 @@ def map_goal_to_skills_with_llm(llm: Any, learning_goal: str) -> JSONDict:
 	mapper = SkillRequirementMapper(llm)
 	return mapper.map_goal_to_skill({"learning_goal": learning_goal})
 
+
+async def amap_goal_to_skills_with_llm(llm: Any, learning_goal: str) -> JSONDict:
+	mapper = SkillRequirementMapper(llm)
+	return await mapper.amap_goal_to_skill({"learning_goal": learning_goal})
@@ -0,0 +1,125 @@
+"""Bounded thread pools for blocking work issued from async code paths.
+
+Async endpoints must never run CPU-bound or blocking I/O work (embedding,
+PDF parsing, synchronous search clients) on the event loop. Each kind of work
+gets its own bounded pool so, for example, a burst of PDF uploads cannot
+starve embedding calls.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_EXECUTOR_SIZES: Dict[str, int] = {
+    "io": 16,  # web search and other blocking network clients
+    "embedding": 4,  # embedding models and vectorstore reads/writes
+    "pdf": 2,  # PDF text extraction
+    "ingest": 1,  # background vectorstore writes, kept off request paths
+}
+
+_executor_sizes: Dict[str, int] = dict(DEFAULT_EXECUTOR_SIZES)
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_lock = threading.Lock()
+
+
+def configure_executors(**sizes: Optional[int]) -> None:
+    """Set the worker count of named executors; must run before they are first used."""
+    with _lock:
+        for name, size in sizes.items():
+            if size is None:
+                continue
+            if name in _executors:
+                raise RuntimeError(f"Executor '{name}' is already running and cannot be resized.")
+            _executor_sizes[name] = int(size)
+
+
+def get_executor(name: str) -> ThreadPoolExecutor:
+    """Return the shared executor for ``name``, creating it on first use."""
+    executor = _executors.get(name)
+    if executor is not None:
+        return executor
+    with _lock:
+        executor = _executors.get(name)
+        if executor is None:
+            max_workers = _executor_sizes.get(name, DEFAULT_EXECUTOR_SIZES["io"])
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"genmentor-{name}")
+            _executors[name] = executor
+        return executor
+
+
+async def run_blocking(executor_name: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run ``func`` in the named executor without blocking the event loop.
+
+    Context variables (e.g. per-request flags) are copied into the worker thread.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_executor(executor_name), call)
+
+
+def shutdown_executors(wait: bool = False) -> None:
+    with _lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=wait)
+        _executors.clear()
+
+
+class ReadWriteLock:
+    """Many concurrent readers or one writer; waiting writers block new readers.
+
+    The writing thread may re-enter both sides, so a write section can call
+    helpers that take the lock again.
+    """
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer: Optional[int] = None
+        self._write_depth = 0
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        if self._writer == threading.get_ident():
+            yield
+            return
+        with self._cond:
+            while self._writer is not None or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me:
+                self._writers_waiting += 1
+                try:
+                    while self._writer is not None or self._readers:
+                        self._cond.wait()
+                finally:
+                    self._writers_waiting -= 1
+                self._writer = me
+            self._write_depth += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._write_depth -= 1
+                if self._write_depth == 0:
+                    self._writer = None
+                    self._cond.notify_all()
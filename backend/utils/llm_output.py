@@ -49,6 +49,129 @@ def extract_think_and_result(info):
     return think_content, result_content
 
 
+class ThinkTagFilter:
+    """Incrementally strip <think>...</think> spans from streamed text.
+
+    Tags may be split across chunks, so a possible partial tag at the end of a
+    chunk is held back until the next chunk arrives.
+    """
+
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
+
+    def __init__(self):
+        self._buffer = ""
+        self._in_think = False
+        self._emitted = False
+
+    def feed(self, text):
+        self._buffer += text
+        output = []
+        while True:
+            tag = self.CLOSE_TAG if self._in_think else self.OPEN_TAG
+            idx = self._buffer.find(tag)
+            if idx == -1:
+                keep = self._partial_tag_length(self._buffer, tag)
+                cut = len(self._buffer) - keep
+                if not self._in_think:
+                    output.append(self._buffer[:cut])
+                self._buffer = self._buffer[cut:]
+                break
+            if not self._in_think:
+                output.append(self._buffer[:idx])
+            self._buffer = self._buffer[idx + len(tag):]
+            self._in_think = not self._in_think
+        return self._emit("".join(output))
+
+    def flush(self):
+        rest = "" if self._in_think else self._buffer
+        self._buffer = ""
+        return self._emit(rest)
+
+    def _emit(self, text):
+        if not self._emitted:
+            # Match extract_think_and_result, which strips the text around removed spans.
+            text = text.lstrip()
+            self._emitted = bool(text)
+        return text
+
+    @staticmethod
+    def _partial_tag_length(text, tag):
+        for size in range(min(len(text), len(tag) - 1), 0, -1):
+            if text.endswith(tag[:size]):
+                return size
+        return 0
+
+
+class JsonArrayItemParser:
+    """Incrementally yield the objects of a JSON array from streamed text.
+
+    With ``key``, the array is the value of that key (e.g. ``{"knowledge_points":
+    [...]}``), otherwise the first array in the text. Each element object is
+    parsed as soon as its closing brace arrives. Text outside the JSON, such as
+    a code fence, is ignored.
+    """
+
+    def __init__(self, key=None):
+        self.key = key
+        self.text = ""
+        self._pos = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_string = None
+        self._current_key = None
+        self._depth = 0
+        self._array_depth = None
+        self._item_start = None
+        self.done = False
+
+    def feed(self, text):
+        """Consume a chunk and return the element objects completed by it."""
+        self.text += text
+        items = []
+        while self._pos < len(self.text) and not self.done:
+            i, c = self._pos, self.text[self._pos]
+            self._pos += 1
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._last_string = self.text[self._string_start: i + 1]
+                continue
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c == ":":
+                try:
+                    self._current_key = json.loads(self._last_string) if self._last_string else None
+                except json.JSONDecodeError:
+                    self._current_key = None
+            elif c == ",":
+                self._current_key = None
+            elif c in "{[":
+                self._depth += 1
+                if c == "[" and self._array_depth is None and (self.key is None or self._current_key == self.key):
+                    self._array_depth = self._depth
+                elif c == "{" and self._array_depth is not None and self._depth == self._array_depth + 1:
+                    self._item_start = i
+                self._current_key = None
+            elif c in "}]":
+                if c == "}" and self._item_start is not None and self._depth == self._array_depth + 1:
+                    try:
+                        items.append(json.loads(self.text[self._item_start: i + 1]))
+                    except json.JSONDecodeError:
+                        pass  # left for the caller's final parse of the whole text
+                    self._item_start = None
+                elif c == "]" and self._depth == self._array_depth:
+                    self.done = True
+                self._depth -= 1
+        return items
+
+
 def preprocess_response(response, only_text=True, exclude_think=False, json_output=False):
     if only_text or exclude_think or json_output:
         response = get_text_from_response(response)
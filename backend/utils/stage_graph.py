@@ -0,0 +1,202 @@
+"""Run a pipeline of dependent stages as a graph instead of a sequence.
+
+Multi-agent pipelines (explore → draft → integrate / quiz) are written as a
+chain of awaits, so every stage waits for the one before it even when it only
+needs an earlier result. A ``StageGraph`` declares each stage with the stages
+it depends on; every stage starts as soon as its dependencies finish, so the
+end-to-end time follows the critical path rather than the sum of the stages.
+
+A stage function receives the results of its dependencies as keyword
+arguments, named after the stages. Per-stage timings are returned with the
+results, logged, and aggregated per graph for ``/runtime-stats``. Code that
+wants live progress (e.g. a background job) installs a listener with
+:func:`listen_stages`; it is called as each stage starts and finishes.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import inspect
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Called as listener(graph_name, stage_name, event, timing) with event "start" or "finish".
+StageListener = Callable[[str, str, str, Dict[str, float]], None]
+_stage_listener: contextvars.ContextVar[Optional[StageListener]] = contextvars.ContextVar("stage_listener", default=None)
+
+
+@contextlib.contextmanager
+def listen_stages(listener: StageListener) -> Iterator[None]:
+    """Report stage starts and finishes of graphs run in this context to ``listener``."""
+    token = _stage_listener.set(listener)
+    try:
+        yield
+    finally:
+        _stage_listener.reset(token)
+
+
+def _notify(graph_name: str, stage_name: str, event: str, timing: Dict[str, float]) -> None:
+    listener = _stage_listener.get()
+    if listener is None:
+        return
+    try:
+        listener(graph_name, stage_name, event, timing)
+    except Exception as e:
+        logger.warning(f"Stage listener failed on {graph_name}.{stage_name} {event}: {e}")
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable[..., Any]
+    deps: Tuple[str, ...] = ()
+
+
+@dataclass
+class StageRun:
+    """Results and timings of one graph run; times are seconds from the start of the run."""
+
+    results: Dict[str, Any] = field(default_factory=dict)
+    timings: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    total: float = 0.0
+
+    def critical_path(self, graph: "StageGraph") -> List[str]:
+        """The chain of stages that determined the total time, traced back from the last to finish."""
+        if not self.timings:
+            return []
+        path = [max(self.timings, key=lambda name: self.timings[name]["end"])]
+        while True:
+            deps = graph.stages[path[-1]].deps
+            if not deps:
+                break
+            path.append(max(deps, key=lambda name: self.timings[name]["end"]))
+        return path[::-1]
+
+
+class StageGraph:
+    """A small DAG executor for sync (thread pool) or async stage functions."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.stages: Dict[str, Stage] = {}
+
+    def add(self, name: str, func: Callable[..., Any], deps: Sequence[str] = ()) -> "StageGraph":
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' is already defined in graph '{self.name}'.")
+        unknown = [dep for dep in deps if dep not in self.stages]
+        if unknown:
+            # Requiring dependencies to be added first also rules out cycles.
+            raise ValueError(f"Stage '{name}' depends on undefined stages: {', '.join(unknown)}.")
+        self.stages[name] = Stage(name, func, tuple(deps))
+        return self
+
+    def _finish(self, run: StageRun, started: float) -> StageRun:
+        run.total = time.perf_counter() - started
+        record_stage_run(self.name, run)
+        path = run.critical_path(self)
+        logger.info(
+            f"{self.name}: {run.total:.2f}s total, critical path {' -> '.join(path)}; "
+            + ", ".join(f"{name} {timing['duration']:.2f}s" for name, timing in run.timings.items())
+        )
+        return run
+
+    async def arun(self) -> StageRun:
+        """Run every stage on the event loop; sync stage functions must not block."""
+        run = StageRun()
+        started = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def execute(stage: Stage) -> Any:
+            results = await asyncio.gather(*(tasks[dep] for dep in stage.deps))
+            start = time.perf_counter() - started
+            _notify(self.name, stage.name, "start", {"start": start})
+            result = stage.func(**dict(zip(stage.deps, results)))
+            if inspect.isawaitable(result):
+                result = await result
+            end = time.perf_counter() - started
+            run.timings[stage.name] = {"start": start, "end": end, "duration": end - start}
+            run.results[stage.name] = result
+            _notify(self.name, stage.name, "finish", run.timings[stage.name])
+            return result
+
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.ensure_future(execute(stage))
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        return self._finish(run, started)
+
+    def run(self, max_workers: Optional[int] = None) -> StageRun:
+        """Run sync stage functions in a private thread pool, each as soon as its dependencies finish."""
+        run = StageRun()
+        started = time.perf_counter()
+        pending = dict(self.stages)
+        running: Dict[Future, str] = {}
+
+        def execute(stage: Stage, kwargs: Dict[str, Any]) -> Any:
+            start = time.perf_counter() - started
+            _notify(self.name, stage.name, "start", {"start": start})
+            result = stage.func(**kwargs)
+            end = time.perf_counter() - started
+            run.timings[stage.name] = {"start": start, "end": end, "duration": end - start}
+            _notify(self.name, stage.name, "finish", run.timings[stage.name])
+            return result
+
+        with ThreadPoolExecutor(max_workers=max_workers or len(self.stages) or 1, thread_name_prefix=f"genmentor-{self.name}") as pool:
+            while pending or running:
+                for stage in [stage for stage in pending.values() if all(dep in run.results for dep in stage.deps)]:
+                    del pending[stage.name]
+                    kwargs = {dep: run.results[dep] for dep in stage.deps}
+                    # Stages see the caller's context variables, as with run_blocking.
+                    ctx = contextvars.copy_context()
+                    running[pool.submit(ctx.run, execute, stage, kwargs)] = stage.name
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        for other in running:
+                            other.cancel()
+                        raise error
+                    run.results[name] = future.result()
+        return self._finish(run, started)
+
+
+_stats_lock = threading.Lock()
+_stage_stats: Dict[str, Dict[str, Any]] = {}
+
+
+def record_stage_run(graph_name: str, run: StageRun) -> None:
+    with _stats_lock:
+        graph = _stage_stats.setdefault(graph_name, {"runs": 0, "total_seconds": 0.0, "stages": {}})
+        graph["runs"] += 1
+        graph["total_seconds"] += run.total
+        for name, timing in run.timings.items():
+            stage = graph["stages"].setdefault(name, {"runs": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            stage["runs"] += 1
+            stage["total_seconds"] += timing["duration"]
+            stage["max_seconds"] = max(stage["max_seconds"], timing["duration"])
+
+
+def stage_graph_stats() -> Dict[str, Any]:
+    """Mean and max duration per graph and stage since startup."""
+    with _stats_lock:
+        return {
+            graph_name: {
+                "runs": graph["runs"],
+                "mean_seconds": graph["total_seconds"] / graph["runs"],
+                "stages": {
+                    name: {"runs": stage["runs"], "mean_seconds": stage["total_seconds"] / stage["runs"], "max_seconds": stage["max_seconds"]}
+                    for name, stage in graph["stages"].items()
+                },
+            }
+            for graph_name, graph in _stage_stats.items()
+        }
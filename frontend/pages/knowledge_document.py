@@ -7,7 +7,7 @@ import streamlit as st
 import streamlit.components.v1 as components
 import urllib.parse as urlparse
 from components.time_tracking import track_session_learning_start_time
-from utils.request_api import draft_knowledge_points, explore_knowledge_points, generate_document_quizzes, integrate_learning_document, update_learner_profile
+from utils.request_api import draft_knowledge_points, explore_knowledge_points, iter_knowledge_drafts, generate_document_quizzes, integrate_learning_document, update_learner_profile
 from utils.format import prepare_markdown_document
 from utils.state import get_current_session_uid, save_persistent_state
 from config import use_mock_data, use_search
@@ -202,16 +202,7 @@ def render_content_preparation(goal):
         with st.expander("View Explored Knowledge Points", expanded=False):
             for kp in knowledge_points:
                 st.write(f"- {kp['name']} (`{kp['type']}`)")
-    with st.spinner("Stage 2/4 - Drafting knowledge points..."):
-        knowledge_drafts = draft_knowledge_points(
-            goal["learner_profile"],
-            goal["learning_path"],
-            learning_session,
-            knowledge_points,
-            use_search=use_search,
-            allow_parallel=True,
-            llm_type="gpt4o"
-        )
+    knowledge_drafts = render_knowledge_drafts_progressively(goal, learning_session, knowledge_points)
     if knowledge_drafts is None:
         st.error("Failed to draft knowledge points.")
         return
@@ -252,6 +243,52 @@ def render_content_preparation(goal):
     st.rerun()
     return learning_content
 
+def render_knowledge_drafts_progressively(goal, learning_session, knowledge_points):
+    """Stage 2: show each knowledge draft as soon as the backend finishes it.
+
+    Falls back to the blocking endpoint if the stream cannot be opened.
+    """
+    knowledge_drafts = [None] * len(knowledge_points)
+    progress = st.progress(0.0, text="Stage 2/4 - Drafting knowledge points...")
+    with st.expander("View Knowledge Drafts", expanded=True):
+        placeholders = [st.empty() for _ in knowledge_points]
+        for placeholder, kp in zip(placeholders, knowledge_points):
+            placeholder.caption(f"⏳ Drafting {kp['name']}...")
+        completed = 0
+        try:
+            for index, draft in iter_knowledge_drafts(
+                goal["learner_profile"],
+                goal["learning_path"],
+                learning_session,
+                knowledge_points,
+                use_search=use_search,
+                allow_parallel=True,
+                llm_type="gpt4o"
+            ):
+                knowledge_drafts[index] = draft
+                completed += 1
+                placeholders[index].markdown(f"#### {draft['title']}\n\n{draft['content']}")
+                progress.progress(completed / len(knowledge_points), text=f"Stage 2/4 - Drafted {completed}/{len(knowledge_points)} knowledge points...")
+        except Exception as e:
+            if completed:
+                st.write("Failed to draft knowledge points. Error:", e)
+                progress.empty()
+                return None
+            with st.spinner("Stage 2/4 - Drafting knowledge points..."):
+                knowledge_drafts = draft_knowledge_points(
+                    goal["learner_profile"],
+                    goal["learning_path"],
+                    learning_session,
+                    knowledge_points,
+                    use_search=use_search,
+                    allow_parallel=True,
+                    llm_type="gpt4o"
+                )
+    progress.empty()
+    if knowledge_drafts is None or any(draft is None for draft in knowledge_drafts):
+        return None
+    return knowledge_drafts
+
 def render_document_content_by_section(document):
     selected_gid = st.session_state["selected_goal_id"]
     session_id = st.session_state["selected_session_id"]
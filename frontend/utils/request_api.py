@@ -1,10 +1,12 @@
 import json
+import time
 import httpx
 import streamlit as st
 from config import backend_endpoint, use_mock_data, use_search
 
 API_NAMES = {
     "chat_with_tutor": "chat-with-tutor",
+    "chat_with_tutor_stream": "chat-with-tutor-stream",
     "refine_goal": "refine-learning-goal",
     "identify_skill_gap": "identify-skill-gap-with-info",
     "create_profile": "create-learner-profile-with-info",
@@ -19,6 +21,7 @@ API_NAMES = {
     "explore_knowledge_points": "explore-knowledge-points",
     "draft_knowledge_point": "draft-knowledge-point",
     "draft_knowledge_points": "draft-knowledge-points",
+    "draft_knowledge_points_stream": "draft-knowledge-points-stream",
     "integrate_learning_document": "integrate-learning-document",
     "generate_document_quizzes": "generate-document-quizzes",
 }
@@ -42,6 +45,58 @@ def make_post_request(api_name, data, mock_data_path=None, timeout=500):
         st.write("Failed to fetch data. Error:", e)
         return {}
 
+def make_job_request(api_name, data, mock_data_path=None, timeout=1800, poll_interval=2.0, on_progress=None):
+    """Run a long endpoint as a backend job: submit it, poll until it finishes and return its result.
+
+    `on_progress` is called with the job's progress whenever it changes. Falls
+    back to a direct request when the backend has background jobs disabled.
+    """
+    if use_mock_data and mock_data_path:
+        return json.load(open(mock_data_path))
+
+    try:
+        response = httpx.post(f"{backend_endpoint}jobs/{api_name}", json=data, timeout=30)
+        if response.status_code == 503:
+            return make_post_request(api_name, data, mock_data_path, timeout=timeout)
+        if response.status_code != 202:
+            st.write("Failed to submit job. Status code:", response.status_code)
+            return None
+        job = response.json()
+        deadline = time.monotonic() + timeout
+        progress = None
+        while job["status"] in ("queued", "running"):
+            if time.monotonic() > deadline:
+                httpx.post(f"{backend_endpoint}jobs/{job['job_id']}/cancel", timeout=30)
+                st.write("Job timed out and was cancelled.")
+                return None
+            time.sleep(poll_interval)
+            job = httpx.get(f"{backend_endpoint}jobs/{job['job_id']}", timeout=30).json()
+            if on_progress and job.get("progress") != progress:
+                progress = job.get("progress")
+                on_progress(progress)
+        if job["status"] != "succeeded":
+            st.write(f"Job {job['status']}:", job.get("error"))
+            return None
+        return job["result"]
+    except Exception as e:
+        st.write("Failed to fetch data. Error:", e)
+        return {}
+
+def iter_sse_events(api_name, data, timeout=500):
+    """POST to a server-sent events endpoint and yield `(event, data)` pairs as they arrive."""
+    backend_url = f"{backend_endpoint}{api_name}"
+    with httpx.stream("POST", backend_url, json=data, timeout=timeout) as response:
+        response.raise_for_status()
+        event, data_lines = "message", []
+        for line in response.iter_lines():
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data_lines.append(line[len("data:"):].strip())
+            elif not line and data_lines:
+                yield event, json.loads("\n".join(data_lines))
+                event, data_lines = "message", []
+
 def get_available_models(backend_endpoint):
     backend_url = f"{backend_endpoint}list-llm-models"
     try:
@@ -65,6 +120,35 @@ def chat_with_tutor(chat_messages, learner_profile, llm_type="gpt4o", method_nam
     response = make_post_request(API_NAMES["chat_with_tutor"], data, "./assets/data_example/ai)tutor_chat.json")
     return response.get("response") if response else None
 
+def chat_with_tutor_stream(chat_messages, learner_profile, llm_type="gpt4o", method_name="genmentor"):
+    """Yield the tutor reply in chunks as the backend generates it.
+
+    Falls back to the blocking endpoint when streaming is unavailable.
+    """
+    if use_mock_data:
+        yield chat_with_tutor(chat_messages, learner_profile, llm_type, method_name) or ""
+        return
+    data = {
+        "messages": str(chat_messages),
+        "learner_profile": str(learner_profile),
+        "llm_type": str(llm_type),
+        "method_name": str(method_name),
+    }
+    received_any = False
+    try:
+        for event, payload in iter_sse_events(API_NAMES["chat_with_tutor_stream"], data):
+            if event == "error":
+                raise RuntimeError(payload.get("detail", "stream failed"))
+            if event == "done":
+                break
+            received_any = True
+            yield payload.get("token", "")
+    except Exception as e:
+        if received_any:
+            st.write("Streaming interrupted. Error:", e)
+            return
+        yield chat_with_tutor(chat_messages, learner_profile, llm_type, method_name) or ""
+
 def refine_learning_goal(learning_goal, learner_information, llm_type="gpt4o", method_name="genmentor"):
     data = {
         "learning_goal": str(learning_goal),
@@ -118,7 +202,7 @@ def schedule_learning_path(learner_profile, session_count, llm_type="gpt4o", met
         "llm_type": str(llm_type),
         "method_name": str(method_name),
     }
-    response = make_post_request(API_NAMES["schedule_path"], data, "./assets/data_example/learning_path.json")
+    response = make_job_request(API_NAMES["schedule_path"], data, "./assets/data_example/learning_path.json")
     return response.get("learning_path") if response else None
 
 def reschedule_learning_path(learning_path, learner_profile, session_count, other_feedback="", llm_type="gpt4o", method_name="genmentor"):
@@ -185,9 +269,37 @@ def draft_knowledge_points(learner_profile, learning_path, learning_session, kno
         "llm_type": str(llm_type),
         "method_name": str(method_name),
     }
-    response = make_post_request("draft-knowledge-points", data, "./assets/data_example/knowledge_points.json")
+    response = make_job_request(API_NAMES["draft_knowledge_points"], data, "./assets/data_example/knowledge_points.json")
     return response.get("knowledge_drafts") if response else None
 
+def iter_knowledge_drafts(learner_profile, learning_path, learning_session, knowledge_points, allow_parallel, use_search, llm_type="gpt4o", method_name="genmentor", timeout=500):
+    """Yield `(index, knowledge_draft)` pairs as the backend finishes each draft.
+
+    Raises on transport errors or when the backend reports a drafting failure.
+    """
+    data = {
+        "learner_profile": str(learner_profile),
+        "learning_path": str(learning_path),
+        "learning_session": str(learning_session),
+        "knowledge_points": str(knowledge_points),
+        "allow_parallel": allow_parallel,
+        "use_search": use_search,
+        "llm_type": str(llm_type),
+        "method_name": str(method_name),
+    }
+    backend_url = f"{backend_endpoint}{API_NAMES['draft_knowledge_points_stream']}"
+    with httpx.stream("POST", backend_url, json=data, timeout=timeout) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line.strip():
+                continue
+            message = json.loads(line)
+            if "error" in message:
+                raise RuntimeError(message["error"])
+            if message.get("done"):
+                return
+            yield message["index"], message["knowledge_draft"]
+
 # @st.cache_resource
 def integrate_learning_document(learner_profile, learning_path, learning_session, knowledge_points, knowledge_drafts, output_markdown=False, llm_type="gpt4o", method_name="genmentor"):
     data = {